@@ -4,11 +4,20 @@ import subprocess
 import time
 import os
 
+from concurrent.futures import ThreadPoolExecutor
+
 from utils.logger import LOG
 from utils.settings import BACKGROUND, CONFIG
 from utils.constants import CONSTANTS
 from utils.globals import GLOBALS
 
+# Pillow is optional, ffmpeg is used for scaling when not installed
+try:
+    from PIL import Image
+    _PIL_SUPPORT = True
+except ImportError:
+    _PIL_SUPPORT = False
+
 
 class BackGround(object):
 
@@ -28,35 +37,96 @@ class BackGround(object):
     NOLINK_2P8  = "nolink_2P8.png"
     NOLINK_3P4  = "nolink_3P4.png"
 
+    # Window count -> NO LINK background
+    _NOLINK_MAP = {
+        1: NOLINK_1X1,
+        4: NOLINK_2X2,
+        6: NOLINK_1P5,
+        7: NOLINK_3P4,
+        8: NOLINK_1P7,
+        9: NOLINK_3X3,
+        10: NOLINK_2P8,
+        13: NOLINK_1P12,
+        16: NOLINK_4X4
+    }
+
+    # Cache file suffix for the virtual screen size, set by init_paths()
+    _suffix = ""
+
+    # Window count -> scaled background known to exist in the cache directory
+    _existing = {}
+
+    @classmethod
+    def init_paths(cls):
+        """Precompute the cache file suffix, call when the virtual screen size is known"""
+
+        cls._suffix = str("_%i_%i.png" % (CONSTANTS.VIRT_SCREEN_WIDTH, CONSTANTS.VIRT_SCREEN_HEIGHT))
+        cls._existing.clear()
+
     @classmethod
     def NOLINK(cls, window_count):
         """Get NO LINK image background based on window count"""
 
-        _map = ({
-            1: cls.NOLINK_1X1,
-            4: cls.NOLINK_2X2,
-            6: cls.NOLINK_1P5,
-            7: cls.NOLINK_3P4,
-            8: cls.NOLINK_1P7,
-            9: cls.NOLINK_3X3,
-            10: cls.NOLINK_2P8,
-            13: cls.NOLINK_1P12,
-            16: cls.NOLINK_4X4
-        })
-
-        file_path = str("%s%s_%i_%i.png" % (CONSTANTS.CACHE_DIR, _map.get(window_count).split('.png')[0],
-                                            CONSTANTS.VIRT_SCREEN_WIDTH, CONSTANTS.VIRT_SCREEN_HEIGHT))
+        file_path = cls._existing.get(window_count)
+        if file_path:
+            return file_path
+
+        if window_count not in cls._NOLINK_MAP:
+            return ""
+
+        file_path = cls._nolink_cache_path(window_count)
 
         if os.path.isfile(file_path):
+            cls._existing[window_count] = file_path
             return file_path
 
         if BackGroundManager.scale_background(
-                src_path=CONSTANTS.RESOURCE_DIR_BCKGRND + _map.get(window_count), dest_path=file_path,
+                src_path=CONSTANTS.RESOURCE_DIR_BCKGRND + cls._NOLINK_MAP.get(window_count), dest_path=file_path,
                 dest_width=CONSTANTS.VIRT_SCREEN_WIDTH, dest_height=CONSTANTS.VIRT_SCREEN_HEIGHT):
+            cls._existing[window_count] = file_path
             return file_path
 
         return ""
 
+    @classmethod
+    def build_cache(cls):
+        """Scale all missing NO LINK backgrounds to the virtual screen size at once"""
+
+        jobs = []
+        job_counts = []
+
+        for window_count, filename in cls._NOLINK_MAP.items():
+            file_path = cls._nolink_cache_path(window_count)
+
+            if os.path.isfile(file_path):
+                cls._existing[window_count] = file_path
+            else:
+                job_counts.append(window_count)
+                jobs.append((CONSTANTS.RESOURCE_DIR_BCKGRND + filename, file_path,
+                             CONSTANTS.VIRT_SCREEN_WIDTH, CONSTANTS.VIRT_SCREEN_HEIGHT))
+
+        if jobs:
+            BackGroundManager.scale_backgrounds(jobs)
+
+            for window_count, (_, file_path, _, _) in zip(job_counts, jobs):
+                if os.path.isfile(file_path):
+                    cls._existing[window_count] = file_path
+
+    @classmethod
+    def clear_cache(cls):
+        """Forget about the scaled backgrounds, call when the cache directory is cleared"""
+
+        cls._existing.clear()
+
+    @classmethod
+    def _nolink_cache_path(cls, window_count):
+        """Get the cache path of the scaled NO LINK background"""
+
+        if not cls._suffix:
+            cls.init_paths()
+
+        return CONSTANTS.CACHE_DIR + cls._NOLINK_MAP.get(window_count)[:-len(".png")] + cls._suffix
+
 
 class BackGroundManager(object):
 
@@ -67,10 +137,23 @@ class BackGroundManager(object):
     _proc_background    = [None for _ in range(GLOBALS.NUM_DISPLAYS)]
     _icons              = [[] for _ in range(GLOBALS.NUM_DISPLAYS)]
     _backgrounds        = [[] for _ in range(GLOBALS.NUM_DISPLAYS)]
+    _icon_tokens        = [{} for _ in range(GLOBALS.NUM_DISPLAYS)]    # Filename -> pipng stdin token (queue index)
+    _background_tokens  = [{} for _ in range(GLOBALS.NUM_DISPLAYS)]    # Filename -> pipng stdin token (queue index)
 
     active_icon         = ["" for _ in range(GLOBALS.NUM_DISPLAYS)]
     active_icon_display = ["" for _ in range(GLOBALS.NUM_DISPLAYS)]
     active_background   = ["" for _ in range(GLOBALS.NUM_DISPLAYS)]
+    _time_icon_hidden   = [0 for _ in range(GLOBALS.NUM_DISPLAYS)]
+
+    _pipng_sync_sec     = 0.025     # Time pipng needs to process a stdin command
+
+    # Icons available for the instant methods
+    _instant_icons      = [BackGround.LOADING, BackGround.PAUSED, BackGround.CONTROL]
+    _instant_tokens     = {icon: str(idx).encode('utf-8') for idx, icon in enumerate(_instant_icons)}
+
+    # pipng stdin commands
+    _HIDE_TOKEN         = "i".encode('utf-8')
+    _CLOSE_TOKEN        = "c".encode('utf-8')
 
     _background_layer = -100    # Must be higher than -127 to hide the framebuffer
     _foreground_layer = 1000    # Must be higher than the OMXplayer layers
@@ -84,21 +167,34 @@ class BackGroundManager(object):
 
         display_idx = 1 if display_idx == 1 else 0
 
-        cls.hide_icon_instant(display_idx)
+        if filename not in cls._instant_tokens:
+            return
 
-        pngview_cmd = ["pipng",
-                "-b", "0",                                  # No 2nd background layer under image
-                "-l", str(cls._foreground_layer + 1),       # Set layer number
-                "-d", "2" if display_idx == 0 else "7",     # Set display number
-                "-x", str(CONSTANTS.ICON_OFFSET_X),         # 60px offset x-axis
-                "-y", str(CONSTANTS.ICON_OFFSET_Y),         # 60px offset y-axis
-                "-n",                                       # Non interactive mode
-                "-h",                                       # Hide lower layers
-                str(CONSTANTS.RESOURCE_DIR_ICONS + filename)
-            ]
+        # Keep one pipng instance alive per display, icons are switched with stdin
+        if not cls._proc_instant_icon[display_idx]:
+
+            pngview_cmd = ["pipng",
+                    "-b", "0",                                  # No 2nd background layer under image
+                    "-l", str(cls._foreground_layer + 1),       # Set layer number
+                    "-d", "2" if display_idx == 0 else "7",     # Set display number
+                    "-i",                                       # Start with all images invisible
+                    "-x", str(CONSTANTS.ICON_OFFSET_X),         # 60px offset x-axis
+                    "-y", str(CONSTANTS.ICON_OFFSET_Y),         # 60px offset y-axis
+                    "-h",                                       # Hide lower layers
+                ]
+
+            # Add all instant icons, currently limited to 10
+            for image in cls._instant_icons:
+                pngview_cmd.append(CONSTANTS.RESOURCE_DIR_ICONS + image)
+
+            LOG.DEBUG(cls._MODULE, "Loading instant pipng for display '%i' with command '%s'" %
+                (display_idx, pngview_cmd))
+
+            cls._proc_instant_icon[display_idx] = \
+                subprocess.Popen(pngview_cmd, shell=False, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
 
-        cls._proc_instant_icon[display_idx] = \
-            subprocess.Popen(pngview_cmd, shell=False, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        cls._proc_instant_icon[display_idx].stdin.write(cls._instant_tokens[filename])
+        cls._proc_instant_icon[display_idx].stdin.flush()
 
     @classmethod
     def hide_icon_instant(cls, display_idx=0):
@@ -110,8 +206,27 @@ class BackGroundManager(object):
         display_idx = 1 if display_idx == 1 else 0
 
         if cls._proc_instant_icon[display_idx]:
-            cls._proc_instant_icon[display_idx].terminate()
-            cls._proc_instant_icon[display_idx] = None
+            cls._proc_instant_icon[display_idx].stdin.write(cls._HIDE_TOKEN)
+            cls._proc_instant_icon[display_idx].stdin.flush()
+
+    @classmethod
+    def stop_icon_instant(cls, display_idx=0):
+        """Stop the pipng instance of the instant methods, it hides the lower layers while it runs"""
+
+        proc = cls._proc_instant_icon[display_idx]
+        if not proc:
+            return
+
+        cls._proc_instant_icon[display_idx] = None
+
+        try:
+            proc.stdin.write(cls._CLOSE_TOKEN)
+            proc.stdin.close()
+            proc.wait(timeout=0.5)
+        except (OSError, subprocess.TimeoutExpired):
+            # Already gone or not responding
+            proc.kill()
+            proc.wait()
 
     @classmethod
     def add_icon(cls, filename, display_idx=0):
@@ -120,10 +235,10 @@ class BackGroundManager(object):
         display_idx = 1 if display_idx == 1 else 0
 
         # Already present? -> ignore
-        for image in cls._icons[display_idx]:
-            if image == filename:
-                return
+        if filename in cls._icon_tokens[display_idx]:
+            return
 
+        cls._icon_tokens[display_idx][filename] = str(len(cls._icons[display_idx])).encode('utf-8')
         cls._icons[display_idx].append(filename)
 
     @classmethod
@@ -138,10 +253,10 @@ class BackGroundManager(object):
             return
 
         # Already present? -> ignore
-        for image in cls._backgrounds[display_idx]:
-            if image == file_path:
-                return
+        if file_path in cls._background_tokens[display_idx]:
+            return
 
+        cls._background_tokens[display_idx][file_path] = str(len(cls._backgrounds[display_idx])).encode('utf-8')
         cls._backgrounds[display_idx].append(file_path)
 
     @classmethod
@@ -153,17 +268,21 @@ class BackGroundManager(object):
 
         if CONFIG.BACKGROUND_MODE == BACKGROUND.HIDE_FRAMEBUFFER:
 
+            pngview_cmds = {}
+
             for display_idx in range(GLOBALS.NUM_DISPLAYS):
 
                 if len(cls._backgrounds[display_idx]) <= 0:
                     continue
 
-                subprocess.Popen(["pipng", "-b", "000F", "-n", "-d", "2" if display_idx == 0 else "7"],
-                    shell=False, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+                pngview_cmds[display_idx] = ["pipng", "-b", "000F", "-n", "-d", "2" if display_idx == 0 else "7"]
+
+            cls._spawn_pipng(pngview_cmds)
 
         else:
 
             static_background = CONFIG.BACKGROUND_MODE == BACKGROUND.STATIC
+            pngview_cmds = {}
 
             for display_idx in range(GLOBALS.NUM_DISPLAYS):
 
@@ -191,8 +310,10 @@ class BackGroundManager(object):
                 LOG.DEBUG(cls._MODULE, "Loading pipng for display '%i' with command '%s'" %
                     (display_idx + 1, pngview_cmd))
 
-                cls._proc_background[display_idx] = \
-                    subprocess.Popen(pngview_cmd, shell=False, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+                pngview_cmds[display_idx] = pngview_cmd
+
+            for display_idx, proc in cls._spawn_pipng(pngview_cmds).items():
+                cls._proc_background[display_idx] = proc
 
     @classmethod
     def load_icons(cls):
@@ -201,6 +322,8 @@ class BackGroundManager(object):
         if not CONFIG.ENABLE_ICONS or not GLOBALS.PIPNG_SUPPORT:
             return
 
+        pngview_cmds = {}
+
         for display_idx in range(GLOBALS.NUM_DISPLAYS):
 
             if len(cls._icons[display_idx]) <= 0:
@@ -222,8 +345,23 @@ class BackGroundManager(object):
             LOG.DEBUG(cls._MODULE, "Loading pipng for display '%i' with command '%s'" %
                 (display_idx, pngview_cmd))
 
-            cls._proc_icons[display_idx] = \
-                subprocess.Popen(pngview_cmd, shell=False, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            pngview_cmds[display_idx] = pngview_cmd
+
+        for display_idx, proc in cls._spawn_pipng(pngview_cmds).items():
+            cls._proc_icons[display_idx] = proc
+
+    @classmethod
+    def _spawn_pipng(cls, pngview_cmds):
+        """Spawn pipng instances for multiple displays concurrently, returns display index -> process"""
+
+        def spawn(pngview_cmd):
+            return subprocess.Popen(pngview_cmd, shell=False, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+        if len(pngview_cmds) <= 1:
+            return {display_idx: spawn(pngview_cmd) for display_idx, pngview_cmd in pngview_cmds.items()}
+
+        with ThreadPoolExecutor(max_workers=len(pngview_cmds)) as executor:
+            return dict(zip(pngview_cmds.keys(), executor.map(spawn, pngview_cmds.values())))
 
     @classmethod
     def show_icon(cls, filename, display_idx=0):
@@ -234,12 +372,18 @@ class BackGroundManager(object):
 
         display_idx = 1 if display_idx == 1 else 0
 
+        # pipng needs some milliseconds to read stdin after hiding an icon,
+        # only wait for the remaining part of that period
+        sync_delay = cls._time_icon_hidden[display_idx] + cls._pipng_sync_sec - time.monotonic()
+        if sync_delay > 0:
+            time.sleep(sync_delay)
+
         # Show new image/icon
-        for idx, image in enumerate(cls._icons[display_idx]):
-            if filename == image:
-                LOG.DEBUG(cls._MODULE, "setting icon '%s' visible for display '%i" % (filename, display_idx))
-                cls._proc_icons[display_idx].stdin.write(str(idx).encode('utf-8'))
-                cls._proc_icons[display_idx].stdin.flush()
+        token = cls._icon_tokens[display_idx].get(filename)
+        if token is not None:
+            LOG.DEBUG(cls._MODULE, "setting icon '%s' visible for display '%i" % (filename, display_idx))
+            cls._proc_icons[display_idx].stdin.write(token)
+            cls._proc_icons[display_idx].stdin.flush()
 
         cls.active_icon[display_idx] = filename
 
@@ -257,14 +401,15 @@ class BackGroundManager(object):
 
         LOG.DEBUG(cls._MODULE, "hiding icon '%s' for display '%i" % (cls.active_icon[display_idx], display_idx))
 
-        cls._proc_icons[display_idx].stdin.write("i".encode('utf-8'))
+        cls._proc_icons[display_idx].stdin.write(cls._HIDE_TOKEN)
         cls._proc_icons[display_idx].stdin.flush()
 
         cls.active_icon[display_idx] = ""
 
         # pipng needs some milliseconds to read stdin
-        # Especially important when hide_icon() will be immediately followed by show_icon()
-        time.sleep(0.025)
+        # Especially important when hide_icon() will be immediately followed by show_icon(),
+        # so show_icon() waits for the remaining time instead of delaying every hide
+        cls._time_icon_hidden[display_idx] = time.monotonic()
 
     @classmethod
     def show_background(cls, filename, display_idx=0):
@@ -279,11 +424,11 @@ class BackGroundManager(object):
             return
 
         # Show new image/icon
-        for idx, image in enumerate(cls._backgrounds[display_idx]):
-            if filename == image:
-                LOG.DEBUG(cls._MODULE, "setting background '%s' visible for display '%i" % (filename, display_idx))
-                cls._proc_background[display_idx].stdin.write(str(idx).encode('utf-8'))
-                cls._proc_background[display_idx].stdin.flush()
+        token = cls._background_tokens[display_idx].get(filename)
+        if token is not None:
+            LOG.DEBUG(cls._MODULE, "setting background '%s' visible for display '%i" % (filename, display_idx))
+            cls._proc_background[display_idx].stdin.write(token)
+            cls._proc_background[display_idx].stdin.flush()
 
         cls.active_background[display_idx] = filename
 
@@ -291,13 +436,28 @@ class BackGroundManager(object):
     def scale_background(cls, src_path, dest_path, dest_width, dest_height):
         """Scale background image to the requested width and height"""
 
+        # Scaling in-process is much faster than spawning ffmpeg
+        if _PIL_SUPPORT:
+            try:
+                with Image.open(src_path) as image:
+                    image.resize((dest_width, dest_height), Image.BICUBIC).save(dest_path, optimize=True)
+
+            except (OSError, ValueError):
+                LOG.ERROR(cls._MODULE, "Scaling background image '%s' failed" % src_path)
+
+            return os.path.isfile(dest_path)
+
         if not GLOBALS.FFMPEG_SUPPORT:
             return False
 
-        ffmpeg_cmd = str("ffmpeg -i '%s' -vf scale=%i:%i '%s'" % (src_path, dest_width, dest_height, dest_path))
+        ffmpeg_cmd = ["ffmpeg",
+            "-i", src_path,                                     # Source image
+            "-vf", "scale=%i:%i" % (dest_width, dest_height),   # Scale to requested size
+            dest_path                                           # Destination image
+        ]
 
         try:
-            subprocess.check_output(ffmpeg_cmd, shell=True, stderr=subprocess.STDOUT, timeout=5)
+            subprocess.check_output(ffmpeg_cmd, shell=False, stderr=subprocess.STDOUT, timeout=5)
 
         except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
             LOG.ERROR(cls._MODULE, "Scaling background image '%s' failed" % src_path)
@@ -307,6 +467,51 @@ class BackGroundManager(object):
 
         return False
 
+    @classmethod
+    def scale_backgrounds(cls, jobs):
+        """
+        Scale multiple background images with a single ffmpeg instance.
+        Jobs is a list of (src_path, dest_path, dest_width, dest_height) tuples.
+        """
+
+        # No process startup cost to amortize when scaling in-process
+        if _PIL_SUPPORT:
+            scaled = True
+
+            for src_path, dest_path, dest_width, dest_height in jobs:
+                scaled = cls.scale_background(src_path, dest_path, dest_width, dest_height) and scaled
+
+            return scaled
+
+        if not GLOBALS.FFMPEG_SUPPORT or not jobs:
+            return False
+
+        ffmpeg_cmd = ["ffmpeg"]
+        filters = []
+        outputs = []
+
+        for idx, (src_path, dest_path, dest_width, dest_height) in enumerate(jobs):
+            ffmpeg_cmd.extend(["-i", src_path])
+            filters.append("[%i:v]scale=%i:%i[out%i]" % (idx, dest_width, dest_height, idx))
+            outputs.extend(["-map", "[out%i]" % idx, dest_path])
+
+        ffmpeg_cmd.extend(["-filter_complex", ";".join(filters)])
+        ffmpeg_cmd.extend(outputs)
+
+        LOG.DEBUG(cls._MODULE, "Scaling '%i' background images with command '%s'" % (len(jobs), ffmpeg_cmd))
+
+        try:
+            subprocess.check_output(ffmpeg_cmd, shell=False, stderr=subprocess.STDOUT, timeout=5 * len(jobs))
+
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+            LOG.ERROR(cls._MODULE, "Scaling '%i' background images failed" % len(jobs))
+
+        for _, dest_path, _, _ in jobs:
+            if not os.path.isfile(dest_path):
+                return False
+
+        return True
+
     @classmethod
     def destroy(cls):
         """Destroy pipng instances"""
@@ -317,9 +522,13 @@ class BackGroundManager(object):
         if CONFIG.ENABLE_ICONS:
             for display_idx in range(GLOBALS.NUM_DISPLAYS):
                 if cls._proc_icons[display_idx]:
-                    cls._proc_icons[display_idx].stdin.write("c".encode('utf-8'))
+                    cls._proc_icons[display_idx].stdin.write(cls._CLOSE_TOKEN)
+
+        # Not limited to the active displays, so none is left hiding the lower layers after exit
+        for display_idx in range(len(cls._proc_instant_icon)):
+            cls.stop_icon_instant(display_idx=display_idx)
 
         if CONFIG.BACKGROUND_MODE == BACKGROUND.DYNAMIC:
             for display_idx in range(GLOBALS.NUM_DISPLAYS):
                 if cls._proc_background[display_idx]:
-                    cls._proc_background[display_idx].stdin.write("c".encode('utf-8'))
\ No newline at end of file
+                    cls._proc_background[display_idx].stdin.write(cls._CLOSE_TOKEN)
\ No newline at end of file
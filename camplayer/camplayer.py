@@ -2,6 +2,7 @@
 
 import sys
 import os
+import argparse
 import time
 import platform
 import signal
@@ -16,12 +17,27 @@ from utils import utils
 from backgroundgen import BackGroundManager, BackGround
 from screenmanager import ScreenManager
 from screenmanager import Action
+from streaminfo import StreamInfo
 
 running = True
 
 _LOG_NAME = "Main"
 __version__ = "1.0.0.dev"
 
+# Key = scancode, value = (action, parameter)
+_KEY_ACTIONS = {
+    KEYCODE.KEY_RIGHT:      (Action.SWITCH_NEXT,            None),
+    KEYCODE.KEY_LEFT:       (Action.SWITCH_PREV,            None),
+    KEYCODE.KEY_UP:         (Action.SWITCH_QUALITY_UP,      None),
+    KEYCODE.KEY_DOWN:       (Action.SWITCH_QUALITY_DOWN,    None),
+    KEYCODE.KEY_ENTER:      (Action.SWITCH_SINGLE,          0),
+    KEYCODE.KEY_KPENTER:    (Action.SWITCH_SINGLE,          0),
+    KEYCODE.KEY_ESC:        (Action.SWITCH_GRID,            None),
+    KEYCODE.KEY_EXIT:       (Action.SWITCH_GRID,            None),
+    KEYCODE.KEY_SPACE:      (Action.SWITCH_PAUSE_UNPAUSE,   None),
+    KEYCODE.KEY_D:          (Action.SWITCH_DISPLAY_CONTROL, None),
+}
+
 
 def signal_handler(signum, frame):
     """SIGTERM/SIGINT callback, terminate our application..."""
@@ -34,8 +50,13 @@ def clear_cache():
     """Clear our cache directory"""
 
     if os.path.isdir(CONSTANTS.CACHE_DIR):
-        for filename in os.listdir(CONSTANTS.CACHE_DIR):
-            os.remove(os.path.join(CONSTANTS.CACHE_DIR, filename))
+        with os.scandir(CONSTANTS.CACHE_DIR) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    os.unlink(entry.path)
+
+    BackGround.clear_cache()
+    StreamInfo.clear_cache()
 
 
 def main():
@@ -45,7 +66,6 @@ def main():
 
     num_array = []
     last_added = time.monotonic()
-    ignore_quit = False
 
     if not platform.system() == "Linux":
         sys.exit("'%s' OS not supported!" % platform.system())
@@ -58,58 +78,45 @@ def main():
         sys.exit("Python version '%i.%i' or newer required!"
                  % (CONSTANTS.PYTHON_VER_MIN[0], CONSTANTS.PYTHON_VER_MIN[1]))
 
-    # Started with arguments?
-    if len(sys.argv) > 1:
-        for idx, arg in enumerate(sys.argv):
-
-            # 1st argument is application
-            if idx == 0:
-                continue
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(prog="camplayer", description="IP Camera viewer for the Raspberry Pi")
+    parser.add_argument("-v", "--version", action="version", version="version " + __version__,
+                        help="Print version info")
+    parser.add_argument("-c", "--config", help="Use a specific config file")
+    parser.add_argument("--rebuild-cache", action="store_true", help="Rebuild cache on startup")
+    parser.add_argument("--rebuild-cache-exit", action="store_true", help="Rebuild cache and exit afterwards")
+    parser.add_argument("-d", "--demo", action="store_true", help="Demo mode")
+    parser.add_argument("--ignorequit", action="store_true", help="Don't quit when the 'Q' key is pressed")
+    args = parser.parse_args()
 
-            # Help info
-            if arg == "-h" or arg == "--help":
-                print("         -h  --help                  Print this help")
-                print("         -v  --version               Print version info")
-                print("         -c  --config                Use a specific config file")
-                print("             --rebuild-cache         Rebuild cache on startup")
-                print("             --rebuild-cache-exit    Rebuild cache and exit afterwards")
-                print("         -d  --demo                  Demo mode")
-                print("             --ignorequit            Don't quit when the 'Q' key is pressed")
-                sys.exit(0)
+    # Run in a specific mode
+    rebuild_cache = args.rebuild_cache or args.rebuild_cache_exit
+    if rebuild_cache:
 
-            # Run in a specific mode
-            if arg == "--rebuild-cache" or arg == "--rebuild-cache-exit":
+        # Clearing the cache
+        clear_cache()
 
-                # Clearing the cache
-                clear_cache()
+        # Rebuild cache only and exit
+        if args.rebuild_cache_exit:
 
-                # Rebuild cache only and exit
-                if arg == "--rebuild-cache-exit":
-
-                    # Exit when reaching the main loop
-                    running = False
+            # Exit when reaching the main loop
+            running = False
 
-            # Run with a specific config file
-            if arg == "-c" or arg == "--config" and (idx + 1) < len(sys.argv):
-                CONSTANTS.CONFIG_PATH = sys.argv[idx + 1]
+    # Run with a specific config file
+    if args.config:
+        CONSTANTS.CONFIG_PATH = args.config
 
-            # Display version info
-            if arg == "-v" or arg == "--version":
-                print("version " + __version__)
-                sys.exit(0)
+    # Run demo mode
+    if args.demo:
+        CONSTANTS.CONFIG_PATH = CONSTANTS.DEMO_CONFIG_PATH
 
-            # Run demo mode
-            if arg == "-d" or arg == "--demo":
-                CONSTANTS.CONFIG_PATH = CONSTANTS.DEMO_CONFIG_PATH
-
-            # Ignore keyboard 'quit' command
-            if arg == "--ignorequit":
-                ignore_quit = True
+    # Ignore keyboard 'quit' command
+    ignore_quit = args.ignorequit
 
     # Create folder if not exist
     if not os.path.isdir(os.path.dirname(CONSTANTS.APPDATA_DIR)):
         print("Creating config folder '%s'" % CONSTANTS.APPDATA_DIR)
-        os.system("mkdir -p %s" % os.path.dirname(CONSTANTS.APPDATA_DIR))
+        os.makedirs(os.path.dirname(CONSTANTS.APPDATA_DIR), exist_ok=True)
 
     # Load settings from config file
     CONFIG.load()
@@ -123,9 +130,7 @@ def main():
              % (CONSTANTS.CONFIG_PATH, CONSTANTS.CACHE_DIR))
 
     # Cleanup some stuff in case something went wrong on the previous run
-    utils.kill_service('omxplayer.bin', force=True)
-    utils.kill_service('vlc', force=True)
-    utils.kill_service('pipng', force=True)
+    utils.kill_services(['omxplayer.bin', 'vlc', 'pipng'], force=True)
 
     # OMXplayer is absolutely required!
     if not utils.os_package_installed("omxplayer.bin"):
@@ -135,14 +140,16 @@ def main():
     if not utils.os_package_installed("ffprobe"):
         sys.exit("ffprobe not installed but required!")
 
-    # Get system info
-    sys_info = utils.get_system_info()
-    gpu_mem = utils.get_gpu_memory()
-    hw_info = utils.get_hardware_info()
+    # Get system info, all probed at once
+    probe = utils.probe_system_once()
+    sys_info = utils.get_system_info(probe)
+    gpu_mem = utils.get_gpu_memory(probe)
+    hw_info = utils.HARDWARE
 
     # Set some globals for later use
     GLOBALS.PI_SOC          = hw_info.get("soc")    # Not very reliable, usually reports BCM2835
     GLOBALS.PI_MODEL        = hw_info.get("model")
+    GLOBALS.PI_MODEL_4B     = "4B" in GLOBALS.PI_MODEL
     GLOBALS.PI_SOC_HEVC     = hw_info.get('hevc')
     GLOBALS.NUM_DISPLAYS    = 2 if hw_info.get('dual_hdmi') else 1
     GLOBALS.VLC_SUPPORT     = utils.os_package_installed("vlc")
@@ -169,8 +176,8 @@ def main():
     keyboard = InputMonitor(event_type=['press'])
 
     # Log overwrites for debugging purpose
-    for setting in CONFIG.advanced_overwritten:
-        LOG.INFO(_LOG_NAME, "advanced setting overwritten for '%s' is '%s'" % (setting[0], setting[1]))
+    for setting, value in CONFIG.advanced_overwritten:
+        LOG.INFO(_LOG_NAME, "advanced setting overwritten for '%s' is '%s'", setting, value)
 
     # Does this system fulfill the minimal requirements
     if CONFIG.HARDWARE_CHECK:
@@ -184,7 +191,7 @@ def main():
     # For the raspberry pi 4:
     #   both HDMI displays are supposed to have the same configuration
     if CONFIG.SCREEN_HEIGHT == 0 or CONFIG.SCREEN_WIDTH == 0:
-        display_conf = utils.get_display_mode()
+        display_conf = utils.get_display_mode(probe=probe)
         CONFIG.SCREEN_HEIGHT = display_conf.get('res_height')
         CONFIG.SCREEN_WIDTH = display_conf.get('res_width')
         LOG.INFO(_LOG_NAME, "Detected screen resolution for HDMI0 is '%ix%i@%iHz'" % (
@@ -209,6 +216,12 @@ def main():
     LOG.INFO(_LOG_NAME, "Using a virtual screen resolution of '%ix%i'" %
              (CONSTANTS.VIRT_SCREEN_WIDTH, CONSTANTS.VIRT_SCREEN_HEIGHT))
 
+    # Scale all missing backgrounds in one go, before the screens request them
+    # When rebuilding the cache, always prebuild them so the next run does not have to
+    BackGround.init_paths()
+    if rebuild_cache or (CONFIG.BACKGROUND_MODE != BACKGROUND.OFF and GLOBALS.PIPNG_SUPPORT):
+        BackGround.build_cache()
+
     # Workaround: srt subtitles have a maximum display time of 99 hours
     if CONFIG.VIDEO_OSD and (not CONFIG.REFRESHTIME_MINUTES or CONFIG.REFRESHTIME_MINUTES >= 99 * 60):
         CONFIG.REFRESHTIME_MINUTES = 99 * 60
@@ -220,24 +233,33 @@ def main():
     # Initialize screens and windows
     screenmanager = ScreenManager()
     if screenmanager.valid_screens < 1:
+        BackGroundManager.stop_icon_instant(display_idx=0)
         sys.exit("No valid screen configuration found, check your config file!")
 
     # Hide 'loading' message on master display
     BackGroundManager.hide_icon_instant(display_idx=0)
 
+    key_timeout = CONSTANTS.KEY_TIMEOUT_MS / 1000
+    key_multidigit = CONSTANTS.KEY_MULTIDIGIT_MS / 1000
+    key_num = KEYCODE.KEY_NUM_ARR
+
     # Working loop
     while running:
 
         # Trigger screenmanager working loop
         screenmanager.do_work()
 
+        now = time.monotonic()
+
         for event in keyboard.get_events():
-            last_added = time.monotonic()
+            last_added = now
 
-            if event.code in KEYCODE.KEY_NUM.keys():
-                LOG.DEBUG(_LOG_NAME, "Numeric key event: %i" % KEYCODE.KEY_NUM.get(event.code))
+            digit = key_num[event.code] if event.code < len(key_num) else -1
 
-                num_array.append(KEYCODE.KEY_NUM.get(event.code))
+            if digit >= 0:
+                LOG.DEBUG(_LOG_NAME, "Numeric key event: %i", digit)
+
+                num_array.append(digit)
 
                 # Two digit for numbers from 0 -> 99
                 if len(num_array) > 2:
@@ -247,29 +269,10 @@ def main():
                 # Non numeric key, clear numeric num_array
                 num_array.clear()
 
-                if event.code == KEYCODE.KEY_RIGHT:
-                    screenmanager.on_action(Action.SWITCH_NEXT)
-
-                elif event.code == KEYCODE.KEY_LEFT:
-                    screenmanager.on_action(Action.SWITCH_PREV)
-
-                elif event.code == KEYCODE.KEY_UP:
-                    screenmanager.on_action(Action.SWITCH_QUALITY_UP)
-
-                elif event.code == KEYCODE.KEY_DOWN:
-                    screenmanager.on_action(Action.SWITCH_QUALITY_DOWN)
+                key_action = _KEY_ACTIONS.get(event.code)
 
-                elif event.code == KEYCODE.KEY_ENTER or event.code == KEYCODE.KEY_KPENTER:
-                    screenmanager.on_action(Action.SWITCH_SINGLE, 0)
-
-                elif event.code == KEYCODE.KEY_ESC or event.code == KEYCODE.KEY_EXIT:
-                    screenmanager.on_action(Action.SWITCH_GRID)
-
-                elif event.code == KEYCODE.KEY_SPACE:
-                    screenmanager.on_action(Action.SWITCH_PAUSE_UNPAUSE)
-
-                elif event.code == KEYCODE.KEY_D:
-                    screenmanager.on_action(Action.SWITCH_DISPLAY_CONTROL)
+                if key_action:
+                    screenmanager.on_action(*key_action)
 
                 elif event.code == KEYCODE.KEY_Q and not ignore_quit:
                     running = False
@@ -277,11 +280,11 @@ def main():
                 break
 
         # Timeout between key presses expired?
-        if time.monotonic() > (last_added + (CONSTANTS.KEY_TIMEOUT_MS / 1000)):
+        if now > (last_added + key_timeout):
             num_array.clear()
 
         # 1 second delay to accept multiple digit numbers
-        elif time.monotonic() > (last_added + (CONSTANTS.KEY_MULTIDIGIT_MS / 1000)) and len(num_array) > 0:
+        elif now > (last_added + key_multidigit) and len(num_array) > 0:
 
             LOG.INFO(_LOG_NAME, "Process numeric key input '%s'" % str(num_array))
 
@@ -296,14 +299,17 @@ def main():
                 num_array.clear()
                 screenmanager.on_action(Action.SWITCH_SINGLE, number - 1)
 
-        time.sleep(0.1)
+        # Wake up immediately on keyboard input, otherwise sleep until the screenmanager has work to do
+        idle_time = screenmanager.get_idle_time()
+        if len(num_array) > 0:
+            idle_time = min(idle_time, CONSTANTS.WORKER_TICK_SEC)
+
+        keyboard.wait_events(timeout=idle_time)
 
     # Cleanup stuff before exit
     keyboard.destroy()
     BackGroundManager.destroy()
-    utils.kill_service('omxplayer.bin', force=True)
-    utils.kill_service('vlc', force=True)
-    utils.kill_service('pipng', force=True)
+    utils.kill_services(['omxplayer.bin', 'vlc', 'pipng'], force=True)
 
     LOG.INFO(_LOG_NAME, "Exiting raspberry pi camplayer, have a nice day!")
     sys.exit(0)
@@ -1,13 +1,14 @@
 #!/usr/bin/python3
 
-import os
 import sys
-import signal
 import time
 import math
+import bisect
 
+from concurrent.futures import wait as futures_wait
 from enum import IntEnum, unique
 from windowmanager import Window, PLAYSTATE
+from streaminfo import StreamInfo
 from utils.settings import CONFIG, LAYOUT, CHANGEOVER
 from utils.constants import CONSTANTS
 from utils.logger import LOG
@@ -34,16 +35,47 @@ class Action(IntEnum):
     SWITCH_DISPLAY_CONTROL  = 8
 
 
+# Layout -> (rows/columns of the uniform grid, base grid size(s),
+#            check if a grid position is not already covered by one of the larger windows,
+#            denominator for the larger window coordinates,
+#            larger windows as (x1, y1, x2, y2, grid indices) in fractions of the screen size)
+_LAYOUTS = {
+    LAYOUT._1X1:    (1, [9, 16], None, 1, []),
+    LAYOUT._2X2:    (2, [16], None, 1, []),
+    LAYOUT._3X3:    (3, [9], None, 1, []),
+    LAYOUT._4X4:    (4, [16], None, 1, []),
+    LAYOUT._1P5:    (3, [9], lambda column, row: column > 1 or row > 1, 3, [
+                        (0, 0, 2, 2, [0, 1, 3, 4])]),
+    LAYOUT._1P7:    (4, [16], lambda column, row: column > 2 or row > 2, 4, [
+                        (0, 0, 3, 3, [0, 1, 2, 4, 5, 6, 8, 9, 10])]),
+    LAYOUT._1P12:   (4, [16], lambda column, row: column > 1 or row > 1, 2, [
+                        (0, 0, 1, 1, [0, 1, 4, 5])]),
+    LAYOUT._2P8:    (4, [16], lambda column, row: column > 1, 2, [
+                        (0, 0, 1, 1, [0, 1, 4, 5]),
+                        (0, 1, 1, 2, [8, 9, 12, 13])]),
+    LAYOUT._3P4:    (4, [16], lambda column, row: column > 1 and row > 1, 2, [
+                        (0, 0, 1, 1, [0, 1, 4, 5]),
+                        (1, 0, 2, 1, [2, 3, 6, 7]),
+                        (0, 1, 1, 2, [8, 9, 12, 13])]),
+}
+
+
 class Screen(object):
 
     _LOG_NAME = "Screen"
     _IDX_NOT_SET = -1
 
-    def __init__(self, layout, displaytime, screen_idx, display_idx):
+    def __init__(self, layout, displaytime, screen_idx, display_idx, initializing_callback=None):
 
         self.layout                     = layout                # Number of windows for this screen
         self.displaytime                = displaytime           # Screen active time when multiple screen configured
         self._weight                    = 0                     # Estimated performance impact for this screen
+        self._playing_weight            = 0                     # Estimated performance impact of the playing windows
+        self._playing_weights           = {}                    # Weight per playing window, see '_on_window_playstate'
+        self._valid_windows             = 0                     # Number of windows with a playable stream assigned
+        self._num_initializing          = 0                     # Number of windows in playstate INIT1
+        self._num_buffering             = 0                     # Number of windows in playstate INIT1 or INIT2
+        self._time_monitor              = 0                     # Timestamp of last stream check, see 'monitor_streams'
         self.grid_size                  = 0                     # Base grid size, usually 9 and/or 16 (3x3, 4x4)
         self.windows                    = []                    # Containing windows/video players
         self._screen_idx                = screen_idx            # Sequennce/index of this screen
@@ -51,6 +83,9 @@ class Screen(object):
         self._viewmode_single_win_idx   = self._IDX_NOT_SET     # Index of active/fullscreen window in single view mode
         self._viewmode_single           = False                 # Default mode is grid view mode
         self._viewmode_single_quality   = StreamQuality.DEFAULT # Preferred stream quality in single view mode
+        self._broken_windows            = set()                 # Windows with a broken stream, see '_on_window_playstate'
+        self._playable_indices          = []                    # Sorted indices of windows with a fullscreen playable stream
+        self._initializing_callback     = initializing_callback # Called with the change of '_num_initializing'
 
         # Initialize/buildup windows
         self._load_windows()
@@ -60,108 +95,149 @@ class Screen(object):
 
         for window in self.windows:
             self._weight += window.get_weight()
+            self._valid_windows += 1 if window.get_lowest_quality_stream() else 0
+
+        # Streams are only assigned while parsing the config, so this never changes afterwards
+        self._playable_indices = [idx for idx, window in enumerate(self.windows)
+                                  if window.get_lowest_quality_stream(windowed=False)]
 
         LOG.INFO(self._LOG_NAME, "init screen number '%i' with a total weight of '%i'" %
                  (self._screen_idx + 1, self._weight))
 
     def monitor_streams(self):
-        """Monitor streams and attempt to fix broken ones"""
+        """
+        Monitor streams and attempt to fix broken ones,
+        broken streams are detected with a delay of at least 'STREAM_MONITOR_MIN_SEC'
+        """
 
-        broken_streams_detected = False
+        now = time.monotonic()
+
+        if now - self._time_monitor < CONSTANTS.STREAM_MONITOR_MIN_SEC:
+            return False
+
+        self._time_monitor = now
+
+        # Polling the playstate is what detects broken streams,
+        # the playstate callback keeps track of the broken windows
+        Window.poll_playstates(self.windows)
+
+        if not self._broken_windows:
+            return False
 
         for window in self.windows:
-            if window.get_stream_playstate() == PLAYSTATE.BROKEN:
+            if window in self._broken_windows:
                 LOG.WARNING(self._LOG_NAME, "restarting broken stream")
                 window.stream_refresh()
-                broken_streams_detected = True
 
-        return broken_streams_detected
+        return True
+
+    def _on_window_playstate(self, window, old_playstate, new_playstate):
+        """Playstate change callback of the containing windows"""
+
+        if new_playstate == PLAYSTATE.BROKEN:
+            self._broken_windows.add(window)
+        elif old_playstate == PLAYSTATE.BROKEN:
+            self._broken_windows.discard(window)
+
+        # The active stream is already set when a window starts playing,
+        # but cleared before it stops, so remember the weight we've added.
+        if old_playstate == PLAYSTATE.NONE:
+            weight = window.get_weight()
+            self._playing_weights[window] = weight
+            self._playing_weight += weight
+        elif new_playstate == PLAYSTATE.NONE:
+            self._playing_weight -= self._playing_weights.pop(window, 0)
+
+        initializing_delta = (new_playstate == PLAYSTATE.INIT1) - (old_playstate == PLAYSTATE.INIT1)
+        self._num_initializing += initializing_delta
+
+        if initializing_delta and self._initializing_callback:
+            self._initializing_callback(initializing_delta)
+
+        self._num_buffering += (new_playstate in (PLAYSTATE.INIT1, PLAYSTATE.INIT2)) - \
+                               (old_playstate in (PLAYSTATE.INIT1, PLAYSTATE.INIT2))
 
     def switch_quality_up(self):
         """Switch all windows to a higher quality stream"""
 
+        windows = self.windows
+
         if self._viewmode_single:
+            single_idx = self._viewmode_single_win_idx
+            single_window = windows[single_idx]
 
             # Higher quality stream available?
-            stream = self.windows[self._viewmode_single_win_idx].stream_switch_quality_up(
-                check_only=True, limit_default=False)
+            stream = single_window.stream_switch_quality_up(check_only=True, limit_default=False)
 
             if stream:
 
                 # Don't stress HW too much, stop all other streams if quality > default
-                if stream.quality > self.windows[self._viewmode_single_win_idx].\
-                        get_default_stream(windowed=True).quality:
+                if stream.quality > single_window.get_default_stream(windowed=True).quality:
 
                     self._viewmode_single_quality = StreamQuality.HIGHER
 
-                    for idx, window in enumerate(self.windows):
-                        if idx != self._viewmode_single_win_idx:
+                    for idx, window in enumerate(windows):
+                        if idx != single_idx:
                             window.stream_stop()
 
                 # Higher quality stream available, switch now
-                self.windows[self._viewmode_single_win_idx].stream_switch_quality_up(limit_default=False)
+                single_window.stream_switch_quality_up(limit_default=False)
 
-                if (self.windows[self._viewmode_single_win_idx].active_stream and
-                        self.windows[self._viewmode_single_win_idx].active_stream.quality >=
-                        self.windows[self._viewmode_single_win_idx].get_highest_quality_stream().quality):
+                active_stream = single_window.active_stream
+                if active_stream and active_stream.quality >= single_window.get_highest_quality_stream().quality:
                     self._viewmode_single_quality = StreamQuality.HIGHEST
 
         else:
 
             # Limit stream quality when in grid view mode with multiple windows
-            for window in self.windows:
-                window.stream_switch_quality_up(limit_default=len(self.windows) > 1)
+            limit_default = len(windows) > 1
+
+            for window in windows:
+                window.stream_switch_quality_up(limit_default=limit_default)
 
     def switch_quality_down(self):
         """Switch all windows to a lower quality stream"""
 
+        windows = self.windows
+
         if self._viewmode_single:
+            single_idx = self._viewmode_single_win_idx
+            single_window = windows[single_idx]
 
             # Lower quality stream available?
-            stream = self.windows[self._viewmode_single_win_idx].stream_switch_quality_down(check_only=True)
+            stream = single_window.stream_switch_quality_down(check_only=True)
 
             if stream:
 
                 # Lower quality stream available, switch now
-                self.windows[self._viewmode_single_win_idx].stream_switch_quality_down()
+                single_window.stream_switch_quality_down()
 
                 # Default or even a lower quality stream,
                 # start all other windows again in background for faster prev/next switching
-                if stream.quality <= \
-                        self.windows[self._viewmode_single_win_idx].get_default_stream(windowed=True).quality:
+                if stream.quality <= single_window.get_default_stream(windowed=True).quality:
 
-                    for idx, window in enumerate(self.windows):
-                        if idx != self._viewmode_single_win_idx and window.playstate == PLAYSTATE.NONE:
+                    for idx, window in enumerate(windows):
+                        if idx != single_idx and window.playstate == PLAYSTATE.NONE:
                             window.stream_start(visible=False, force_fullscreen=False)
 
                     self._viewmode_single_quality = StreamQuality.DEFAULT
 
         else:
 
-            for window in self.windows:
+            for window in windows:
                 window.stream_switch_quality_down()
 
     def get_min_playtime(self):
         """Get the minimum playtime from the containing video players"""
 
-        min_playtime = sys.maxsize
-
-        for window in self.windows:
-            if window.playstate != PLAYSTATE.NONE and window.playtime < min_playtime:
-                min_playtime = window.playtime
-
-        return min_playtime
+        return min((window.playtime for window in self.windows if window.playstate != PLAYSTATE.NONE),
+                   default=sys.maxsize)
 
     def get_max_playtime(self):
         """Get the maximum playtime from the containing video players"""
 
-        max_playtime = 0
-
-        for window in self.windows:
-            if window.playstate != PLAYSTATE.NONE and window.playtime > max_playtime:
-                max_playtime = window.playtime
-
-        return max_playtime
+        return max((window.playtime for window in self.windows if window.playstate != PLAYSTATE.NONE),
+                   default=0)
 
     def switch_singleview(self, window_idx=0, next_window=False, prev_window=False):
         """
@@ -169,37 +245,24 @@ class Screen(object):
         If already in single view mode, switch to next or previous window
         """
 
-        if window_idx < 0 or window_idx >= len(self.windows) or len(self.windows) <= 1:
+        windows = self.windows
+
+        if window_idx < 0 or window_idx >= len(windows) or len(windows) <= 1:
             return
 
         if (next_window or prev_window) and self._viewmode_single_win_idx:
             window_idx = self._viewmode_single_win_idx
 
-        if next_window:
+        if next_window and self._playable_indices:
 
             # Find the first next valid window
-            for _ in range(len(self.windows)):
-
-                window_idx += 1
-                if window_idx >= len(self.windows):
-                    window_idx = 0
+            window_idx = self._playable_indices[
+                bisect.bisect_right(self._playable_indices, window_idx) % len(self._playable_indices)]
 
-                # Just to check if there is at least one playable stream
-                if self.windows[window_idx].get_lowest_quality_stream(windowed=False):
-                    break
-
-        elif prev_window:
+        elif prev_window and self._playable_indices:
 
             # Find the first previous valid window
-            for _ in range(len(self.windows)):
-
-                window_idx -= 1
-                if window_idx < 0:
-                    window_idx = len(self.windows) - 1
-
-                # Just to check if there is at least one playable stream
-                if self.windows[window_idx].get_lowest_quality_stream(windowed=False):
-                    break
+            window_idx = self._playable_indices[bisect.bisect_left(self._playable_indices, window_idx) - 1]
 
         # Already active, nothing to do
         if window_idx == self._viewmode_single_win_idx:
@@ -207,6 +270,8 @@ class Screen(object):
 
         LOG.INFO(self._LOG_NAME, "switch window number '%i' to fullscreen" % (window_idx + 1))
 
+        single_window = windows[window_idx]
+
         if self._viewmode_single_quality == StreamQuality.DEFAULT:
 
             # Making the requested window fullscreen first looks better than removing the
@@ -215,32 +280,58 @@ class Screen(object):
             # probably because it can lead to multiple active dispmanx layers at the same time.
             # Therefore don't use this method when we come from grid view mode (more active layers)
             if not self._viewmode_single:
-                for idx, window in enumerate(self.windows):
-                    if idx != window_idx:
-                        window.stream_set_invisible(_async=True)
+                self._batch_set_invisible(except_idx=window_idx)
 
-                # For now, assume 500ms is enough to hide our streams
-                time.sleep(0.5)
+                # Wait until our streams are hidden, but no longer than 500ms
+                self._await_invisible([idx for idx in range(len(windows)) if idx != window_idx], timeout=0.5)
 
             # Make requested window visible
-            if self.windows[window_idx].playstate == PLAYSTATE.NONE:
-                self.windows[window_idx].stream_start(visible=True, force_fullscreen=True) # This does select HQ?
+            if single_window.playstate == PLAYSTATE.NONE:
+                single_window.stream_start(visible=True, force_fullscreen=True) # This does select HQ?
             else:
-                self.windows[window_idx].stream_set_visible(fullscreen=True)
+                single_window.stream_set_visible(fullscreen=True)
 
             if self._viewmode_single:
-                for idx, window in enumerate(self.windows):
-                    if idx != window_idx:
-                        window.stream_set_invisible()
+                self._batch_set_invisible(except_idx=window_idx, wait=True)
 
         else:
             self.streams_stop()
-            self.windows[window_idx].stream_start(
-                visible=True, force_fullscreen=True, force_hq=self._viewmode_single_quality)
+            single_window.stream_start(visible=True, force_fullscreen=True, force_hq=self._viewmode_single_quality)
 
         self._viewmode_single_win_idx = window_idx
         self._viewmode_single = True
 
+    def _batch_set_invisible(self, except_idx, wait=False):
+        """
+        Set all windows except the given one invisible,
+        the DBus commands are sent in parallel instead of one after the other
+        """
+
+        futures = []
+        windows = self.windows
+
+        for idx, window in enumerate(windows):
+            if idx != except_idx:
+                future = window.stream_set_invisible(_async=True)
+                if future:
+                    futures.append(future)
+
+        if wait and futures:
+            futures_wait(futures)
+
+    def _await_invisible(self, indices, timeout=0.5):
+        """Wait until the pending set invisible commands of the given windows are completed"""
+
+        deadline = time.monotonic() + timeout
+        windows = [self.windows[idx] for idx in indices]
+
+        while any(window.pending_invisible for window in windows):
+            if time.monotonic() >= deadline:
+                LOG.DEBUG(self._LOG_NAME, "timeout while waiting for windows to become invisible")
+                break
+
+            time.sleep(0.02)
+
     def switch_gridview(self):
         """Switch the requested window from single (fullscreen) view to grid view mode"""
 
@@ -253,32 +344,39 @@ class Screen(object):
         # So coming from single view mode, put our active window from fullscreen to windowed mode first
         # in order to limit overlapping dispmanx layers
         if self._viewmode_single:
-            if self.windows[self._viewmode_single_win_idx].active_stream:
-                if self.windows[self._viewmode_single_win_idx].active_stream.url == \
-                        self.windows[self._viewmode_single_win_idx].get_default_stream(windowed=True).url:
-                    self.windows[self._viewmode_single_win_idx].stream_set_visible(fullscreen=False)
+            single_window = self.windows[self._viewmode_single_win_idx]
+            if single_window.active_stream:
+                if single_window.active_stream.url == single_window.get_default_stream(windowed=True).url:
+                    single_window.stream_set_visible(fullscreen=False)
 
-        for idx, window in enumerate(self.windows):
-            win_default_stream = window.get_default_stream(windowed=True)
+        to_start = []
+        stopped_any = False
 
-            if window.active_stream:
+        for window in self.windows:
+            win_default_stream = window.get_default_stream(windowed=True)
+            win_active_stream = window.active_stream
+
+            # If already playing the default stream, set it visible
+            # Stop non default streams (possible HD) when switching back to grid view
+            # Only default (lower quality SD) streams should be used in grid view,
+            # this to avoid overloading the hardware decoder/scaler
+            # Also for rare occasions where the stream is only playable in non windowed mode (VLC)
+            if win_active_stream and win_default_stream and win_active_stream.url == win_default_stream.url:
+                window.stream_set_visible(_async=True, fullscreen=False)
+                continue
 
-                # Stop non default streams (possible HD) when switching back to grid view
-                # Only default (lower quality SD) streams should be used in grid view,
-                # this to avoid overloading the hardware decoder/scaler
-                # Also for rare occasions where the stream is only playable in non windowed mode (VLC)
-                if not win_default_stream or window.active_stream.url != win_default_stream.url:
-                    window.stream_stop()
+            if window.playstate != PLAYSTATE.NONE:
+                window.stream_stop()
+                stopped_any = True
 
-                # If already playing the default stream, set it visible
-                else:
-                    window.stream_set_visible(_async=True, fullscreen=False)
+            to_start.append(window)
 
-            else:
-                window.stream_stop()
+        # Only give the stopped players some time to close
+        if stopped_any:
+            time.sleep(0.25)
 
-        time.sleep(0.25)
-        self.streams_start(visible=True)
+        for window in to_start:
+            window.stream_start(visible=True)
 
         self._viewmode_single_win_idx = self._IDX_NOT_SET
         self._viewmode_single = False
@@ -302,221 +400,97 @@ class Screen(object):
         for window in self.windows:
             window.stream_refresh()
             
-    def streams_set_visible(self, gridindex=[]):
-        """Set all or selected windows/streams visible"""
+    def streams_set_visible(self, gridindex=()):
+        """Set all or selected (iterable of grid indices) windows/streams visible"""
         
+        grid_set = frozenset(gridindex) if gridindex else None
+
         for window in self.windows:
-            if gridindex:
-                for idx in gridindex:
-                    if idx in window.gridindex:
-                        window.stream_set_visible(_async=True)
-                        break
-            else:
+            if grid_set is None or grid_set & window.gridindex_set:
                 window.stream_set_visible(_async=True)
                 
-    def streams_set_invisible(self, gridindex=[]):
-        """Set all or selected windows/streams invisible"""
+    def streams_set_invisible(self, gridindex=()):
+        """Set all or selected (iterable of grid indices) windows/streams invisible"""
         
+        grid_set = frozenset(gridindex) if gridindex else None
+
         for window in self.windows:
-            if gridindex:
-                for idx in gridindex:
-                    if idx in window.gridindex:
-                        window.stream_set_invisible(_async=True)
-                        break
-            else:
+            if grid_set is None or grid_set & window.gridindex_set:
                 window.stream_set_invisible(_async=True)
             
     def get_weight(self, playing_only=False):
         """Get the total decoding weight for this screen"""
 
-        weight = 0
-
-        for window in self.windows:
-            if not playing_only or window.playstate != PLAYSTATE.NONE:
-                weight += window.get_weight()
+        if playing_only:
+            return self._playing_weight
 
-        return weight
+        return self._weight
 
     def get_valid_windows(self):
         """Get the number of valid windows for this screen (= window with playable stream assigned)"""
 
-        count = 0
-
-        for window in self.windows:
-            count += 1 if window.get_lowest_quality_stream() else 0
-
-        return count
+        return self._valid_windows
 
     def get_playing_windows(self):
         """Get the number of playing streams for this screen"""
 
-        count = 0
-
-        for window in self.windows:
-            count += 0 if window.playstate == PLAYSTATE.NONE else 1
-
-        return count
+        # Holds every window not in playstate NONE, see '_on_window_playstate'
+        return len(self._playing_weights)
 
     def players_initializing(self):
         """All players ready to be (DBus) controlled?"""
 
-        for window in self.windows:
-            if window.player_initializing():
-                return True
-        return False
+        if not self._num_initializing:
+            return False
+
+        return any(window.player_initializing() for window in self.windows)
 
     def players_buffering(self):
         """All players done buffering?"""
 
-        for window in self.windows:
-            if window.player_buffering():
-                return True
-        return False
+        if not self._num_buffering:
+            return False
+
+        return any(window.player_buffering() for window in self.windows)
         
     def _load_windows(self):
         """Load windows based on the requested layout"""
-        
-        if self.layout == LAYOUT._1X1:
-            nrows_ncolums = 1
-            self.grid_size = [9, 16]
-            
-        elif self.layout == LAYOUT._2X2:
-            nrows_ncolums = 2
-            self.grid_size = [16]
-            
-        elif self.layout == LAYOUT._3X3:
-            nrows_ncolums = 3
-            self.grid_size = [9]
-            
-        elif self.layout == LAYOUT._4X4:
-            nrows_ncolums = 4
-            self.grid_size = [16]
-    
-        elif self.layout == LAYOUT._1P5:
-            nrows_ncolums = 3
-            self.grid_size = [9]
-            
-            # Add one larger window
-            self.windows.append(Window(
-                x1=CONSTANTS.VIRT_SCREEN_OFFSET_X,
-                y1=CONSTANTS.VIRT_SCREEN_OFFSET_Y,
-                x2=int(CONSTANTS.VIRT_SCREEN_OFFSET_X + (CONSTANTS.VIRT_SCREEN_WIDTH * 2) / 3),
-                y2=int(CONSTANTS.VIRT_SCREEN_OFFSET_Y + (CONSTANTS.VIRT_SCREEN_HEIGHT * 2) / 3),
-                gridindex=[0, 1, 3, 4], 
-                screen_idx=self._screen_idx,
-                window_idx=len(self.windows),
-                display_idx=self._display_idx)
-            )
 
-        elif self.layout == LAYOUT._1P7:
-            nrows_ncolums = 4
-            self.grid_size = [16]
+        offset_x = CONSTANTS.VIRT_SCREEN_OFFSET_X
+        offset_y = CONSTANTS.VIRT_SCREEN_OFFSET_Y
+        width = CONSTANTS.VIRT_SCREEN_WIDTH
+        height = CONSTANTS.VIRT_SCREEN_HEIGHT
 
-            # Add one larger window
-            self.windows.append(Window(
-                x1=CONSTANTS.VIRT_SCREEN_OFFSET_X,
-                y1=CONSTANTS.VIRT_SCREEN_OFFSET_Y,
-                x2=int(CONSTANTS.VIRT_SCREEN_OFFSET_X + (CONSTANTS.VIRT_SCREEN_WIDTH * 3) / 4),
-                y2=int(CONSTANTS.VIRT_SCREEN_OFFSET_Y + (CONSTANTS.VIRT_SCREEN_HEIGHT * 3) / 4),
-                gridindex=[0, 1, 2, 4, 5, 6, 8, 9, 10],
-                screen_idx=self._screen_idx,
-                window_idx=len(self.windows),
-                display_idx=self._display_idx)
-            )
+        if self.layout not in _LAYOUTS:
+            LOG.ERROR(self._LOG_NAME, "layout configuration '%i' invalid, falling back on 1X1 layout" % self.layout)
+            self.layout = LAYOUT._1X1
 
-        elif self.layout == LAYOUT._1P12:
-            nrows_ncolums = 4
-            self.grid_size = [16]
-            
-            # Add one larger window
-            self.windows.append(Window(
-                x1=CONSTANTS.VIRT_SCREEN_OFFSET_X,
-                y1=CONSTANTS.VIRT_SCREEN_OFFSET_Y,
-                x2=int(CONSTANTS.VIRT_SCREEN_OFFSET_X + (CONSTANTS.VIRT_SCREEN_WIDTH / 2)),
-                y2=int(CONSTANTS.VIRT_SCREEN_OFFSET_Y + (CONSTANTS.VIRT_SCREEN_HEIGHT / 2)),
-                gridindex=[0, 1, 4, 5], 
-                screen_idx=self._screen_idx,
-                window_idx=len(self.windows),
-                display_idx=self._display_idx)
-            )       
-            
-        elif self.layout == LAYOUT._2P8:
-            nrows_ncolums = 4
-            self.grid_size = [16]
-            
-            # Add 1st larger window
-            self.windows.append(Window(
-                x1=CONSTANTS.VIRT_SCREEN_OFFSET_X,
-                y1=CONSTANTS.VIRT_SCREEN_OFFSET_Y,
-                x2=int(CONSTANTS.VIRT_SCREEN_OFFSET_X + (CONSTANTS.VIRT_SCREEN_WIDTH / 2)),
-                y2=int(CONSTANTS.VIRT_SCREEN_OFFSET_Y + (CONSTANTS.VIRT_SCREEN_HEIGHT / 2)),
-                gridindex=[0, 1, 4, 5], 
-                screen_idx=self._screen_idx,
-                window_idx=len(self.windows),
-                display_idx=self._display_idx)
-            )
-            
-            # Add 2nd larger window
-            self.windows.append(Window(
-                x1=CONSTANTS.VIRT_SCREEN_OFFSET_X,
-                y1=int(CONSTANTS.VIRT_SCREEN_OFFSET_Y + (CONSTANTS.VIRT_SCREEN_HEIGHT / 2)),
-                x2=int(CONSTANTS.VIRT_SCREEN_OFFSET_X + (CONSTANTS.VIRT_SCREEN_WIDTH / 2)),
-                y2=int(CONSTANTS.VIRT_SCREEN_OFFSET_Y + CONSTANTS.VIRT_SCREEN_HEIGHT),
-                gridindex=[8, 9, 12, 13], 
-                screen_idx=self._screen_idx,
-                window_idx=len(self.windows),
-                display_idx=self._display_idx)
-            )     
-            
-        elif self.layout == LAYOUT._3P4:
-            nrows_ncolums = 4
-            self.grid_size = [16]
-            
-            # Add 1st larger window
-            self.windows.append(Window(
-                x1=CONSTANTS.VIRT_SCREEN_OFFSET_X,
-                y1=CONSTANTS.VIRT_SCREEN_OFFSET_Y,
-                x2=int(CONSTANTS.VIRT_SCREEN_OFFSET_X + (CONSTANTS.VIRT_SCREEN_WIDTH / 2)),
-                y2=int(CONSTANTS.VIRT_SCREEN_OFFSET_Y + (CONSTANTS.VIRT_SCREEN_HEIGHT / 2)),
-                gridindex=[0, 1, 4, 5], 
-                screen_idx=self._screen_idx,
-                window_idx=len(self.windows),
-                display_idx=self._display_idx)
-            )       
-            
-            # Add 2nd larger window
-            self.windows.append(Window(
-                x1=int(CONSTANTS.VIRT_SCREEN_OFFSET_X + (CONSTANTS.VIRT_SCREEN_WIDTH / 2)),
-                y1=CONSTANTS.VIRT_SCREEN_OFFSET_Y,
-                x2=int(CONSTANTS.VIRT_SCREEN_OFFSET_X + CONSTANTS.VIRT_SCREEN_WIDTH),
-                y2=int(CONSTANTS.VIRT_SCREEN_OFFSET_Y + (CONSTANTS.VIRT_SCREEN_HEIGHT / 2)),
-                gridindex=[2, 3, 6, 7],
-                screen_idx=self._screen_idx,
-                window_idx=len(self.windows),
-                display_idx=self._display_idx)
-            )
+        nrows_ncolums, self.grid_size, grid_position_free, denominator, large_windows = _LAYOUTS[self.layout]
 
-            # Add 3rd larger window
+        # Add the larger windows first
+        for x1, y1, x2, y2, gridindex in large_windows:
             self.windows.append(Window(
-                x1=CONSTANTS.VIRT_SCREEN_OFFSET_X,
-                y1=int(CONSTANTS.VIRT_SCREEN_OFFSET_Y + (CONSTANTS.VIRT_SCREEN_HEIGHT / 2)),
-                x2=int(CONSTANTS.VIRT_SCREEN_OFFSET_X + (CONSTANTS.VIRT_SCREEN_WIDTH / 2)),
-                y2=int(CONSTANTS.VIRT_SCREEN_OFFSET_Y + CONSTANTS.VIRT_SCREEN_HEIGHT),
-                gridindex=[8, 9, 12, 13], 
+                x1=int(offset_x + (width * x1) / denominator),
+                y1=int(offset_y + (height * y1) / denominator),
+                x2=int(offset_x + (width * x2) / denominator),
+                y2=int(offset_y + (height * y2) / denominator),
+                gridindex=gridindex,
                 screen_idx=self._screen_idx,
                 window_idx=len(self.windows),
-                display_idx=self._display_idx)
+                display_idx=self._display_idx,
+                playstate_callback=self._on_window_playstate)
             )
 
-        else:
-            LOG.ERROR(self._LOG_NAME, "layout configuration '%i' invalid, falling back on 1X1 layout" % self.layout)
-            self.layout = LAYOUT._1X1
-            nrows_ncolums = 1
-            self.grid_size = [9, 16]
-        
-        win_height = CONSTANTS.VIRT_SCREEN_HEIGHT / nrows_ncolums
-        win_width = CONSTANTS.VIRT_SCREEN_WIDTH/ nrows_ncolums
-        
+        win_height = height / nrows_ncolums
+        win_width = width / nrows_ncolums
+
+        # Find out which base grid indices are covered by each window
+        max_columns = int(math.sqrt(max(self.grid_size)))
+        div = int(max_columns / nrows_ncolums)
+
+        # Base grid indices covered by the top left window, other windows are shifted by a start index
+        base_gridindex = [(max_columns * div_row) + div_column for div_row in range(div) for div_column in range(div)]
+
         top_left_y = 0
         bot_right_y = win_height
         
@@ -525,37 +499,22 @@ class Screen(object):
             bot_right_x = win_width
         
             for column in range(0, nrows_ncolums):
-                if ((self.layout == LAYOUT._1P5 and (column > 1 or row > 1)) or
-                        (self.layout == LAYOUT._1P7 and (column > 2 or row > 2)) or
-                        (self.layout == LAYOUT._1P12 and (column > 1 or row > 1)) or
-                        (self.layout == LAYOUT._2P8 and column > 1) or
-                        (self.layout == LAYOUT._3P4 and (column > 1 and row > 1)) or
-                        (self.layout == LAYOUT._1X1) or
-                        (self.layout == LAYOUT._2X2) or
-                        (self.layout == LAYOUT._3X3) or
-                        (self.layout == LAYOUT._4X4)):
-                    
-                    gridindex = []
+                if not grid_position_free or grid_position_free(column, row):
                     
-                    # Find out which base grid indices are covered by this window
-                    max_columns = int(math.sqrt(max(self.grid_size)))
-                    div = int(max_columns / nrows_ncolums)
                     start_idx = (max_columns * div * row) + (div * column)
-                    for _ in range(0, div):
-                        for idx in range(start_idx, start_idx + div):
-                            gridindex.append(idx)
-                        start_idx = start_idx + max_columns
+                    gridindex = [start_idx + idx for idx in base_gridindex]
                     
                     # Add all other windows
                     self.windows.append(Window(
-                        x1=CONSTANTS.VIRT_SCREEN_OFFSET_X + top_left_x,
-                        y1=CONSTANTS.VIRT_SCREEN_OFFSET_Y + top_left_y,
-                        x2=CONSTANTS.VIRT_SCREEN_OFFSET_X + bot_right_x,
-                        y2=CONSTANTS.VIRT_SCREEN_OFFSET_Y + bot_right_y,
+                        x1=offset_x + top_left_x,
+                        y1=offset_y + top_left_y,
+                        x2=offset_x + bot_right_x,
+                        y2=offset_y + bot_right_y,
                         gridindex=gridindex,
                         screen_idx=self._screen_idx,
                         window_idx=len(self.windows),
-                        display_idx=self._display_idx)
+                        display_idx=self._display_idx,
+                        playstate_callback=self._on_window_playstate)
                     )
 
                 top_left_x = top_left_x + win_width
@@ -564,132 +523,242 @@ class Screen(object):
             bot_right_y = bot_right_y + win_height
             top_left_y = top_left_y + win_height
         
+    @classmethod
+    def parse_channels(cls, screen_idx, window_count):
+        """
+        Parse the device and channel mapping of the windows from config file.
+        Returns (stream urls, channel settings, channel) per window, None for windows without valid mapping
+        """
+
+        channels = [None] * window_count
+        screen_section = str("SCREEN%i" % (screen_idx + 1))
+
+        if not CONFIG.has_section(screen_section):
+            return channels
+
+        # Fetch every section only once, multiple windows can share the same device section
+        screen_settings = dict(CONFIG.get_settings_for_section(screen_section))
+        device_settings = {}
+
+        for idx in range(window_count):
+
+            # If parsing fails, just continue with the next window
+            try:
+                window_setting = screen_settings.get(str("window%i" % (idx + 1)))
+
+                if window_setting is None:
+                    continue
+
+                window_map = window_setting.split(',')
+
+                if len(window_map) != 2:
+                    continue
+
+                device_section = window_map[0].upper()
+
+                try:
+                    channel_settings = device_settings[device_section]
+                except KeyError:
+                    channel_settings = device_settings[device_section] = \
+                        dict(CONFIG.get_settings_for_section(device_section)) \
+                        if CONFIG.has_section(device_section) else None
+
+                if channel_settings is None:
+                    continue
+
+                channel = window_map[1]
+                channel_url = channel_settings.get(channel.lower())
+
+                # When the main and subchannel are defined -> e.g. "channel1.1_url"
+                if channel_url is not None:
+                    urls = [channel_url]
+
+                # Only main channel defined, add all matching subchannels -> "channel1_url"
+                # This is the preferred method as it allows us to switch between subchannels
+                # depending on settings, stream quality, available bandwidth, ...
+                else:
+                    channel_main = channel.split("_")[0]
+                    urls = [value for setting, value in channel_settings.items()
+                            if channel_main in setting and "url" in setting]
+
+                channels[idx] = (urls, channel_settings, channel)
+
+            except Exception as ex:
+                LOG.ERROR(cls._LOG_NAME, "configfile parsing error: %s" % str(ex))
+
+        return channels
+
     def _parse_config(self):
         """Parse window settings and stream mapping from config file"""
 
-        # Parse the device, channel and stream mapping from config
-        for idx in range(0, len(self.windows)):
+        channels = self.parse_channels(self._screen_idx, len(self.windows))
+
+        # Add the streams and channel settings to the windows
+        for window, window_channel in zip(self.windows, channels):
+
+            if window_channel is None:
+                continue
+
+            urls, channel_settings, channel = window_channel
 
             # Add window stream URL
             # If parsing fails, just continue with the next window
             try:
-                if CONFIG.has_setting(str("SCREEN%i" % (self._screen_idx + 1)), str("window%i" % (idx + 1))):
-
-                    window_map = CONFIG.read_setting(str("SCREEN%i" % (self._screen_idx + 1)),
-                                                     str("window%i" % (idx + 1))).split(',')
-
-                    if len(window_map) == 2:
-                        if CONFIG.has_section(window_map[0].upper()):
-
-                            # When the main and subchannel are defined -> e.g. "channel1.1_url"
-                            if CONFIG.has_setting(window_map[0].upper(), window_map[1]):
-                                self.windows[idx].add_stream(CONFIG.read_setting(window_map[0].upper(), window_map[1]))
-
-                            # Only main channel defined, add all matching subchannels -> "channel1_url"
-                            # This is the preferred method as it allows us to switch between subchannels
-                            # depending on settings, stream quality, available bandwidth, ...
-                            else:
-                                for setting, value in CONFIG.get_settings_for_section(window_map[0].upper()):
-                                    if window_map[1].split("_")[0] in setting and "url" in setting:
-                                        self.windows[idx].add_stream(value)
-
-                            if '_' in window_map[1]:
-                                channel_setting_base = window_map[1].split('_')[0]  # Format: channel1_url
-                            else:
-                                channel_setting_base = window_map[1].split(".")[0]  # Format: channel1.1_url
-
-                            # Channel name defined?
-                            channel_name_set = channel_setting_base + "_name"
-                            if CONFIG.has_setting(window_map[0].upper(), channel_name_set):
-                                self.windows[idx].set_display_name(
-                                    CONFIG.read_setting(window_map[0].upper(), channel_name_set))
-
-                            # Force UDP enabled?
-                            force_udp_set = channel_setting_base + "_force_udp"
-                            if CONFIG.has_setting(window_map[0].upper(), force_udp_set):
-                                self.windows[idx].force_udp = CONFIG.read_setting_default_int(
-                                    window_map[0].upper(), force_udp_set, 0)
+                for url in urls:
+                    window.add_stream(url)
+
+                if '_' in channel:
+                    channel_setting_base = channel.split('_')[0]    # Format: channel1_url
+                else:
+                    channel_setting_base = channel.split(".")[0]    # Format: channel1.1_url
+
+                channel_setting_base = channel_setting_base.lower()
+
+                # Channel name defined?
+                channel_name = channel_settings.get(channel_setting_base + "_name")
+                if channel_name is not None:
+                    window.set_display_name(channel_name)
+
+                # Force UDP enabled?
+                force_udp = channel_settings.get(channel_setting_base + "_force_udp")
+                if force_udp is not None:
+                    try:
+                        window.force_udp = int(force_udp)
+                    except ValueError:
+                        LOG.ERROR(self._LOG_NAME, "failed to parse integer value from setting '%s', "
+                                                  "using the default" % (channel_setting_base + "_force_udp"))
+                        window.force_udp = 0
+
+                # Buffer time overridden?
+                buffertime = channel_settings.get(channel_setting_base + "_buffertime")
+                if buffertime is not None:
+                    try:
+                        window.buffertime_ms = max(int(buffertime), 0)
+                    except ValueError:
+                        LOG.ERROR(self._LOG_NAME, "failed to parse integer value from setting '%s', "
+                                                  "using the default" % (channel_setting_base + "_buffertime"))
 
             except Exception as ex:
                 LOG.ERROR(self._LOG_NAME, "configfile parsing error: %s" % str(ex))
 
 
+class DisplayState(object):
+    """Screen rotation/control state of a single display"""
+
+    __slots__ = ('active_screen_idx', 'next_active_screen_idx', 'prev_screen_idx', 'screens',
+                 'timer_last_screenchange', 'timer_last_watchdog', 'single_window_mode', 'paused', 'timer_hide_icon',
+                 'rotation_next', 'rotation_prev', 'deferred_steps', 'deferred_time')
+
+    def __init__(self):
+        self.active_screen_idx          = ScreenManager._IDX_NOT_SET    # Screen index of currently active screen
+        self.next_active_screen_idx     = ScreenManager._IDX_NOT_SET    # Screen index of next active screen (=screen rotation pending/pre-buffering)
+        self.prev_screen_idx            = ScreenManager._IDX_NOT_SET    # Screen index of previous active screen
+        self.screens                    = []                            # Assigned screens
+        self.timer_last_screenchange    = 0                             # Timestamp of last screen rotation
+        self.timer_last_watchdog        = 0                             # Timestamp of last stream/player check (watchdog)
+        self.single_window_mode         = False                         # Force single view mode (False = grid mode)
+        self.paused                     = False                         # Pause automatic screen rotation
+        self.timer_hide_icon            = 0                             # Timestamp of icon overlay timeout
+        self.rotation_next              = ()                            # Screen index -> next screen index
+        self.rotation_prev              = ()                            # Screen index -> previous screen index
+        self.deferred_steps             = None                          # Generator of pending steps, see 'ScreenManager._defer'
+        self.deferred_time              = 0                             # Timestamp of next deferred step
+
+    def build_rotation(self):
+        """Build the next/previous screen lookup tables once all screens are assigned"""
+
+        count = len(self.screens)
+
+        self.rotation_next = tuple((idx + 1) % count for idx in range(count))
+        self.rotation_prev = tuple((idx - 1) % count for idx in range(count))
+
+
 class ScreenManager(object):
 
     _MODULE = "ScreenManager"
     _IDX_NOT_SET = -1
 
     def __init__(self):
-        self._active_screen_idx         = [self._IDX_NOT_SET    for _ in range(GLOBALS.NUM_DISPLAYS)]   # Screen index of currently active screen
-        self._next_active_screen_idx    = [self._IDX_NOT_SET    for _ in range(GLOBALS.NUM_DISPLAYS)]   # Screen index of next active screen (=screen rotation pending/pre-buffering)
-        self._prev_screen_idx           = [self._IDX_NOT_SET    for _ in range(GLOBALS.NUM_DISPLAYS)]   # Screen index of previous active screen
-        self._screens                   = [[]                   for _ in range(GLOBALS.NUM_DISPLAYS)]   # Assigned screens
-        self._timer_last_screenchange   = [0                    for _ in range(GLOBALS.NUM_DISPLAYS)]   # Timestamp of last screen rotation
-        self._timer_last_watchdog       = [0                    for _ in range(GLOBALS.NUM_DISPLAYS)]   # Timestamp of last stream/player check (watchdog)
-        self._single_window_mode        = [False                for _ in range(GLOBALS.NUM_DISPLAYS)]   # Force single view mode (False = grid mode)
-        self._paused                    = [False                for _ in range(GLOBALS.NUM_DISPLAYS)]   # Pause automatic screen rotation
-        self._timer_hide_icon           = [0                    for _ in range(GLOBALS.NUM_DISPLAYS)]   # Timestamp of icon overlay timeout
-        self._pending_action            = [Action.NONE, None]                                           # Pending user triggered action [action, parameter]
+        self._displays                  = [DisplayState()       for _ in range(GLOBALS.NUM_DISPLAYS)]   # Per display state, see 'DisplayState'
+        self._pending_action            = None                                                          # Pending user triggered action (action, parameter)
         self._selected_display          = 0                                                             # Index of display to control with keyboard/remote
+        self._screens_flat              = []                                                            # Screens of all displays
+        self._num_initializing          = 0                                                             # Windows in playstate INIT1 on all screens
+
+        # Action -> handler(action, parameter)
+        self._action_dispatch = {
+            Action.SWITCH_GRID:             lambda action, param: self._action_switch_grid(),
+            Action.SWITCH_SINGLE:           lambda action, param: self._action_switch_single(window_idx=param),
+            Action.SWITCH_NEXT:             lambda action, param: self._action_switch_screen(action),
+            Action.SWITCH_PREV:             lambda action, param: self._action_switch_screen(action),
+            Action.SWITCH_QUALITY_UP:       lambda action, param: self._action_switch_quality(action),
+            Action.SWITCH_QUALITY_DOWN:     lambda action, param: self._action_switch_quality(action),
+            Action.SWITCH_PAUSE_UNPAUSE:    lambda action, param: self._action_switch_pause(),
+            Action.SWITCH_DISPLAY_CONTROL:  lambda action, param: self._action_switch_display_control(),
+        }
 
         # Parse screen configuration from file
         self._parse_config()
 
+    def _on_screen_initializing(self, delta):
+        """Initializing windows count change callback of the screens"""
+
+        self._num_initializing += delta
+
+    def _players_initializing(self):
+        """Any player on any screen not ready yet to be (DBus) controlled?"""
+
+        if not self._num_initializing:
+            return False
+
+        return any(screen.players_initializing() for screen in self._screens_flat)
+
     @property
     def valid_screens(self):
         """Get valid screens count"""
 
-        count = 0
-
-        for i in range(GLOBALS.NUM_DISPLAYS):
-            count += len(self._screens[i])
-
-        return count
+        return len(self._screens_flat)
 
     def on_action(self, action, param=None):
         """Set action to be executed"""
 
-        if self._pending_action and self._pending_action[0] != Action.NONE:
+        if self._pending_action:
             LOG.WARNING(self._MODULE, "ignoring action '%s', still processing action '%s'"
                         % (action, self._pending_action[0]))
             return
 
-        self._pending_action = [action, param]
+        if action == Action.NONE:
+            return
+
+        self._pending_action = (action, param)
 
     def _get_next_idx(self, display_idx=0):
         """Get next screen index"""
 
-        display_idx = 1 if display_idx == 1 else 0
+        display = self._displays[display_idx]
 
-        if self._active_screen_idx[display_idx] == self._IDX_NOT_SET:
+        if display.active_screen_idx == self._IDX_NOT_SET:
             return 0
-            
-        idx = self._active_screen_idx[display_idx] + 1
-        if idx >= len(self._screens[display_idx]):
-            idx = 0
-            
-        return idx
+
+        return display.rotation_next[display.active_screen_idx]
 
     def _get_prev_idx(self, display_idx=0):
         """Get previous screen index"""
 
-        display_idx = 1 if display_idx == 1 else 0
+        display = self._displays[display_idx]
 
-        if self._active_screen_idx[display_idx] == self._IDX_NOT_SET:
+        if display.active_screen_idx == self._IDX_NOT_SET:
             return 0
-            
-        idx = self._active_screen_idx[display_idx] - 1
-        if idx < 0:
-            idx = len(self._screens[display_idx]) - 1
-            
-        return idx
+
+        return display.rotation_prev[display.active_screen_idx]
     
     def start_screen(self, screen_idx, display_idx=0, visible=True):
         """Start windows for screen and set indices correct"""
 
         display_idx = 1 if display_idx == 1 else 0
+        display = self._displays[display_idx]
 
-        if screen_idx >= len(self._screens[display_idx]):
+        if screen_idx >= len(display.screens):
             return
 
         LOG.DEBUG(self._MODULE, "starting all streams for screen '%i' on display '%i'"
@@ -697,55 +766,72 @@ class ScreenManager(object):
             
         if visible:
             BackGroundManager.show_background(
-                BackGround.NOLINK(self._screens[display_idx][screen_idx].layout), display_idx=display_idx)
+                BackGround.NOLINK(display.screens[screen_idx].layout), display_idx=display_idx)
 
-            self._prev_screen_idx[display_idx] = self._active_screen_idx[display_idx]
-            self._active_screen_idx[display_idx] = screen_idx
-            self._screens[display_idx][screen_idx].streams_start(visible=True)
-            self._timer_last_screenchange[display_idx] = time.monotonic()
-            self._next_active_screen_idx[display_idx] = self._IDX_NOT_SET
+            display.prev_screen_idx = display.active_screen_idx
+            display.active_screen_idx = screen_idx
+            display.screens[screen_idx].streams_start(visible=True)
+            display.timer_last_screenchange = time.monotonic()
+            display.next_active_screen_idx = self._IDX_NOT_SET
         else:
-            self._next_active_screen_idx[display_idx] = screen_idx
-            self._screens[display_idx][screen_idx].streams_start(visible=False)
+            display.next_active_screen_idx = screen_idx
+            display.screens[screen_idx].streams_start(visible=False)
 
     def stop_screen(self, screen_idx=_IDX_NOT_SET, display_idx=_IDX_NOT_SET):
         """Stop all containing windows"""
 
-        LOG.DEBUG(self._MODULE, "stopping all streams for screen number '%i'" % (screen_idx + 1))
-
-        display_idx = 1 if display_idx == 1 else 0
-
         # No screen index given, stop all screens
         if screen_idx == self._IDX_NOT_SET:
 
-            # TODO: is this even in use?
-
             # No display index given, stop all screens on all displays
             if display_idx == self._IDX_NOT_SET:
-
-                for disp_idx in range(GLOBALS.NUM_DISPLAYS):
-                    for screen in self._screens[disp_idx]:
-                        screen.streams_stop()
-
-                # Just to be sure there are no leftovers/freezed players
-                Window.stop_all_players(sigkill=True)
-
-                for disp_idx in range(GLOBALS.NUM_DISPLAYS):
-                    self._next_active_screen_idx[disp_idx] = self._IDX_NOT_SET
+                self._stop_all()
 
             # Only stop screens on given display
             else:
-                for screen in self._screens[display_idx]:
-                    screen.streams_stop()
-
-                self._next_active_screen_idx[display_idx] = self._IDX_NOT_SET
+                self._stop_display(display_idx)
 
         # Only stop given screen on given display
         elif display_idx != self._IDX_NOT_SET:
-            self._screens[display_idx][screen_idx].streams_stop()
+            self._stop_one(screen_idx, display_idx)
+
+    def _stop_all(self):
+        """Stop all screens on all displays"""
+
+        LOG.DEBUG(self._MODULE, "stopping all streams for all displays")
 
-            if screen_idx == self._next_active_screen_idx[display_idx]:
-                self._next_active_screen_idx[display_idx] = self._IDX_NOT_SET
+        for screen in self._screens_flat:
+            screen.streams_stop()
+
+        # Just to be sure there are no leftovers/freezed players
+        Window.stop_all_players(sigkill=True)
+
+        for display in self._displays:
+            display.next_active_screen_idx = self._IDX_NOT_SET
+
+    def _stop_display(self, display_idx):
+        """Stop all screens on the given display"""
+
+        LOG.DEBUG(self._MODULE, "stopping all streams for display '%i'" % (display_idx + 1))
+
+        display = self._displays[display_idx]
+
+        for screen in display.screens:
+            screen.streams_stop()
+
+        display.next_active_screen_idx = self._IDX_NOT_SET
+
+    def _stop_one(self, screen_idx, display_idx):
+        """Stop the given screen on the given display"""
+
+        LOG.DEBUG(self._MODULE, "stopping all streams for screen '%i' on display '%i'"
+                  % (screen_idx + 1, display_idx + 1))
+
+        display = self._displays[display_idx]
+        display.screens[screen_idx].streams_stop()
+
+        if screen_idx == display.next_active_screen_idx:
+            display.next_active_screen_idx = self._IDX_NOT_SET
 
     def refresh_screen(self, screen_idx=_IDX_NOT_SET, display_idx=0):
         """Refresh all containing windows"""
@@ -753,72 +839,74 @@ class ScreenManager(object):
         if screen_idx == self._IDX_NOT_SET:
             return
 
-        self._screens[display_idx][screen_idx].streams_refresh()
+        self._displays[display_idx].screens[screen_idx].streams_refresh()
+
+    def _ensure_icon(self, icon, display_idx):
+        """Show icon on display unless it's already the active one"""
+
+        if BackGroundManager.active_icon[display_idx] != icon:
+            BackGroundManager.show_icon(icon, display_idx=display_idx)
 
     def _execute_pending_action(self):
         """Execute pending user based actions"""
         
-        if (not self._pending_action) or self._pending_action[0] == Action.NONE:
+        if not self._pending_action:
             return
 
-        action = self._pending_action[0]
-        param = self._pending_action[1]
+        action, param = self._pending_action
 
         LOG.INFO(self._MODULE, "executing user action '%s'" % str(action))
         
         # Reset timer to prevent screen rotation kicking in
-        self._timer_last_screenchange[self._selected_display] = time.monotonic()
+        self._displays[self._selected_display].timer_last_screenchange = time.monotonic()
 
-        # Switch to grid view
-        if action == Action.SWITCH_GRID:
-            self._action_switch_grid()
+        handler = self._action_dispatch.get(action)
+        if handler:
+            handler(action, param)
 
-        # Switch to single view
-        elif action == Action.SWITCH_SINGLE:
-            self._action_switch_single(window_idx=param)
+        self._pending_action = None
 
-        # Switch to previous/next window/screen
-        elif action == Action.SWITCH_NEXT or action == Action.SWITCH_PREV:
-            if self._single_window_mode[self._selected_display]:
-                self._action_switch_single(
-                    next_window=action == Action.SWITCH_NEXT, prev_window=action == Action.SWITCH_PREV)
-            else:
-                self._action_switch_prev_next(action)
+    def _action_switch_screen(self, action):
+        """Action: switch to previous/next window in single view mode, or to previous/next screen"""
 
-        # Switch to higher/lower quality stream
-        elif action == Action.SWITCH_QUALITY_UP or action == Action.SWITCH_QUALITY_DOWN:
-            self._action_switch_quality(action)
+        if self._displays[self._selected_display].single_window_mode:
+            self._action_switch_single(
+                next_window=action == Action.SWITCH_NEXT, prev_window=action == Action.SWITCH_PREV)
+        else:
+            self._defer(self._selected_display, self._action_switch_prev_next(action))
 
-        elif action == Action.SWITCH_PAUSE_UNPAUSE:
-            self._paused[self._selected_display] = not self._paused[self._selected_display]
+    def _action_switch_pause(self):
+        """Action: pause/unpause screen rotation"""
 
-        elif action == Action.SWITCH_DISPLAY_CONTROL:
+        display = self._displays[self._selected_display]
+        display.paused = not display.paused
 
-            # Hide the control icon on the current display
-            self._timer_hide_icon[self._selected_display] = time.monotonic()
+    def _action_switch_display_control(self):
+        """Action: switch the display controlled by keyboard/remote"""
 
-            self._selected_display += 1
-            if self._selected_display >= GLOBALS.NUM_DISPLAYS:
-                self._selected_display = 0
+        # Hide the control icon on the current display
+        self._displays[self._selected_display].timer_hide_icon = time.monotonic()
 
-            BackGroundManager.show_icon(BackGround.CONTROL, display_idx=self._selected_display)
+        self._selected_display += 1
+        if self._selected_display >= GLOBALS.NUM_DISPLAYS:
+            self._selected_display = 0
 
-            # Show the control icon on the new display for 5 seconds
-            self._timer_hide_icon[self._selected_display] = time.monotonic() + 5
+        BackGroundManager.show_icon(BackGround.CONTROL, display_idx=self._selected_display)
 
-        self._pending_action = [Action.NONE, None]
+        # Show the control icon on the new display for 5 seconds
+        self._displays[self._selected_display].timer_hide_icon = time.monotonic() + 5
 
     def _action_switch_quality(self, action):
         """Action: switch quality of stream up/down"""
 
         display_idx = self._selected_display
 
-        self._paused[display_idx] = True
+        self._displays[display_idx].paused = True
 
-        BackGroundManager.show_icon(BackGround.LOADING, display_idx=display_idx)
+        self._ensure_icon(BackGround.LOADING, display_idx)
 
-        active_screen_idx = self._active_screen_idx[display_idx]
-        active_screen = self._screens[display_idx][active_screen_idx]
+        active_screen_idx = self._displays[display_idx].active_screen_idx
+        active_screen = self._displays[display_idx].screens[active_screen_idx]
 
         if action == Action.SWITCH_QUALITY_UP:
             active_screen.switch_quality_up()
@@ -829,65 +917,66 @@ class ScreenManager(object):
         """Action: switch from single to grid view mode"""
 
         display_idx = self._selected_display
+        display = self._displays[display_idx]
+        active_screen = display.screens[display.active_screen_idx]
 
-        self._paused[display_idx] = False
-        self._single_window_mode[self._selected_display] = False
+        display.paused = False
+        display.single_window_mode = False
 
-        BackGroundManager.show_icon(BackGround.LOADING, display_idx=display_idx)
+        self._ensure_icon(BackGround.LOADING, display_idx)
 
-        BackGroundManager.show_background(
-            BackGround.NOLINK(self._screens[display_idx][self._active_screen_idx[display_idx]].layout),
-            display_idx=display_idx)
+        BackGroundManager.show_background(BackGround.NOLINK(active_screen.layout), display_idx=display_idx)
 
-        self._screens[display_idx][self._active_screen_idx[display_idx]].switch_gridview()
+        active_screen.switch_gridview()
 
     def _action_switch_single(self, window_idx=0, next_window=False, prev_window=False):
         """Action: switch to single view mode (i.e. resize one window to fullscreen dimensions)"""
 
         display_idx = self._selected_display
+        display = self._displays[display_idx]
+        active_screen = display.screens[display.active_screen_idx]
 
-        self._paused[display_idx] = True
+        display.paused = True
 
         # Single view mode is already on if the screen only has one window
-        if len(self._screens[display_idx][self._active_screen_idx[display_idx]].windows) <= 1:
+        if len(active_screen.windows) <= 1:
             return
 
-        self._single_window_mode[self._selected_display] = True
+        display.single_window_mode = True
 
-        BackGroundManager.show_icon(BackGround.LOADING, display_idx=display_idx)
+        self._ensure_icon(BackGround.LOADING, display_idx)
 
-        self._screens[display_idx][self._active_screen_idx[display_idx]].switch_singleview(
-            window_idx=window_idx, next_window=next_window, prev_window=prev_window)
+        active_screen.switch_singleview(window_idx=window_idx, next_window=next_window, prev_window=prev_window)
 
         BackGroundManager.show_background(BackGround.NOLINK(1), display_idx=display_idx)
 
     def _action_switch_prev_next(self, action):
-        """Action: switch to previous or next screen"""
+        """Action: switch to previous or next screen, generator of deferred steps"""
 
         display_idx = self._selected_display
+        display = self._displays[display_idx]
 
         new_screen_idx = self._get_next_idx(display_idx=display_idx) \
             if action == Action.SWITCH_NEXT else self._get_prev_idx(display_idx=display_idx)
 
         # Pause screen rotation
-        self._paused[display_idx] = True
+        display.paused = True
 
-        BackGroundManager.show_icon(BackGround.LOADING, display_idx=display_idx)
+        self._ensure_icon(BackGround.LOADING, display_idx)
 
         # Stop all screens for this display
-        self.stop_screen(display_idx=self._selected_display)
-        time.sleep(0.5)
+        self._stop_display(display_idx)
+        yield 0.5
 
         # To be sure no hanging player instances are left
         # The prev/next action actually acts as a hard refresh function
         if GLOBALS.NUM_DISPLAYS <= 1:
             Window.stop_all_players(sigkill=True)
 
-        BackGroundManager.show_background(BackGround.NOLINK(
-            self._screens[self._selected_display][new_screen_idx].layout), display_idx=display_idx)
+        BackGroundManager.show_background(BackGround.NOLINK(display.screens[new_screen_idx].layout), display_idx=display_idx)
 
         # Start new screen
-        self.start_screen(screen_idx=new_screen_idx, display_idx=self._selected_display)
+        self.start_screen(screen_idx=new_screen_idx, display_idx=display_idx)
 
     def _monitor_players(self):
         """
@@ -895,75 +984,85 @@ class ScreenManager(object):
         TODO: Can we find a better location for this?
         """
 
+        # The previous screen of a changeover in progress is still playing,
+        # we would kill those players too
+        if self._deferred_pending():
+            return
+
         # Be sure all players are initialized otherwise
         # we might kill them later on
-        for display_idx in range(GLOBALS.NUM_DISPLAYS):
-            for screen in self._screens[display_idx]:
-                if screen.players_initializing():
-                    return
+        if self._players_initializing():
+            return
+
+        # Nothing to do when all stopped players are gone
+        if not Window.pidpool_check_required():
+            return
 
         LOG.DEBUG(self._MODULE, "player watchdog")
 
         # (Re)Fetch PIDs from the OS
         Window.pidpool_update()
 
-        for PID in Window._player_pid_pool_cmdline[0]:
+        # PIDs of the active screens, the next active screens (pre-buffering already in background)
+        # and idling VLC media player instances
+        player_pids = set(Window.vlc_player_pid)
 
-            pid_found = False
+        for display_idx in range(GLOBALS.NUM_DISPLAYS):
+            if len(self._displays[display_idx].screens) <= 0:
+                continue
 
-            for display_idx in range(GLOBALS.NUM_DISPLAYS):
-                if len(self._screens[display_idx]) <= 0:
-                    continue
+            screens = self._displays[display_idx].screens
 
-                screens = self._screens[display_idx]
-                screen_idx = self._active_screen_idx[display_idx]
-                next_active_screen_idx = self._next_active_screen_idx[display_idx]
+            for screen_idx in (self._displays[display_idx].active_screen_idx,
+                               self._displays[display_idx].next_active_screen_idx):
+                if screen_idx == self._IDX_NOT_SET:
+                    continue
 
-                # Does this PID belongs to our active screen?
                 for window in screens[screen_idx].windows:
-                    if window.omx_player_pid == int(PID) and window.playstate != PLAYSTATE.NONE:
-                        pid_found = True
-                        break
-
-                # PID not found, maybe it belongs to the next active screen (pre-buffering already in background)
-                if not pid_found and next_active_screen_idx != self._IDX_NOT_SET:
-                    for window in screens[next_active_screen_idx].windows:
-                        if window.omx_player_pid == int(PID) and window.playstate != PLAYSTATE.NONE:
-                            pid_found = True
-                            break
-
-                # PID not found, does it belongs to idling VLC media player instances?
-                if not pid_found:
-                    for vlc_pid in Window.vlc_player_pid:
-                        if vlc_pid == int(PID):
-                            pid_found = True
-                            break
-
-            if not pid_found:
+                    if window.playstate != PLAYSTATE.NONE:
+                        player_pids.add(window.omx_player_pid)
+
+        # Copy, killed PIDs are removed from the pool
+        for pid in list(Window._player_pid_pool):
+
+            if pid not in player_pids:
                 LOG.ERROR(self._MODULE, "inactive player PID found (%s), "
-                    "this should not happen, sending SIGKILL" % int(PID))
+                    "this should not happen, sending SIGKILL" % pid)
+
+                Window.pidpool_kill_pid(pid)
 
-                os.kill(int(PID), signal.SIGKILL)
-                Window._pidpool_remove_pid(int(PID))
+        Window.pidpool_check_done()
    
     def _screen_rotate_next_active(self, display_idx=0):
         """
-        Switchover from the current screen to the next active one
+        Switchover from the current screen to the next active one and stop the old screen afterwards
         Assumes the next screen is already pre-buffering/playing in the background
+        Generator of deferred steps
         """
 
-        if self._next_active_screen_idx[display_idx] == self._IDX_NOT_SET:
+        display = self._displays[display_idx]
+
+        if display.next_active_screen_idx == self._IDX_NOT_SET:
             LOG.ERROR(self._MODULE, "cannot rotate screen, no next active screen set")
             return
         
-        self._prev_screen_idx[display_idx] = self._active_screen_idx[display_idx]
-        self._active_screen_idx[display_idx] = self._next_active_screen_idx[display_idx]
+        display.prev_screen_idx = display.active_screen_idx
+        display.active_screen_idx = display.next_active_screen_idx
+
+        # Same screen, nothing to switchover and nothing to stop afterwards
+        if display.prev_screen_idx == display.active_screen_idx:
+            display.timer_last_screenchange = time.monotonic()
+            display.next_active_screen_idx = self._IDX_NOT_SET
+            return
+
+        prev_screen = display.screens[display.prev_screen_idx]
+        active_screen = display.screens[display.active_screen_idx]
         
         LOG.DEBUG(self._MODULE, "switch over from screen '%i' to '%i'"
-                  % (self._prev_screen_idx[display_idx] + 1, self._active_screen_idx[display_idx] + 1))
+                  % (display.prev_screen_idx + 1, display.active_screen_idx + 1))
 
-        old_grid = self._screens[display_idx][self._prev_screen_idx[display_idx]].grid_size
-        new_grid = self._screens[display_idx][self._active_screen_idx[display_idx]].grid_size
+        old_grid = prev_screen.grid_size
+        new_grid = active_screen.grid_size
         grid_match = False
 
         for grid_s in new_grid:
@@ -978,152 +1077,192 @@ class ScreenManager(object):
             LOG.WARNING(self._MODULE, "gridsizes do not match for a smooth changeover, "
                                     "old grid '%s' new grid '%s'" % (str(old_grid), str(new_grid)))
 
-            self._screens[display_idx][self._prev_screen_idx[display_idx]].streams_set_invisible()
+            prev_screen.streams_set_invisible()
 
-            BackGroundManager.show_background(BackGround.NOLINK(
-                self._screens[display_idx][self._active_screen_idx[display_idx]].layout), display_idx=display_idx)
+            BackGroundManager.show_background(BackGround.NOLINK(active_screen.layout), display_idx=display_idx)
 
-            time.sleep(0.25)
-            self._screens[display_idx][self._active_screen_idx[display_idx]].streams_set_visible()
+            yield 0.25
+            active_screen.streams_set_visible()
 
         else:
 
-            BackGroundManager.show_background(BackGround.NOLINK(
-                self._screens[display_idx][self._active_screen_idx[display_idx]].layout), display_idx=display_idx)
+            BackGroundManager.show_background(BackGround.NOLINK(active_screen.layout), display_idx=display_idx)
 
-            for i in range(0, len(self._screens[display_idx][self._prev_screen_idx[display_idx]].windows)):
+            new_grid_sets = [new_window.gridindex_set for new_window in active_screen.windows]
 
-                if self._prev_screen_idx != self._active_screen_idx:
+            changeover_idx = set()
 
-                    old_grid_idx = self._screens[display_idx][self._prev_screen_idx[display_idx]].windows[i].gridindex
-                    changeover_idx = old_grid_idx[:]
+            for old_window in prev_screen.windows:
 
-                    # In case the new window covers more grid positions, we want to add them too
-                    # For example switching from a 3X3 to 1X1 grid view
-                    for y in range (0, len(self._screens[display_idx][self._active_screen_idx[display_idx]].windows)):
-                        new_grid_idx = self._screens[display_idx][self._active_screen_idx[display_idx]].windows[y].gridindex
-                        for old_idx in old_grid_idx:
-                            if old_idx in new_grid_idx:
-                                for new_idx in new_grid_idx:
-                                    if new_idx not in changeover_idx:
-                                        changeover_idx.append(new_idx)
+                old_grid_idx = old_window.gridindex_set
+                changeover_idx |= old_grid_idx
 
-                    LOG.DEBUG(self._MODULE, "set windows with indices '%s' visible" % str(changeover_idx))
+                # In case the new window covers more grid positions, we want to add them too
+                # For example switching from a 3X3 to 1X1 grid view
+                for new_grid_idx in new_grid_sets:
+                    if old_grid_idx & new_grid_idx:
+                        changeover_idx |= new_grid_idx
 
-                    # Do the actual switchover
-                    # Smooth is harder for the hvs (hardware video scaler)
-                    if CONFIG.CHANGE_OVER == CHANGEOVER.PREBUFFER_SMOOTH:
-                        self._screens[display_idx][self._active_screen_idx[display_idx]].\
-                            streams_set_visible(changeover_idx)
+            # Do the actual switchover for all windows at once
+            # Smooth is harder for the hvs (hardware video scaler)
+            if changeover_idx:
 
-                        # 500ms especially needed for VLC startup without a black screen interval
-                        time.sleep(0.5)
+                LOG.DEBUG(self._MODULE, "set windows with indices '%s' visible" % str(sorted(changeover_idx)))
 
-                        self._screens[display_idx][self._prev_screen_idx[display_idx]].\
-                            streams_set_invisible(changeover_idx)
-                    else:
-                        self._screens[display_idx][self._prev_screen_idx[display_idx]].\
-                            streams_set_invisible(changeover_idx)
+                if CONFIG.CHANGE_OVER == CHANGEOVER.PREBUFFER_SMOOTH:
+                    active_screen.streams_set_visible(changeover_idx)
 
-                        time.sleep(0.05)
+                    # 500ms especially needed for VLC startup without a black screen interval
+                    yield 0.5
 
-                        self._screens[display_idx][self._active_screen_idx[display_idx]].\
-                            streams_set_visible(changeover_idx)
+                    prev_screen.streams_set_invisible(changeover_idx)
+                else:
+                    prev_screen.streams_set_invisible(changeover_idx)
+
+                    yield 0.05
+
+                    active_screen.streams_set_visible(changeover_idx)
 
             # Set the remaining windows visible, if any
-            self._screens[display_idx][self._active_screen_idx[display_idx]].streams_set_visible()
+            active_screen.streams_set_visible()
         
-        if self._timer_last_screenchange[display_idx] > 0:
+        now = time.monotonic()
+
+        if display.timer_last_screenchange > 0:
             LOG.DEBUG(self._MODULE, "screen '%i' was active for '%i' milliseconds" % (
-                self._prev_screen_idx[display_idx] + 1,
-                (time.monotonic() - self._timer_last_screenchange[display_idx]) * 1000))
+                display.prev_screen_idx + 1,
+                (now - display.timer_last_screenchange) * 1000))
+
+        display.timer_last_screenchange = now
+        display.next_active_screen_idx = self._IDX_NOT_SET
+
+        # Stop all streams from the old screen
+        self._stop_one(display.prev_screen_idx, display_idx)
+
+    def _defer(self, display_idx, steps):
+        """
+        Run a generator of steps for a display, the generator yields the delay in seconds before its next step.
+        Other work for this display waits until all steps are done, instead of blocking the worker loop.
+        """
+
+        self._displays[display_idx].deferred_steps = steps
+        self._displays[display_idx].deferred_time = 0
 
-        self._timer_last_screenchange[display_idx] = time.monotonic()
-        self._next_active_screen_idx[display_idx] = self._IDX_NOT_SET
+        self._run_deferred(display_idx)
+
+    def _run_deferred(self, display_idx):
+        """Run the next deferred step for a display when due"""
+
+        display = self._displays[display_idx]
+
+        if not display.deferred_steps or time.monotonic() < display.deferred_time:
+            return
+
+        try:
+            display.deferred_time = time.monotonic() + next(display.deferred_steps)
+        except StopIteration:
+            display.deferred_steps = None
+
+    def _deferred_pending(self):
+        """Any deferred steps left on one of the displays?"""
+
+        return any(display.deferred_steps for display in self._displays)
 
     def do_work(self):
         """Worker loop for screen handling"""
 
+        # Continue deferred steps, e.g. a smooth screen changeover
+        for display_idx in range(GLOBALS.NUM_DISPLAYS):
+            self._run_deferred(display_idx)
+
         # Handle the very first start on each display
         for display_idx in range(GLOBALS.NUM_DISPLAYS):
-            if self._active_screen_idx[display_idx] == self._IDX_NOT_SET and len(self._screens[display_idx]) > 0:
+            if self._displays[display_idx].active_screen_idx == self._IDX_NOT_SET and len(self._displays[display_idx].screens) > 0:
                 self.start_screen(screen_idx=0, visible=True, display_idx=display_idx)
                 return
 
         # Be sure all players are initialized otherwise
         # we might not be able to stop/move windows later on
-        for display_idx in range(GLOBALS.NUM_DISPLAYS):
-            for screen in self._screens[display_idx]:
-                if screen.players_initializing():
-                    return
+        if self._players_initializing():
+            return
 
         # User action pending? e.g. switch screen, switch stream quality, etc.
-        if self._pending_action and self._pending_action[0] != Action.NONE:
+        # Wait until the deferred steps of a previous action or screen changeover are done
+        if self._pending_action and not self._deferred_pending():
             self._execute_pending_action()
             return
 
+        now = time.monotonic()
+
+        # Players and decoder weight of all displays, only (re)calculated when needed
+        cur_playing = None
+        cur_weight = None
+
         for display_idx in range(GLOBALS.NUM_DISPLAYS):
+            display = self._displays[display_idx]
 
-            if self._active_screen_idx[display_idx] == self._IDX_NOT_SET:
+            if display.active_screen_idx == self._IDX_NOT_SET or display.deferred_steps:
                 continue
 
+            screens = display.screens
+            active_screen = screens[display.active_screen_idx]
+            displaytime = active_screen.displaytime
+
             # Default_pause = don't automatically rotate screens
             #   When    1: Displaytime of screen is set to '0'
             #           2: Only one screen is configured
-            default_paused = self._screens[display_idx][self._active_screen_idx[display_idx]].displaytime == 0 or \
-                len(self._screens[display_idx]) <= 1
+            default_paused = displaytime == 0 or len(screens) <= 1
 
             # The user can also pause/unpause screen rotation
-            rotation_paused = default_paused or self._paused[display_idx]
+            rotation_paused = default_paused or display.paused
 
             # Remove 'LOADING' overlay if all players are playing
             if BackGroundManager.active_icon[display_idx] == BackGround.LOADING:
-                if not self._screens[display_idx][self._active_screen_idx[display_idx]].players_buffering():
+                if not active_screen.players_buffering():
                     BackGroundManager.hide_icon(display_idx=display_idx)
 
             # Remove 'PAUSED' overlay if not paused anymore
             elif BackGroundManager.active_icon[display_idx] == BackGround.PAUSED:
-                if not self._paused[display_idx]:
+                if not display.paused:
                     BackGroundManager.hide_icon(display_idx=display_idx)
 
             # Remove timed overlays when timer expired
-            elif self._timer_hide_icon[display_idx] and time.monotonic() > self._timer_hide_icon[display_idx]:
+            elif display.timer_hide_icon and now > display.timer_hide_icon:
                 BackGroundManager.hide_icon(display_idx=display_idx)
-                self._timer_hide_icon[display_idx] = 0
+                display.timer_hide_icon = 0
 
             # Add 'PAUSED' overlay if paused and no other icon is active
             if rotation_paused and not default_paused and not BackGroundManager.active_icon[display_idx]:
-                BackGroundManager.show_icon(BackGround.PAUSED, display_idx=display_idx)
+                self._ensure_icon(BackGround.PAUSED, display_idx)
 
             if rotation_paused:
 
                 # In case the next screen was pre-buffering while screen rotation was paused
-                if (self._next_active_screen_idx[display_idx] != self._IDX_NOT_SET and
-                        self._next_active_screen_idx[display_idx] != self._active_screen_idx):
+                if (display.next_active_screen_idx != self._IDX_NOT_SET and
+                        display.next_active_screen_idx != display.active_screen_idx):
 
                     LOG.WARNING(self._MODULE,
                         "screenrotation paused while pre-buffering, stopping screen with index '%i'"
-                        % self._next_active_screen_idx[display_idx])
+                        % display.next_active_screen_idx)
+
+                    self._stop_one(display.next_active_screen_idx, display_idx)
+                    display.next_active_screen_idx = self._IDX_NOT_SET
 
-                    self.stop_screen(screen_idx=self._next_active_screen_idx[display_idx], display_idx=display_idx)
-                    self._next_active_screen_idx[display_idx] = self._IDX_NOT_SET
+                    cur_playing = None
+                    cur_weight = None
 
             else:
 
-                cur_playing = 0
-                req_playing = 0
-                cur_weight = 0
-                req_weight = 0
                 force_non_smooth_rotation = False
 
+                # Next screen in the rotation, unchanged for the rest of this tick
                 next_active_screen_idx = self._get_next_idx(display_idx=display_idx)
-                req_playing = self._screens[display_idx][next_active_screen_idx].get_valid_windows()
-                req_weight = self._screens[display_idx][next_active_screen_idx].get_weight(playing_only=False)
+                req_playing = screens[next_active_screen_idx].get_valid_windows()
+                req_weight = screens[next_active_screen_idx].get_weight(playing_only=False)
 
-                for dis_idx in range(GLOBALS.NUM_DISPLAYS):
-                    for screen in self._screens[dis_idx]:
-                        cur_playing += screen.get_playing_windows()
-                        cur_weight += screen.get_weight(playing_only=True)
+                if cur_playing is None:
+                    cur_playing = sum(screen.get_playing_windows() for screen in self._screens_flat)
+                    cur_weight = sum(screen.get_weight(playing_only=True) for screen in self._screens_flat)
 
                 # The hardware can only handle a limited amount of decoders/players
                 if cur_playing + req_playing > CONSTANTS.MAX_DECODER_STREAMS and cur_playing > 0:
@@ -1135,11 +1274,10 @@ class ScreenManager(object):
 
                 # Can we handle a new smooth screen-rotation?
                 if force_non_smooth_rotation and \
-                        self._next_active_screen_idx[display_idx] == self._IDX_NOT_SET or \
+                        display.next_active_screen_idx == self._IDX_NOT_SET or \
                         CONFIG.CHANGE_OVER == CHANGEOVER.NORMAL:
 
-                    if time.monotonic() > self._timer_last_screenchange[display_idx] + \
-                            self._screens[display_idx][self._active_screen_idx[display_idx]].displaytime:
+                    if now > display.timer_last_screenchange + displaytime:
 
                         if force_non_smooth_rotation:
                             LOG.WARNING(self._MODULE,
@@ -1150,58 +1288,48 @@ class ScreenManager(object):
                         else:
                             LOG.INFO(self._MODULE, "non-smooth screen-rotation for display '%i'" % (display_idx + 1))
 
-                        BackGroundManager.show_icon(BackGround.LOADING, display_idx=display_idx)
+                        self._ensure_icon(BackGround.LOADING, display_idx)
 
-                        self.stop_screen(screen_idx=self._active_screen_idx[display_idx], display_idx=display_idx)
+                        self._stop_one(display.active_screen_idx, display_idx)
 
-                        if self._next_active_screen_idx[display_idx] != next_active_screen_idx:
+                        if display.next_active_screen_idx != next_active_screen_idx:
                             self.start_screen(screen_idx=next_active_screen_idx, visible=True, display_idx=display_idx)
                             return
 
                 else:
 
                     # Time to start pre-buffering the next active window?
-                    if time.monotonic() > self._timer_last_screenchange[display_idx] + \
-                            self._screens[display_idx][self._active_screen_idx[display_idx]].displaytime - \
-                            CONFIG.PLAYTIMEOUT_SEC:
+                    if now > display.timer_last_screenchange + displaytime - CONFIG.PLAYTIMEOUT_SEC:
 
-                        next_active_screen_idx = self._get_next_idx(display_idx=display_idx)
-
-                        if self._next_active_screen_idx[display_idx] != next_active_screen_idx:
+                        if display.next_active_screen_idx != next_active_screen_idx:
                             self.start_screen(screen_idx=next_active_screen_idx, visible=False, display_idx=display_idx)
                             return
 
                     # Next active screen pre-buffering in background?
-                    if self._next_active_screen_idx[display_idx] != self._IDX_NOT_SET and \
-                            self._next_active_screen_idx[display_idx] != self._active_screen_idx[display_idx]:
+                    if display.next_active_screen_idx != self._IDX_NOT_SET and \
+                            display.next_active_screen_idx != display.active_screen_idx:
 
                         # Time to switchover to the next active screen?
-                        if (time.monotonic() > (self._timer_last_screenchange[display_idx] +
-                                self._screens[display_idx][self._active_screen_idx[display_idx]].displaytime)):
-
-                            # Make new screen active
-                            self._screen_rotate_next_active(display_idx=display_idx)
+                        if now > display.timer_last_screenchange + displaytime:
 
-                            # Stop all streams from the old screen
-                            self.stop_screen(screen_idx=self._prev_screen_idx[display_idx], display_idx=display_idx)
+                            # Make new screen active, stops all streams from the old screen afterwards
+                            self._defer(display_idx, self._screen_rotate_next_active(display_idx=display_idx))
                             return
 
             # Refresh complete screen if configured so
             if CONFIG.REFRESHTIME_MINUTES and rotation_paused:
-                if self._screens[display_idx][self._active_screen_idx[display_idx]].get_max_playtime() > \
-                        CONFIG.REFRESHTIME_MINUTES * 60:
+                if active_screen.get_max_playtime() > CONFIG.REFRESHTIME_MINUTES * 60:
 
                     LOG.INFO(self._MODULE, "refreshing screen as defined in configuration")
 
-                    BackGroundManager.show_icon(BackGround.LOADING, display_idx=display_idx)
+                    self._ensure_icon(BackGround.LOADING, display_idx)
 
-                    self.refresh_screen(screen_idx=self._active_screen_idx[display_idx], display_idx=display_idx)
+                    self.refresh_screen(screen_idx=display.active_screen_idx, display_idx=display_idx)
                     return
 
             # Stream watchdog attempts to restart broken streams
-            if time.monotonic() > self._timer_last_watchdog[display_idx] + CONFIG.STREAM_WATCHDOG_SEC and \
-                    (rotation_paused or time.monotonic() < self._timer_last_screenchange[display_idx] +
-                     self._screens[display_idx][self._active_screen_idx[display_idx]].displaytime - 10):
+            if now > display.timer_last_watchdog + CONFIG.STREAM_WATCHDOG_SEC and \
+                    (rotation_paused or now < display.timer_last_screenchange + displaytime - 10):
 
                 LOG.DEBUG(self._MODULE, "stream/player health checking for display number '%i'" % (display_idx + 1))
 
@@ -1209,11 +1337,85 @@ class ScreenManager(object):
                 self._monitor_players()
 
                 # Monitor streams = restart broken streams
-                self._screens[display_idx][self._active_screen_idx[display_idx]].monitor_streams()
+                active_screen.monitor_streams()
 
-                self._timer_last_watchdog[display_idx] = time.monotonic()
+                display.timer_last_watchdog = now
                 return
         
+    def get_idle_time(self):
+        """
+        Time in seconds the worker loop can sleep until do_work() has something to do.
+        Deadlines are taken from the display timers, states followed by polling use the worker tick
+        """
+
+        # Same order as do_work(), a pending action waits until the players are initialized
+        if self._players_initializing():
+            return CONSTANTS.WORKER_TICK_SEC
+
+        if self._pending_action and not self._deferred_pending():
+            return 0
+
+        now = time.monotonic()
+        deadline = now + CONSTANTS.WORKER_IDLE_MAX_SEC
+
+        for display_idx in range(GLOBALS.NUM_DISPLAYS):
+            display = self._displays[display_idx]
+            screens = display.screens
+
+            if len(screens) <= 0:
+                continue
+
+            if display.active_screen_idx == self._IDX_NOT_SET:
+                return 0
+
+            if display.deferred_steps:
+                deadline = min(deadline, display.deferred_time)
+                continue
+
+            active_screen = screens[display.active_screen_idx]
+            displaytime = active_screen.displaytime
+            default_paused = displaytime == 0 or len(screens) <= 1
+            rotation_paused = default_paused or display.paused
+            active_icon = BackGroundManager.active_icon[display_idx]
+
+            # Overlays following the player or pause state
+            if active_icon == BackGround.LOADING or (active_icon == BackGround.PAUSED and not display.paused) or \
+                    (rotation_paused and not default_paused and not active_icon):
+                return CONSTANTS.WORKER_TICK_SEC
+
+            # Timed overlays, the 'PAUSED' overlay is kept until unpaused
+            if display.timer_hide_icon and active_icon != BackGround.PAUSED:
+                deadline = min(deadline, display.timer_hide_icon)
+
+            timer_screenchange = display.timer_last_screenchange + displaytime
+            timer_watchdog = display.timer_last_watchdog + CONFIG.STREAM_WATCHDOG_SEC
+
+            if rotation_paused:
+                if (display.next_active_screen_idx != self._IDX_NOT_SET and
+                        display.next_active_screen_idx != display.active_screen_idx):
+                    return 0
+
+                if CONFIG.REFRESHTIME_MINUTES:
+                    deadline = min(deadline, now + CONFIG.REFRESHTIME_MINUTES * 60 - active_screen.get_max_playtime())
+
+            else:
+                if now > timer_screenchange:
+                    return CONSTANTS.WORKER_TICK_SEC
+
+                deadline = min(deadline, timer_screenchange)
+
+                # Time to start pre-buffering the next active screen
+                timer_prebuffer = timer_screenchange - CONFIG.PLAYTIMEOUT_SEC
+                if timer_prebuffer > now:
+                    deadline = min(deadline, timer_prebuffer)
+
+            # The watchdog is held off during the last 10 seconds before a screen change
+            if rotation_paused or now < timer_screenchange - 10:
+                deadline = min(deadline, timer_watchdog)
+
+        # Expired deadlines are handled within one worker tick, like before
+        return max(CONSTANTS.WORKER_TICK_SEC, deadline - now)
+
     def _parse_config(self):
         """
         Parse screen settings from config file and buildup windows.
@@ -1221,15 +1423,28 @@ class ScreenManager(object):
         each window can contain multiple video streams (i.e. main and substream)
         """
 
-        # Parse screen configuration
-        for scrn_num in range(1, CONSTANTS.MAX_SCREENS + 1):
+        # Only visit the screen sections present in the config file, in screen number order
+        screen_nums = []
 
-            if not CONFIG.has_section(str("SCREEN%i" % scrn_num)):
+        for section in CONFIG.get_sections():
+            if not section.startswith("SCREEN") or not section[6:].isdigit():
                 continue
-            
-            layout       = CONFIG.read_setting_default_int(str("SCREEN%i" % scrn_num), "layout",        LAYOUT._1X1)
-            displaytime  = CONFIG.read_setting_default_int(str("SCREEN%i" % scrn_num), "displaytime",   CONFIG.SHOWTIME)
-            display_num  = CONFIG.read_setting_default_int(str("SCREEN%i" % scrn_num), "display",       1)  # 1 = Default HDMI port
+
+            scrn_num = int(section[6:])
+
+            if section == str("SCREEN%i" % scrn_num) and 1 <= scrn_num <= CONSTANTS.MAX_SCREENS:
+                screen_nums.append(scrn_num)
+
+        # Parse screen configuration
+        screen_configs = []
+
+        for scrn_num in sorted(screen_nums):
+
+            screen_section = str("SCREEN%i" % scrn_num)
+
+            layout       = CONFIG.read_setting_default_int(screen_section, "layout",        LAYOUT._1X1)
+            displaytime  = CONFIG.read_setting_default_int(screen_section, "displaytime",   CONFIG.SHOWTIME)
+            display_num  = CONFIG.read_setting_default_int(screen_section, "display",       1)  # 1 = Default HDMI port
 
             if display_num == 0:
                 continue
@@ -1239,23 +1454,44 @@ class ScreenManager(object):
                 LOG.WARNING(self._MODULE, "Configuration for multiple displays found, but hardware does "
                                           "only support one display. Forcing every screen to the first display...")
                 display_num = 1
-                
+
+            screen_configs.append((scrn_num, layout, displaytime, display_num))
+
+        # Probe the streams of all screens at once, the screens then find them in the stream cache
+        stream_urls = []
+
+        for scrn_num, layout, _, _ in screen_configs:
+            window_count = layout if layout in _LAYOUTS else LAYOUT._1X1
+
+            for window_channel in Screen.parse_channels(scrn_num - 1, window_count):
+                if window_channel is not None:
+                    stream_urls.extend(window_channel[0])
+
+        StreamInfo.prefetch(stream_urls)
+
+        for scrn_num, layout, displaytime, display_num in screen_configs:
+
             # Initialize screen object and buildup windows
-            screen = Screen(layout=layout, displaytime=displaytime, screen_idx=scrn_num-1, display_idx=display_num-1)
+            screen = Screen(layout=layout, displaytime=displaytime, screen_idx=scrn_num-1, display_idx=display_num-1,
+                            initializing_callback=self._on_screen_initializing)
 
             LOG.INFO(self._MODULE, "added screen number '%i' to display '%i' with layout '%i' and displaytime '%i'" %
                      (scrn_num, display_num, layout, displaytime))
 
-            self._screens[display_num - 1].append(screen)
+            self._displays[display_num - 1].screens.append(screen)
+            self._screens_flat.append(screen)
 
             BackGroundManager.add_background(window_count=screen.layout, display_idx=display_num-1)
 
         # Add backgrounds and icons based on the parsed screen configuration
         for display_idx in range(GLOBALS.NUM_DISPLAYS):
+            display = self._displays[display_idx]
 
-            if len(self._screens[display_idx]) <= 0:
+            if len(display.screens) <= 0:
                 continue
 
+            display.build_rotation()
+
             # 1x1 always required as the user can 'zoom in' a window
             BackGroundManager.add_background(window_count=1, display_idx=display_idx)
 
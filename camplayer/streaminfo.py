@@ -2,7 +2,12 @@
 
 import os
 import json
+import fcntl
 import subprocess
+import threading
+import functools
+
+from concurrent.futures import ThreadPoolExecutor
 
 from urllib.parse import urlparse, urlunparse
 from utils.logger import LOG
@@ -10,19 +15,32 @@ from utils.settings import CONFIG, HEVCMODE
 from utils.constants import CONSTANTS
 from utils.globals import GLOBALS
 
+# Supported stream url schemes
+_VALID_SCHEMES = ('rtsp://', 'http://', 'https://', 'file://')
+
+# ffprobe errors which won't be solved by retrying over UDP,
+# full status texts as the error output also contains the url, e.g. '/Streaming/Channels/401'
+_NO_RETRY_ERRORS = ('401 Unauthorized', '403 Forbidden', '404 Not Found',
+                    'Name or service not known', 'Connection refused')
+
 
 class StreamInfo(object):
 
     _LOG_NAME = "StreamInfo"
 
-    def __init__(self, stream_url):
+    # Stream details of the cache file, shared by all streams, see '_load_cache'
+    _cache          = {}    # Printable url -> stream details
+    _cache_loaded   = False
+    _cache_lock     = threading.Lock()
+
+    # Printable urls of the streams which failed to probe, they are not probed again this session
+    _failed         = set()
 
-        # Make absolute paths from relative ones
-        if stream_url.startswith('file://.'):
-            stream_url = "file://" + os.path.abspath(stream_url.lstrip('file:/'))
+    def __init__(self, stream_url):
 
-        self.url                    = stream_url
-        self._cache_file            = CONSTANTS.CACHE_DIR + "streaminfo"
+        self.url                    = self._absolute_url(stream_url)
+        self._printable_url         = self._strip_credentials(self.url)
+        self.valid_url              = self._is_valid_url(self.url)
         self.codec_name             = ""
         self.height                 = 0
         self.width                  = 0
@@ -31,7 +49,6 @@ class StreamInfo(object):
         self.force_udp              = False
         self._parse_stream_details()
 
-        self.valid_url              = self._is_url_valid()
         self.valid_video_windowed   = self._is_video_valid(windowed=True)
         self.valid_video_fullscreen = self._is_video_valid(windowed=False)
         self.weight                 = self._calculate_weight()
@@ -39,16 +56,32 @@ class StreamInfo(object):
 
         LOG.INFO(self._LOG_NAME, "stream properties '%s', resolution '%ix%i@%i', codec '%s', "
                               "calculated weight '%i', valid url '%i', has audio '%s', "
-                              "valid video 'windowed %i fullscreen %i', force UDP '%s'" % (
+                              "valid video 'windowed %i fullscreen %i', force UDP '%s'",
                                 self.printable_url(), self.width, self.height, self.framerate,
                                 self.codec_name, self.weight, self.valid_url, self.has_audio,
-                                self.valid_video_windowed, self.valid_video_fullscreen, self.force_udp))
+                                self.valid_video_windowed, self.valid_video_fullscreen, self.force_udp)
         LOG.INFO(self._LOG_NAME, "RUN 'camplayer --rebuild-cache' IF THIS STREAM INFORMATION IS OUT OF DATE!!")
 
     def printable_url(self):
         """Returns streaming url without readable username and password"""
 
-        parsed = urlparse(self.url)
+        return self._printable_url
+
+    @staticmethod
+    def _absolute_url(url):
+        """Make absolute paths from relative ones"""
+
+        if url.startswith('file://.'):
+            return "file://" + os.path.abspath(url.lstrip('file:/'))
+
+        return url
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _strip_credentials(url):
+        """Strip the username and password from the streaming url"""
+
+        parsed = urlparse(url)
 
         if parsed.username or parsed.password:
             parsed = parsed._replace(netloc=str("xxx:yyy@%s:%s" % (parsed.hostname, parsed.port)))
@@ -68,26 +101,22 @@ class StreamInfo(object):
         # OMXplayer plays at min 10FPS
         return self.width * self.height * max(self.framerate, 10)
 
-    def _is_url_valid(self):
+    @staticmethod
+    def _is_valid_url(url):
         """True when url format is valid"""
-        
-        if (self.url.startswith('rtsp://') or
-                self.url.startswith('http://') or
-                self.url.startswith('https://') or
-                self.url.startswith('file://')):
-            return True
-        return False
+
+        return url.startswith(_VALID_SCHEMES)
         
     def _is_video_valid(self, windowed=True):
         """True when the video format is valid for pi hardware"""
 
         # Model 4 SoC does not support hardware MPEG2 decoding anymore
-        omx_mpeg2_support = not "4B" in GLOBALS.PI_MODEL
+        omx_mpeg2_support = not GLOBALS.PI_MODEL_4B
 
         if CONFIG.HEVC_MODE == HEVCMODE.AUTO:
 
             # Model 4 SoC supports hardware HEVC decoding with VLC
-            if "4B" in GLOBALS.PI_MODEL:
+            if GLOBALS.PI_MODEL_4B:
                 CONFIG.HEVC_MODE = HEVCMODE.UHD
 
             # Model 3+ SoC should be able to decode FHD HEVC in software with VLC
@@ -131,111 +160,247 @@ class StreamInfo(object):
     def _parse_stream_details(self):
         """Read stream details from cache file or parse stream directly"""
         
-        if not self._is_url_valid():
+        if not self.valid_url:
             return
 
-        parsed_ok = False
-        video_found = False
-        
-        if os.path.isfile(self._cache_file):
-            with open(self._cache_file, 'r') as stream_file:
-                data = json.load(stream_file)
-                
-                if self.printable_url() in data.keys():
-                    stream_props        = data.get(self.printable_url())
-                    self.codec_name     = stream_props.get('codec_name')
-                    self.height         = stream_props.get('height')
-                    self.width          = stream_props.get('width')
-                    self.framerate      = stream_props.get('framerate')
-                    self.has_audio      = stream_props.get('audio')
-                    self.force_udp      = stream_props.get('force_udp')
-                    parsed_ok = True
-
-        if not parsed_ok:
-            for i in range(2):
-
-                # Most cameras are using TCP, so test for TCP first. If that fails, test with UDP.
-                transport = 'udp' if i > 0 else 'tcp'
+        stream_props = self._load_cache().get(self.printable_url())
 
-                try:
-                    ffprobe_args = ['ffprobe', '-v', 'error', '-show_entries',
-                                    'stream=codec_type,height,width,codec_name,bit_rate,max_bit_rate,avg_frame_rate',
-                                    self.url]
-
-                    if self.url.startswith('rtsp://'):
-                        ffprobe_args.extend(['-rtsp_transport', transport])
-
-                    # Invoke ffprobe, 20s timeout required for pi zero
-                    streams = subprocess.check_output(ffprobe_args, universal_newlines=True, timeout=10,
-                                                      stderr=subprocess.STDOUT).split("[STREAM]")
-
-                    for stream in streams:
-                        streamprops = stream.split()
-
-                        if "codec_type=video" in stream and not video_found:
-                            video_found = True
-
-                            for streamproperty in streamprops:
-                                if "codec_name" in streamproperty:
-                                    self.codec_name = streamproperty.split("=")[1]
-                                if "height" in streamproperty:
-                                    self.height = int(streamproperty.split("=")[1])
-                                if "width" in streamproperty:
-                                    self.width = int(streamproperty.split("=")[1])
-                                if "avg_frame_rate" in streamproperty:
-                                    try:
-                                        framerate = streamproperty.split("=")[1]
-
-                                        # ffprobe returns framerate as fraction,
-                                        # a zero division exception is therefore possible
-                                        self.framerate = int(
-                                            framerate.split("/")[0])/int(framerate.split("/")[1])
-                                    except Exception:
-                                        self.framerate = 0
-
-                        elif "codec_type=audio" in stream and not self.has_audio:
-                            self.has_audio = True
-
-                    if video_found:
-                        try:
-                            self.force_udp = True if transport == 'udp' else False
-                            self._write_stream_details()
-                            break
+        if stream_props is None:
+
+            # Already failed by 'prefetch' or another window with this stream
+            if self.printable_url() in self._failed:
+                return
+
+            stream_props = self._probe_stream(self.url)
+
+            if stream_props is None:
+                self._failed.add(self.printable_url())
+                return
 
-                        # TODO: filter read-only exception
+            self._set_stream_details(stream_props)
+
+            try:
+                self._write_stream_details()
+
+            # TODO: filter read-only exception
+            except Exception:
+                LOG.ERROR(self._LOG_NAME, "writing ffprobe results to file failed, read only?")
+
+        else:
+            self._set_stream_details(stream_props)
+
+    def _set_stream_details(self, stream_props):
+        """Set stream details from the cache file format"""
+
+        self.codec_name     = stream_props.get('codec_name')
+        self.height         = stream_props.get('height')
+        self.width          = stream_props.get('width')
+        self.framerate      = stream_props.get('framerate')
+        self.has_audio      = stream_props.get('audio')
+        self.force_udp      = stream_props.get('force_udp')
+
+    @classmethod
+    def _probe_stream(cls, url):
+        """Parse stream details with ffprobe, returns them in the cache file format or None on failure"""
+
+        codec_name = ""
+        height = 0
+        width = 0
+        framerate = 0
+        has_audio = False
+
+        for i in range(2):
+
+            # Most cameras are using TCP, so test for TCP first. If that fails, test with UDP.
+            transport = 'udp' if i > 0 else 'tcp'
+            video_found = False
+
+            try:
+                ffprobe_args = ['ffprobe', '-v', 'error', '-print_format', 'json', '-show_entries',
+                                'stream=codec_type,height,width,codec_name,bit_rate,max_bit_rate,avg_frame_rate',
+                                url]
+
+                if url.startswith('rtsp://'):
+                    ffprobe_args.extend(['-rtsp_transport', transport])
+
+                # Invoke ffprobe, 20s timeout required for pi zero
+                # Error messages on stderr would break the json output, so keep them separately
+                streams = json.loads(subprocess.check_output(ffprobe_args, universal_newlines=True, timeout=10,
+                                                             stderr=subprocess.PIPE)).get("streams", [])
+
+                for stream in streams:
+                    codec_type = stream.get("codec_type")
+
+                    if codec_type == "video" and not video_found:
+                        video_found = True
+
+                        codec_name = stream.get("codec_name", "")
+                        height = stream.get("height", 0)
+                        width = stream.get("width", 0)
+
+                        try:
+                            # ffprobe returns framerate as fraction,
+                            # a zero division exception is therefore possible
+                            numerator, denominator = stream.get("avg_frame_rate", "").split("/")
+                            framerate = int(numerator)/int(denominator)
                         except Exception:
-                            LOG.ERROR(self._LOG_NAME, "writing ffprobe results to file failed, read only?")
+                            framerate = 0
+
+                    elif codec_type == "audio" and not has_audio:
+                        has_audio = True
+
+                    # Remaining streams can't change anything
+                    if video_found and has_audio:
+                        break
+
+                if video_found:
+                    return {
+                        'codec_name'    : codec_name,
+                        'height'        : height,
+                        'width'         : width,
+                        'framerate'     : framerate,
+                        'audio'         : has_audio,
+                        'force_udp'     : transport == 'udp',
+                    }
 
-                # TODO: logging exceptions can spawn credentials??
-                except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as ex:
-                    if i > 0:
-                        LOG.ERROR(self._LOG_NAME, "ffprobe exception: %s" % str(ex))
+            # TODO: logging exceptions can spawn credentials??
+            except (subprocess.CalledProcessError, subprocess.TimeoutExpired, ValueError) as ex:
+
+                # Only RTSP streams have a transport to retry with,
+                # and retrying is pointless on authentication, not found, DNS or connection errors
+                stderr = (ex.stderr or "") if isinstance(ex, subprocess.CalledProcessError) else ""
+                no_retry = not url.startswith('rtsp://') or any(error in stderr for error in _NO_RETRY_ERRORS)
+
+                if i > 0 or no_retry:
+                    LOG.ERROR(cls._LOG_NAME, "ffprobe exception: %s" % str(ex))
+
+                if no_retry:
+                    break
+
+        return None
+
+    @classmethod
+    def prefetch(cls, stream_urls):
+        """
+        Probe all streams missing in the cache file at once, so the
+        StreamInfo objects created afterwards find them in the cache file
+        """
+
+        cache = cls._load_cache()
+
+        # Printable url -> url of the streams to probe
+        missing = {}
+
+        for url in stream_urls:
+            if not url:
+                continue
+
+            url = cls._absolute_url(url)
+            printable_url = cls._strip_credentials(url)
+
+            if printable_url in cache or printable_url in missing or printable_url in cls._failed or \
+                    not cls._is_valid_url(url):
+                continue
+
+            missing[printable_url] = url
+
+        if not missing:
+            return
+
+        LOG.INFO(cls._LOG_NAME, "probing '%i' streams missing in the stream cache" % len(missing))
+
+        # ffprobe mostly waits on the network, so probe the streams concurrently
+        with ThreadPoolExecutor(max_workers=min(8, len(missing))) as executor:
+            results = dict(zip(missing.keys(), executor.map(cls._probe_stream, missing.values())))
+
+        cls._failed.update(printable_url for printable_url, props in results.items() if props is None)
+
+        results = {printable_url: props for printable_url, props in results.items() if props is not None}
+
+        if not results:
+            return
+
+        cache.update(results)
+
+        try:
+            cls._save_cache()
+
+        # TODO: filter read-only exception
+        except Exception:
+            LOG.ERROR(cls._LOG_NAME, "writing ffprobe results to file failed, read only?")
+
+    @classmethod
+    def _load_cache(cls):
+        """Get the stream details of the cache file, the file is only read once"""
+
+        with cls._cache_lock:
+            if not cls._cache_loaded:
+                cache_file = CONSTANTS.CACHE_DIR + "streaminfo"
+
+                if os.path.isfile(cache_file):
+                    try:
+                        with open(cache_file, 'r') as stream_file:
+                            cls._cache = json.load(stream_file)
+                    except ValueError:
+                        LOG.ERROR(cls._LOG_NAME, "stream cache file corrupt, ignoring its content")
+                        cls._cache = {}
+
+                cls._cache_loaded = True
+
+            return cls._cache
+
+    @classmethod
+    def _save_cache(cls):
+        """Write the stream details to the cache file"""
+
+        cache_file = CONSTANTS.CACHE_DIR + "streaminfo"
+
+        with cls._cache_lock:
+
+            # Create folder if not exist
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+
+            # Lock out other camplayer instances for the whole read-modify-write
+            with open(cache_file + ".lock", 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+                # Keep stream details written by others in the meantime
+                try:
+                    with open(cache_file, 'r') as stream_file:
+                        cache = json.load(stream_file)
+                        cache.update(cls._cache)
+                        cls._cache = cache
+                except (OSError, ValueError):
+                    pass
+
+                # Write to a temporary file first, a crash can't leave a corrupt cache file this way
+                with open(cache_file + ".tmp", 'w') as stream_file:
+                    json.dump(cls._cache, stream_file, indent=4)
+
+                os.replace(cache_file + ".tmp", cache_file)
+
+    @classmethod
+    def clear_cache(cls):
+        """Forget about the stream details, call when the cache directory is cleared"""
+
+        with cls._cache_lock:
+            cls._cache = {}
+            cls._cache_loaded = False
+            cls._failed = set()
 
     def _write_stream_details(self):
         """Write stream details to cache file"""
         
-        if not self._is_url_valid():
+        if not self.valid_url:
             return
             
-        data = {self.printable_url(): {
+        self._load_cache()[self.printable_url()] = {
             'codec_name'    : self.codec_name,
             'height'        : self.height,
             'width'         : self.width,
             'framerate'     : self.framerate,
             'audio'         : self.has_audio,
             'force_udp'     : self.force_udp,
-        }}
-
-        # Read stream details file and append our new data
-        if os.path.isfile(self._cache_file):
-            with open(self._cache_file) as stream_file:
-                cur_data = json.load(stream_file)
-                data.update(cur_data)
-
-        # Create folder if not exist
-        if not os.path.isdir(os.path.dirname(self._cache_file)):
-            os.system("mkdir -p %s" % os.path.dirname(self._cache_file))
+        }
 
-        # Write stream details to file
-        with open(self._cache_file, 'w+') as stream_file:
-            json.dump(data, stream_file, indent=4)
+        self._save_cache()
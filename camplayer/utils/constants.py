@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 
 import os
+import types
 
 
 class CONSTANTS(object):
@@ -18,6 +19,9 @@ class CONSTANTS(object):
     MAX_DECODER_STREAMS     = 16                                                # OMXplayer hard limit
     DBUS_TIMEOUT_MS         = 1000                                              # Timeout for dbus-send commands
     DBUS_RETRIES            = 5                                                 # Max dbus-send retries
+    STREAM_MONITOR_MIN_SEC  = 1                                                 # Min interval between stream checks of a screen
+    WORKER_TICK_SEC         = 0.1                                               # Worker loop interval while polling player states
+    WORKER_IDLE_MAX_SEC     = 1                                                 # Max worker loop sleep time when idle
     LOG_LINE_LEN            = 170                                               # Logger line length in characters
     PYTHON_VER_MIN          =  (3, 7)                                           # Minimum required Python version
     MIN_GPU_MEM             = 256                                               # Mininum required GPU memory split
@@ -48,8 +52,8 @@ class KEYCODE(object):
     KEY_KPENTER             = 96
     KEY_SPACE               = 57
 
-    KEY_NUM = {
-    # Key = scancode, value = number
+    KEY_NUM = types.MappingProxyType({
+    # Key = scancode, value = number, read-only
 
         # Numeric codes
         2: 1,
@@ -74,4 +78,7 @@ class KEYCODE(object):
         72: 8,
         73: 9,
         82: 0,
-    }
\ No newline at end of file
+    })
+
+    # Scancode indexed lookup of KEY_NUM, -1 for non numeric keys below scancode 128
+    KEY_NUM_ARR = tuple(map(KEY_NUM.get, range(128), (-1,) * 128))
\ No newline at end of file
@@ -8,6 +8,7 @@ class GLOBALS(object):
     NUM_DISPLAYS            = 2
     PI_SOC                  = 0
     PI_MODEL                = 0
+    PI_MODEL_4B             = False
     PI_SOC_HEVC             = False
     PYTHON_VER              = (0, 0)
     USERNAME                = ""
\ No newline at end of file
@@ -1,22 +1,36 @@
 #!/usr/bin/python3
 
+import os
 import time
+import selectors
 import threading
+import ctypes
 
 import evdev
 import queue
 
+# inotify flags, see 'man inotify'
+_IN_ATTRIB      = 0x00000004
+_IN_CREATE      = 0x00000100
+_IN_DELETE      = 0x00000200
+_IN_NONBLOCK    = os.O_NONBLOCK
+_IN_CLOEXEC     = os.O_CLOEXEC
+
+_INPUT_DIR      = b"/dev/input"
+
 
 class InputMonitor(object):
 
     def __init__(self, event_type=['release', 'press', 'hold'], scan_interval=2500):
         self._devices = []
         self._event_queue = queue.Queue(maxsize=10)
+        self._event_available = threading.Event()
         self._scan_interval = scan_interval / 1000
         self._event_up = True if 'release' in event_type else False
         self._event_down = True if 'press' in event_type else False
         self._event_hold = True if 'hold' in event_type else False
         self._running = True
+        self._selector = selectors.DefaultSelector()
         self._monitor_thread = threading.Thread(target=self._monitor, daemon=True).start()
         
     def destroy(self):
@@ -24,63 +38,134 @@ class InputMonitor(object):
 
         self._running = False
 
+    def wait_events(self, timeout=None):
+        """Block until keyboard events are queued or the timeout expires, True when events are available"""
+
+        return self._event_available.wait(timeout)
+
     def get_events(self):
         """Get queued keyboard events"""
 
-        events = []
-        while not self._event_queue.empty():
-            event = self._event_queue.get_nowait()
-            self._event_queue.task_done()
-            events.append(event)
-            
+        self._event_available.clear()
+
+        # Swap out all queued events at once, nobody joins or blocks on this queue
+        with self._event_queue.mutex:
+            events = list(self._event_queue.queue)
+            self._event_queue.queue.clear()
+
         return events
 
     def _scan_devices(self):
         """Scan for input devices"""
 
-        return [evdev.InputDevice(path) for path in evdev.list_devices()]
+        devices = []
+
+        for path in evdev.list_devices():
+            try:
+                devices.append(evdev.InputDevice(path))
+            except OSError:
+                # Just created and no permissions yet, rescanned again on its attribute change
+                pass
+
+        return devices
+
+    def _close_devices(self):
+        """Close all input devices"""
+
+        for device in self._devices:
+            try:
+                device.close()
+            except:
+                pass
+
+        self._devices = []
+
+    def _inotify_open(self):
+        """Watch the input device directory for added/removed devices, returns the inotify fd or -1"""
+
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+            if fd < 0:
+                return -1
+
+            if libc.inotify_add_watch(fd, _INPUT_DIR, _IN_CREATE | _IN_DELETE | _IN_ATTRIB) < 0:
+                os.close(fd)
+                return -1
+
+            return fd
+
+        except (OSError, AttributeError):
+            return -1
 
     def _monitor(self):
         """Key monitoring thread"""
 
+        # Rescan only when devices are added or removed,
+        # fall back on scanning every 'scan_interval' without inotify
+        inotify_fd = self._inotify_open()
+        if inotify_fd >= 0:
+            self._selector.register(inotify_fd, selectors.EVENT_READ)
+
+        rescan = True
         last_scan_time = -self._scan_interval
-        
+
+        # Loop invariants, key event values: 0 = release, 1 = press, 2 = hold
+        ev_key = evdev.ecodes.EV_KEY
+        key_values = frozenset(value for value, enabled in enumerate(
+            (self._event_up, self._event_down, self._event_hold)) if enabled)
+        queue_put = self._event_queue.put_nowait
+        event_set = self._event_available.set
+
         while self._running and threading.main_thread().is_alive():
 
-            if time.monotonic() > last_scan_time + self._scan_interval:
+            if rescan or (inotify_fd < 0 and time.monotonic() > last_scan_time + self._scan_interval):
+                for device in self._devices:
+                    self._selector.unregister(device)
+
+                self._close_devices()
                 self._devices = self._scan_devices()
+
+                for device in self._devices:
+                    self._selector.register(device, selectors.EVENT_READ)
+
                 last_scan_time = time.monotonic()
+                rescan = False
 
-            # TODO fix
-            # Somehow evdev misses button presses in its own loop
-            # Looping faster than the expected time between button presses, hides this issue...
-            # https://github.com/gvalkov/python-evdev/issues/101
-            time.sleep(0.025)
+            # Block until input events or device changes are available,
+            # the timeout is only there to end this thread in time and for the periodic rescan
+            timeout = 0.25
+            if inotify_fd < 0:
+                timeout = max(0, min(timeout, last_scan_time + self._scan_interval - time.monotonic()))
+
+            for key, _ in self._selector.select(timeout=timeout):
+
+                if key.fileobj == inotify_fd:
+                    try:
+                        while os.read(inotify_fd, 4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+
+                    rescan = True
+                    continue
 
-            for device in self._devices:
                 try:
-                    while True:
-                        event = device.read_one()
-                        if event:
-                            if event.type == evdev.ecodes.EV_KEY:
-                                if self._event_up and event.value == 0:
-                                    self._event_queue.put_nowait(event)
-                                elif self._event_down and event.value == 1:
-                                    self._event_queue.put_nowait(event)
-                                elif self._event_hold and event.value == 2:
-                                    self._event_queue.put_nowait(event)
-                            del event
-                        else:
-                            break
+                    for event in key.fileobj.read():
+                        if event.type == ev_key and event.value in key_values:
+                            queue_put(event)
+                            event_set()
                 except BlockingIOError:
                     pass
                 except OSError:
-                    pass
+                    # Device removed
+                    rescan = True
                 except queue.Full:
                     pass
 
-        for device in self._devices:
-            try:
-                device.close()
-            except:
-                pass
+        self._close_devices()
+        self._selector.close()
+
+        if inotify_fd >= 0:
+            os.close(inotify_fd)
@@ -1,6 +1,6 @@
 #!/usr/bin/python3
 
-import datetime
+import time
 from enum import IntEnum
 from enum import unique
 
@@ -8,6 +8,11 @@ from .settings import CONFIG
 from .constants import CONSTANTS
 
 
+# Timestamp string of the last logged second, see '_timestamp'
+_ts_sec = 0
+_ts_str = ""
+
+
 @unique
 class LOGLEVEL(IntEnum):
     DEBUG   = 0
@@ -19,19 +24,22 @@ class LOGLEVEL(IntEnum):
 def _split_message(message):
     """Split log message in multiple lines if exceeding MAX_LINE_LEN"""
     
-    if len(message) <= CONSTANTS.LOG_LINE_LEN:
+    line_len = CONSTANTS.LOG_LINE_LEN
+
+    if len(message) <= line_len:
         return [message]
         
-    response = []
-    for i in range(0, len(message), CONSTANTS.LOG_LINE_LEN):
-        response.append(message[i: (i + CONSTANTS.LOG_LINE_LEN)])
-        
-    return response
+    return [message[i: (i + line_len)] for i in range(0, len(message), line_len)]
 
 
 def _output_message(prefix, message):
     """Print log message to console"""
     
+    # Most log messages fit on one line
+    if len(message) <= CONSTANTS.LOG_LINE_LEN:
+        print("%s - %s" % (prefix, message))
+        return
+
     lines = _split_message(message)
     for idx, line in enumerate(lines):
         if idx == 0:
@@ -40,30 +48,49 @@ def _output_message(prefix, message):
             print("%s --> %s" % (prefix, line))
 
 
-def log_message(module, loglevel, message):
+def _timestamp():
+    """Get the log timestamp, only formatted again when the wall-clock second changes"""
+
+    global _ts_sec, _ts_str
+
+    now = time.time()
+    sec = int(now)
+
+    if sec != _ts_sec:
+        _ts_sec = sec
+        _ts_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+
+    return "%s.%06i" % (_ts_str, (now - sec) * 1000000)
+
+
+def log_message(module, loglevel, message, args=()):
     """Format log message with log level and timestamp"""
     
-    _output_message(str("%s - %s - %s" %  (datetime.datetime.now(), module, loglevel.name)), str(message))
+    # Format arguments are only applied when the log level is enabled
+    if args:
+        message = message % args
+
+    _output_message(str("%s - %s - %s" %  (_timestamp(), module, loglevel.name)), str(message))
 
 
 class LOG(object):
 
     @staticmethod
-    def DEBUG(module, message):
+    def DEBUG(module, message, *args):
         if CONFIG.LOG_LEVEL <= LOGLEVEL.DEBUG:
-            log_message(module, LOGLEVEL.DEBUG, message)
+            log_message(module, LOGLEVEL.DEBUG, message, args)
 
     @staticmethod
-    def INFO(module, message):
+    def INFO(module, message, *args):
         if CONFIG.LOG_LEVEL <= LOGLEVEL.INFO:
-            log_message(module, LOGLEVEL.INFO, message)
+            log_message(module, LOGLEVEL.INFO, message, args)
 
     @staticmethod
-    def WARNING(module, message):
+    def WARNING(module, message, *args):
         if CONFIG.LOG_LEVEL <= LOGLEVEL.WARNING:
-            log_message(module, LOGLEVEL.WARNING, message)
+            log_message(module, LOGLEVEL.WARNING, message, args)
 
     @staticmethod
-    def ERROR(module, message):
+    def ERROR(module, message, *args):
         if CONFIG.LOG_LEVEL <= LOGLEVEL.ERROR:
-            log_message(module, LOGLEVEL.ERROR, message)
+            log_message(module, LOGLEVEL.ERROR, message, args)
@@ -2,6 +2,8 @@
 
 import os
 import sys
+import json
+import math
 
 from enum import IntEnum
 from enum import unique
@@ -80,28 +82,108 @@ class CONFIG(object):
                                "Settings file '%s' not found!" % constants.CONSTANTS.CONFIG_PATH)
             sys.exit("No configuration file found")
 
-        # Read config file
-        cls.config.read(constants.CONSTANTS.CONFIG_PATH)
+        # Read config file, the parsed result is cached as long as the file is unchanged
+        cls._read_config(constants.CONSTANTS.CONFIG_PATH)
 
         # Advanced settings, overridable in config file
-        cls.LOG_LEVEL               = cls.read_setting_default_int("ADVANCED", "loglevel",           logger.LOGLEVEL.DEBUG)
-        cls.SCREEN_WIDTH            = cls.read_setting_default_int("ADVANCED", "screenwidth",        0)                         # 0 = Auto detect
-        cls.SCREEN_HEIGHT           = cls.read_setting_default_int("ADVANCED", "screenheight",       0)                         # 0 = Auto detect
-        cls.BUFFERTIME_MS           = cls.read_setting_default_int("ADVANCED", "buffertime",         500)
-        cls.HARDWARE_CHECK          = cls.read_setting_default_int("ADVANCED", "hardwarecheck",      1)
-        cls.CHANGE_OVER             = cls.read_setting_default_int("ADVANCED", "screenchangeover",   CHANGEOVER.PREBUFFER)
-        cls.SHOWTIME                = cls.read_setting_default_int("ADVANCED", "showtime",           10)
-        cls.BACKGROUND_MODE         = cls.read_setting_default_int("ADVANCED", "backgroundmode",     BACKGROUND.DYNAMIC)
-        cls.ENABLE_ICONS            = cls.read_setting_default_int("ADVANCED", "icons",              1)
-        cls.STREAM_WATCHDOG_SEC     = cls.read_setting_default_int("ADVANCED", "streamwatchdog",     15)
-        cls.PLAYTIMEOUT_SEC         = cls.read_setting_default_int("ADVANCED", "playtimeout",        10)
-        cls.STREAM_QUALITY          = cls.read_setting_default_int("ADVANCED", "streamquality",      STREAMQUALITY.AUTO)
-        cls.REFRESHTIME_MINUTES     = cls.read_setting_default_int("ADVANCED", "refreshtime",        60)
-        cls.HEVC_MODE               = cls.read_setting_default_int("ADVANCED", "enablehevc",         HEVCMODE.AUTO)
-        cls.AUDIO_MODE              = cls.read_setting_default_int("ADVANCED", "enableaudio",        AUDIOMODE.OFF)
-        cls.AUDIO_VOLUME            = cls.read_setting_default_int("ADVANCED", "audiovolume",        100)                       # 100%
-        cls.SCREEN_DOWNSCALE        = cls.read_setting_default_int("ADVANCED", "screendownscale",    0)                         # 0%
-        cls.VIDEO_OSD               = cls.read_setting_default_int("ADVANCED", "enablevideoosd",     0)                         # Channel name overlay on video
+        advanced = cls._load_section_int_map("ADVANCED")
+
+        cls.LOG_LEVEL               = cls._pick_int(advanced, "loglevel",           logger.LOGLEVEL.DEBUG)
+        cls.SCREEN_WIDTH            = cls._pick_int(advanced, "screenwidth",        0)                 # 0 = Auto detect
+        cls.SCREEN_HEIGHT           = cls._pick_int(advanced, "screenheight",       0)                 # 0 = Auto detect
+        cls.BUFFERTIME_MS           = cls._pick_int(advanced, "buffertime",         500)
+        cls.HARDWARE_CHECK          = cls._pick_int(advanced, "hardwarecheck",      1)
+        cls.CHANGE_OVER             = cls._pick_int(advanced, "screenchangeover",   CHANGEOVER.PREBUFFER)
+        cls.SHOWTIME                = cls._pick_int(advanced, "showtime",           10)
+        cls.BACKGROUND_MODE         = cls._pick_int(advanced, "backgroundmode",     BACKGROUND.DYNAMIC)
+        cls.ENABLE_ICONS            = cls._pick_int(advanced, "icons",              1)
+        cls.STREAM_WATCHDOG_SEC     = cls._pick_int(advanced, "streamwatchdog",     15)
+        cls.PLAYTIMEOUT_SEC         = cls._pick_int(advanced, "playtimeout",        10)
+        cls.STREAM_QUALITY          = cls._pick_int(advanced, "streamquality",      STREAMQUALITY.AUTO)
+        cls.REFRESHTIME_MINUTES     = cls._pick_int(advanced, "refreshtime",        60)
+        cls.HEVC_MODE               = cls._pick_int(advanced, "enablehevc",         HEVCMODE.AUTO)
+        cls.AUDIO_MODE              = cls._pick_int(advanced, "enableaudio",        AUDIOMODE.OFF)
+        cls.AUDIO_VOLUME            = cls._pick_int(advanced, "audiovolume",        100)               # 100%
+        cls.SCREEN_DOWNSCALE        = cls._pick_int(advanced, "screendownscale",    0)                 # 0%
+        cls.VIDEO_OSD               = cls._pick_int(advanced, "enablevideoosd",     0)                 # Channel name overlay on video
+
+        # OMXplayer volume in millibels, derived from the volume percentage
+        cls.AUDIO_VOLUME_MB         = int(2000 * math.log10(max(cls.AUDIO_VOLUME, 0.001) / 100))
+
+    @classmethod
+    def _read_config(cls, config_path):
+        """Read the config file, or its parsed sections from the cache file when the config file is unchanged"""
+
+        cache_file = constants.CONSTANTS.CACHE_DIR + "config"
+
+        config_stat = os.stat(config_path)
+        config_key = [os.path.abspath(config_path), config_stat.st_mtime_ns, config_stat.st_size]
+
+        try:
+            with open(cache_file, 'r') as config_cache:
+                cached = json.load(config_cache)
+
+            if cached.get('key') == config_key:
+                cls.config.read_dict(cached.get('sections'))
+                return
+
+        except (OSError, ValueError, TypeError, AttributeError):
+            cls.config = ConfigParser()
+
+        cls.config.read(config_path)
+
+        # Section defaults are already merged into the sections themselves
+        sections = {section: dict(cls.config.items(section, raw=True)) for section in cls.config.sections()}
+
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+
+            with open(cache_file + ".tmp", 'w') as config_cache:
+                json.dump({'key': config_key, 'sections': sections}, config_cache)
+
+            os.replace(cache_file + ".tmp", cache_file)
+
+        # Read only filesystem, just parse the config file every time
+        except OSError:
+            pass
+
+    @classmethod
+    def _load_section_int_map(cls, section):
+        """Get all settings of a section as a plain dict, empty dict if section not present"""
+
+        if not cls.config.has_section(section):
+            return {}
+
+        return dict(cls.config.items(section))
+
+    @classmethod
+    def _pick_int(cls, settings, setting, default):
+        """
+        Read integer advanced setting from a '_load_section_int_map' dict.
+        Returns default if setting not present.
+        """
+
+        default = int(default)
+
+        # Missing settings are already resolved
+        if setting not in settings:
+            return default
+
+        try:
+            config_value = int(settings[setting])
+
+            # Save non default advanced settings for logging purpose
+            if config_value != default:
+                cls.advanced_overwritten.append((setting, config_value))
+
+            return config_value
+
+        except ValueError:
+            logger.log_message(cls._LOG_NAME, logger.LOGLEVEL.ERROR,
+                               "failed to parse integer value from setting '%s', "
+                               "using the default" % setting)
+
+            return default
 
     @classmethod
     def get_settings_for_section(cls, section):
@@ -124,6 +206,12 @@ class CONFIG(object):
 
         return cls.config.has_option(section, setting)
 
+    @classmethod
+    def get_sections(cls):
+        """Get all section names of the config file"""
+
+        return cls.config.sections()
+
     @classmethod
     def has_section(cls, section):
         """Section present in config file?"""
@@ -154,12 +242,18 @@ class CONFIG(object):
         Returns default if setting not present.
         """
 
+        default = int(default)
+
+        # Missing settings are already resolved
+        if not cls.has_setting(section, setting):
+            return default
+
         try:
-            config_value = int(cls.read_setting_default(section, setting, default))
+            config_value = int(cls.config.get(section, setting))
 
             # Save non default advanced settings for logging purpose
             if section == "ADVANCED" and config_value != default:
-                cls.advanced_overwritten.append([setting, config_value])
+                cls.advanced_overwritten.append((setting, config_value))
 
             return config_value
 
@@ -1,54 +1,118 @@
 #!/usr/bin/python3
 
+import os
 import subprocess
 import re
 import time
+import signal
+import shutil
+import functools
 
+from collections import namedtuple
+
+# Raspberry Pi revision flags
+_REV_HEVC       = 0b001     # Hardware HEVC decoder
+_REV_DUAL_HDMI  = 0b010     # Two HDMI outputs
+_REV_SUPPORTED  = 0b100     # Supported by camplayer
+
+# Revision -> (model name, revision flags)
 # Only supported revisions are listed at the moment
 # Non supported devices includes:
 #   - Devices without ethernet/WLAN 
 #   - Devices older than model 2
 # Source: https://www.raspberrypi.org/documentation/hardware/raspberrypi/revision-codes/README.md
 pi_revisions = {
-    "9000c1" : {"model": "Zero W",      "supported": True, "dual_hdmi": False, "hevc": False},
-    "a01040" : {"model": "Zero W",      "supported": True, "dual_hdmi": False, "hevc": False},
-    "a01041" : {"model": "2B",          "supported": True, "dual_hdmi": False, "hevc": False},
-    "a21041" : {"model": "2B",          "supported": True, "dual_hdmi": False, "hevc": False},
-    "a22042" : {"model": "2B",          "supported": True, "dual_hdmi": False, "hevc": False},
-    "a02082" : {"model": "3B",          "supported": True, "dual_hdmi": False, "hevc": False},
-    "a32082" : {"model": "3B",          "supported": True, "dual_hdmi": False, "hevc": False},
-    "a22082" : {"model": "3B",          "supported": True, "dual_hdmi": False, "hevc": False},
-    "a52082" : {"model": "3B",          "supported": True, "dual_hdmi": False, "hevc": False},
-    "a22083" : {"model": "3B",          "supported": True, "dual_hdmi": False, "hevc": False},
-    "a020d3" : {"model": "3B+",         "supported": True, "dual_hdmi": False, "hevc": False},
-    "a03111" : {"model": "4B 1GB",      "supported": True, "dual_hdmi": True,  "hevc": True},
-    "b03111" : {"model": "4B 2GB",      "supported": True, "dual_hdmi": True,  "hevc": True},
-    "c03111" : {"model": "4B 4GB",      "supported": True, "dual_hdmi": True,  "hevc": True},
-    "b03112" : {"model": "4B 2GB",      "supported": True, "dual_hdmi": True,  "hevc": True},
-    "c03112" : {"model": "4B 4GB",      "supported": True, "dual_hdmi": True,  "hevc": True},
-    "d03114" : {"model": "4B 8GB",      "supported": True, "dual_hdmi": True,  "hevc": True},
-    "b03114" : {"model": "4B 2GB",      "supported": True, "dual_hdmi": True,  "hevc": True},
-    "c03114" : {"model": "4B 4GB",      "supported": True, "dual_hdmi": True,  "hevc": True},
-    "c03130" : {"model": "PI 400 4GB",  "supported": True, "dual_hdmi": True,  "hevc": True},
-    "9020e0" : {"model": "3A+",         "supported": True, "dual_hdmi": False, "hevc": False},
+    0x9000c1 : ("Zero W",     _REV_SUPPORTED),
+    0xa01040 : ("Zero W",     _REV_SUPPORTED),
+    0xa01041 : ("2B",         _REV_SUPPORTED),
+    0xa21041 : ("2B",         _REV_SUPPORTED),
+    0xa22042 : ("2B",         _REV_SUPPORTED),
+    0xa02082 : ("3B",         _REV_SUPPORTED),
+    0xa32082 : ("3B",         _REV_SUPPORTED),
+    0xa22082 : ("3B",         _REV_SUPPORTED),
+    0xa52082 : ("3B",         _REV_SUPPORTED),
+    0xa22083 : ("3B",         _REV_SUPPORTED),
+    0xa020d3 : ("3B+",        _REV_SUPPORTED),
+    0xa03111 : ("4B 1GB",     _REV_SUPPORTED | _REV_DUAL_HDMI | _REV_HEVC),
+    0xb03111 : ("4B 2GB",     _REV_SUPPORTED | _REV_DUAL_HDMI | _REV_HEVC),
+    0xc03111 : ("4B 4GB",     _REV_SUPPORTED | _REV_DUAL_HDMI | _REV_HEVC),
+    0xb03112 : ("4B 2GB",     _REV_SUPPORTED | _REV_DUAL_HDMI | _REV_HEVC),
+    0xc03112 : ("4B 4GB",     _REV_SUPPORTED | _REV_DUAL_HDMI | _REV_HEVC),
+    0xd03114 : ("4B 8GB",     _REV_SUPPORTED | _REV_DUAL_HDMI | _REV_HEVC),
+    0xb03114 : ("4B 2GB",     _REV_SUPPORTED | _REV_DUAL_HDMI | _REV_HEVC),
+    0xc03114 : ("4B 4GB",     _REV_SUPPORTED | _REV_DUAL_HDMI | _REV_HEVC),
+    0xc03130 : ("PI 400 4GB", _REV_SUPPORTED | _REV_DUAL_HDMI | _REV_HEVC),
+    0x9020e0 : ("3A+",        _REV_SUPPORTED),
 }
 
+# Startup probes, all executed by a single shell, see 'probe_system_once'
+_PROBE_COMMANDS = (
+    ('uname',           "uname -a 2>/dev/null"),
+    ('gpu_mem',         "vcgencmd get_mem gpu 2>/dev/null"),
+    ('display_status',  "tvservice --device 2 --status 2>&1"),
+    ('display_name',    "tvservice --device 2 --name 2>&1"),
+)
+
+# Printed on its own line after every probe output, followed by the probe exit code
+_PROBE_SEPARATOR = "---camplayer-probe---"
+
+# Output and exit code of every probe in the probe shell output
+_PROBE_SECTION_RE = re.compile(r'(.*?)\n%s (\d+)\n' % _PROBE_SEPARATOR, re.DOTALL)
+
+# tvservice status, e.g. "state 0xa [HDMI CEA (16) RGB lim 16:9], 1920x1080 @ 60.00Hz, progressive"
+_TVSERVICE_STATE_RE = re.compile(r'^state.+(DMT|CEA).*\((\d+)\).*? (\d+)x(\d+).+@ (\d+)')
+
+# vcgencmd gpu memory, e.g. "gpu=128M"
+_GPU_MEM_RE = re.compile(r'\d+')
+
+# Output of every probe, None when the probe failed
+SystemProbe = namedtuple('SystemProbe', [name for name, _ in _PROBE_COMMANDS])
+
+
+@functools.lru_cache(maxsize=1)
+def probe_system_once():
+    """Run all startup probes in a single shell instead of forking a process for every probe"""
+
+    script = "; ".join("%s; status=$?; echo; echo %s $status" % (command, _PROBE_SEPARATOR)
+                       for _, command in _PROBE_COMMANDS)
+
+    try:
+        output = subprocess.check_output(['sh', '-c', script], timeout=5).decode(errors='ignore')
+    except:
+        output = ""
+
+    sections = _PROBE_SECTION_RE.findall(output)
+    if len(sections) != len(_PROBE_COMMANDS):
+        return SystemProbe(*[None] * len(_PROBE_COMMANDS))
+
+    return SystemProbe(*[response if status == "0" else None for response, status in sections])
+
 
-def get_gpu_memory():
+def __getattr__(name):
+    """Lazy module attributes, 'HARDWARE' probes the hardware info on first access only"""
+
+    if name == 'HARDWARE':
+        return get_hardware_info()
+
+    raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+
+
+@functools.lru_cache(maxsize=1)
+def get_gpu_memory(probe=None):
     """Get the amount of memory allocated to the GPU in MB"""
 
     try:
-        response = subprocess.check_output(['vcgencmd', 'get_mem', 'gpu']).decode()
+        response = (probe or probe_system_once()).gpu_mem
 
         if response:
-            response = re.findall('\d+', str(response))
-            return int(response[0])
+            return int(_GPU_MEM_RE.search(response).group())
     except:
         pass
 
     return 0
 
 
+@functools.lru_cache(maxsize=1)
 def get_hardware_info():
     """Get hardware info (SoC, HW revision, S/N, Model name)"""
     
@@ -61,8 +125,9 @@ def get_hardware_info():
     supported = False
 
     try:
-        response = subprocess.check_output(
-            ['cat', '/proc/cpuinfo'], timeout=2).decode().splitlines()
+        # Pseudo file, no need for a process to read it
+        with open('/proc/cpuinfo', 'rb') as cpuinfo:
+            response = cpuinfo.read().decode(errors='ignore').splitlines()
 
         for line in response:
             if "revision" in line.lower():
@@ -72,14 +137,13 @@ def get_hardware_info():
             elif "hardware" in line.lower():
                 soc = line.split(':')[1].strip()
 
-        if revision:
-            rev_map = pi_revisions.get(revision, model)
+        entry = pi_revisions.get(int(revision, 16)) if revision else None
 
-            if rev_map:
-                model = rev_map.get("model")
-                supported = rev_map.get('supported')
-                dual_hdmi = rev_map.get('dual_hdmi')
-                hevc_decoder = rev_map.get('hevc')
+        if entry:
+            model, flags = entry
+            supported = bool(flags & _REV_SUPPORTED)
+            dual_hdmi = bool(flags & _REV_DUAL_HDMI)
+            hevc_decoder = bool(flags & _REV_HEVC)
     except:
         pass
 
@@ -87,56 +151,108 @@ def get_hardware_info():
             'model': model, 'supported': supported, 'dual_hdmi': dual_hdmi}
 
 
-def get_system_info():
+@functools.lru_cache(maxsize=1)
+def get_system_info(probe=None):
     """Get a description of this operation system""" 
 
     try:
-        return str(subprocess.check_output(
-            ['uname', '-a'], universal_newlines=True)).splitlines()[0]
+        return (probe or probe_system_once()).uname.partition('\n')[0]
     except:
         pass
 
     return ""
 
 
-def kill_service(service, force=False):
-    """Terminate all processes with a given name"""
+def pids_for(services):
+    """Get the PIDs of all processes with one of the given names"""
 
-    try:
-        subprocess.Popen(['killall', '-15', service], shell=False,
-                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).wait(timeout=2)
-    except:
-        pass
+    # The kernel truncates process names to 15 characters
+    names = {service[:15] for service in services}
+    pids = []
+
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
 
-    if force:
-        time.sleep(0.5)
         try:
-            subprocess.Popen(['killall', '-9', service], shell=False,
-                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).wait(timeout=2)
-        except:
+            with open('/proc/%s/comm' % entry, 'r') as comm:
+                if comm.read().rstrip('\n') in names:
+                    pids.append(int(entry))
+        except OSError:
             pass
 
+    return pids
 
-def terminate_process(PID, force=False):
-    """Terminate a process by its"""
+
+def pid_alive(pid):
+    """True when a process exists and is not a zombie"""
 
     try:
-        subprocess.Popen(['kill', '-15', str(PID)], shell=False,
-                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).wait(timeout=2)
-    except:
-        pass
+        with open('/proc/%i/stat' % pid, 'r') as stat:
+            return stat.read().rpartition(')')[2].split()[0] != 'Z'
+    except (OSError, IndexError):
+        return False
 
-    if force:
-        time.sleep(0.5)
+
+def wait_processes_exit(pids, timeout=0.5):
+    """Wait until processes have exited or the timeout expired, returns the PIDs still alive"""
+
+    # Wait only as long as processes are still alive, polling with exponential backoff
+    deadline = time.monotonic() + timeout
+    delay = 0.005
+    alive = [pid for pid in pids if pid_alive(pid)]
+
+    while alive and time.monotonic() < deadline:
+        time.sleep(min(delay, max(0, deadline - time.monotonic())))
+        delay = min(delay * 2, 0.05)
+        alive = [pid for pid in alive if pid_alive(pid)]
+
+    return alive
+
+
+def _terminate_pids(pids, force=False, timeout=0.5):
+    """Send SIGTERM to processes, and SIGKILL to the ones still alive after the timeout when forced"""
+
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+
+    if not force:
+        return
+
+    for pid in wait_processes_exit(pids, timeout=timeout):
         try:
-            subprocess.Popen(['kill', '-9', str(PID)], shell=False,
-                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).wait(timeout=2)
-        except:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
             pass
 
 
-def get_display_mode(display=2):
-    """Get current diplay mode (display 2 = HDMI0, display 7 = HDMI1)"""
+def kill_service(service, force=False):
+    """Terminate all processes with a given name"""
+
+    kill_services([service], force=force)
+
+
+def kill_services(services, force=False):
+    """Terminate all processes with one of the given names"""
+
+    _terminate_pids(pids_for(services), force=force)
+
+
+def terminate_process(PID, force=False):
+    """Terminate a process by its"""
+
+    _terminate_pids([int(PID)], force=force)
+
+
+@functools.lru_cache(maxsize=4)
+def get_display_mode(display=2, probe=None):
+    """
+    Get current diplay mode (display 2 = HDMI0, display 7 = HDMI1)
+    Cached, call 'get_display_mode.cache_clear()' when displays are (un)plugged.
+    """
 
     hdmi_group  = 'Unknown'
     hdmi_mode   = 0
@@ -146,11 +262,16 @@ def get_display_mode(display=2):
     device_name = ""
 
     try:
-        response = subprocess.check_output(
-            ['tvservice', '--device', str(display), '--status'],
-            stderr=subprocess.STDOUT).decode().splitlines()[0]
-
-        tmp = re.search('^state.+(DMT|CEA).*\((\d+)\)[\s*\S*]* (\d+)x(\d+).+@ (\d+)', response)
+        # HDMI0 is part of the startup probes
+        if display == 2:
+            probe = probe or probe_system_once()
+            response = probe.display_status.partition('\n')[0]
+        else:
+            response = subprocess.check_output(
+                ['tvservice', '--device', str(display), '--status'],
+                stderr=subprocess.STDOUT).decode().partition('\n')[0]
+
+        tmp = _TVSERVICE_STATE_RE.search(response)
         if tmp:
             hdmi_group  = tmp.group(1)
             hdmi_mode   = int(tmp.group(2))
@@ -158,9 +279,12 @@ def get_display_mode(display=2):
             res_height  = int(tmp.group(4))
             framerate   = int(tmp.group(5))
 
-        response = subprocess.check_output(
-            ['tvservice', '--device', str(display), '--name'],
-            timeout=2, stderr=subprocess.STDOUT).decode()
+        if display == 2:
+            response = probe.display_name
+        else:
+            response = subprocess.check_output(
+                ['tvservice', '--device', str(display), '--name'],
+                timeout=2, stderr=subprocess.STDOUT).decode()
 
         if "device_name=" in response:
             device_name = response.split('=')[1].strip()
@@ -171,16 +295,8 @@ def get_display_mode(display=2):
             'res_height': res_height, 'framerate': framerate, 'device_name': device_name}
 
 
+@functools.lru_cache(maxsize=64)
 def os_package_installed(package):
     """Check if some linux package/application is installed"""
 
-    try:
-        subprocess.check_output(['which', package],
-            stderr=subprocess.STDOUT).decode().splitlines()[0]
-
-        return True
-
-    except:
-        pass
-
-    return False
+    return shutil.which(package) is not None
@@ -6,7 +6,12 @@ import time
 import signal
 import threading
 import sys
-import math
+import select
+import re
+import bisect
+
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 
 from enum import IntEnum
 from enum import unique
@@ -18,6 +23,61 @@ from utils.constants import CONSTANTS
 from utils.globals import GLOBALS
 from streaminfo import StreamInfo
 
+# Process file descriptors require Python 3.9 and Linux 5.3
+_PIDFD_SUPPORT = hasattr(os, 'pidfd_open')
+
+# Spawning processes without fork() requires Python 3.8
+_POSIX_SPAWN_SUPPORT = hasattr(os, 'posix_spawnp')
+
+# Stream duration in a 'Duration' reply, 'dbus-send' prefixes it with its type
+_DBUS_INT64_RE = re.compile(r'(?:variant\s+)?(?:int64\s+)?(-?\d+)')
+
+# Playback status in a player reply, MPRIS reports 'Playing' but match any case
+_DBUS_PLAYING_RE = re.compile(r'playing', re.IGNORECASE)
+
+# Fixed leading part of every 'dbus-send' command, followed by the destination
+_DBUS_SEND_ARGS = ('dbus-send', '--print-reply=literal', '--reply-timeout=%i' % CONSTANTS.DBUS_TIMEOUT_MS)
+
+# Player arguments which are the same for every stream
+_OMX_BASE_ARGS = (
+    'omxplayer',
+    '--no-keys',                                                            # No keyboard input
+    '--no-osd',                                                             # No OSD
+    '--aspect-mode',    'stretch',                                          # Stretch video if aspect doesn't match
+    '--alpha',          '255',                                              # No transparency
+    '--nodeinterlace',                                                      # Assume progressive streams
+    '--nohdmiclocksync',                                                    # Clock sync makes no sense with multiple clock sources
+)
+_VLC_BASE_ARGS = (
+    'cvlc',
+    '--fullscreen',                                                         # VLC does not support windowed mode without X11
+    '--no-keyboard-events',                                                 # No keyboard events
+    '--mmal-layer=0',                                                       # OMXplayer uses layers starting from 0, don't interference
+    '--input-timeshift-granularity=0',                                      # Disable timeshift feature
+    '--vout=mmal_vout',                                                     # Force MMAL mode
+    '--gain=1',                                                             # Audio gain
+    '--no-video-title-show',                                                # Disable filename popup on start
+    '--no-lua',                                                             # Skip lua interfaces/extensions, faster start
+    '--no-stats',                                                           # No input/output statistics
+    '--no-sub-autodetect-file',                                             # Only our own subtitle file
+    '--no-snapshot-preview',                                                # No snapshot previews
+)
+
+# Native DBus binding, falls back on 'dbus-send' when not installed
+try:
+    from jeepney import DBusAddress, new_method_call
+    from jeepney.io.threading import open_dbus_connection, DBusRouter
+    from jeepney.io.common import RouterClosed
+    from jeepney.wrappers import unwrap_msg, DBusErrorResponse
+
+    _DBUS_NATIVE_SUPPORT = True
+    # ValueError is raised for a malformed destination bus name
+    _DBUS_ERRORS = (subprocess.CalledProcessError, subprocess.TimeoutExpired, DBusErrorResponse, RouterClosed, OSError,
+                    ValueError)
+except ImportError:
+    _DBUS_NATIVE_SUPPORT = False
+    _DBUS_ERRORS = (subprocess.CalledProcessError, subprocess.TimeoutExpired)
+
 
 @unique
 class PLAYSTATE(IntEnum):
@@ -57,7 +117,21 @@ class Window(object):
 
     # Holds all player PIDs and
     # associated command line arguments
-    _player_pid_pool_cmdline = [[], []]
+    _player_pid_pool            = {}    # PID -> command line
+    _player_pid_pool_args       = {}    # Command line argument -> first PID with it, for exact lookups
+    _player_pidfds              = {}    # PID -> pidfd, opened while the PID was known to be a player
+
+    # Players spawned by ourselves, to be reaped when they exit
+    _spawned_pids               = set()
+
+    # Stopped players are watched with a pidfd until they are gone,
+    # the player watchdog only needs to check the PID pool when some are left
+    _pidfd_poller               = select.poll()
+    _pidfd_released             = {}    # pidfd -> PID
+    _pidpool_check_required     = True  # Startup leftovers or player stopped before its PID was known
+
+    # Worker threads remove killed players while the main thread updates and searches the pool
+    _pidpool_lock               = threading.RLock()  # Guards the PID pool and the pidfds above
 
     # VLC is currently only supported for fullscreen playback
     # so only one instance can exist for each display
@@ -65,38 +139,76 @@ class Window(object):
     _vlc_active_stream_url      = [""       for _ in range(GLOBALS.NUM_DISPLAYS)]
     _vlc_subs_enabled           = [False    for _ in range(GLOBALS.NUM_DISPLAYS)]
     vlc_player_pid              = [0        for _ in range(GLOBALS.NUM_DISPLAYS)]
+    _vlc_state_lock             = [threading.RLock() for _ in range(GLOBALS.NUM_DISPLAYS)]  # Guards the VLC state above
 
     # Active estimated decoder weight for all windows
     _total_weight = 0
+    _weight_lock = threading.Lock()
+
+    # Native DBus connections, shared by all windows and their threads
+    _dbus_conns                 = {}    # Bus address -> router, matches replies to their calls by serial
+    _dbus_lock                  = threading.Lock()  # Guards opening and closing the connections only
+    _dbus_env_addr              = ""    # OMXplayer DBus session bus address
+
+    _player_lock                = threading.Lock()  # Guards killing unresponsive players from worker threads
+
+    # Asynchronous DBus commands and playstate requests, see 'poll_playstates',
+    # its worker threads are started on demand and reused, one for each window of a 4x4 screen
+    _dbus_executor              = ThreadPoolExecutor(max_workers=16, thread_name_prefix="dbus")
     
-    def __init__(self, x1, y1, x2, y2, gridindex, screen_idx, window_idx, display_idx):
+    def __init__(self, x1, y1, x2, y2, gridindex, screen_idx, window_idx, display_idx, playstate_callback=None):
 
         self.x1                 = x1                        # Upper left x-position of window
         self.y1                 = y1                        # Upper left y-position of window
         self.x2                 = x2                        # Lower right x-position of window
         self.y2                 = y2                        # Lower right y-position of window
         self.gridindex          = gridindex                 # Grid indices covered by this window
+        self.gridindex_set      = frozenset(gridindex)      # Same as above, for fast intersection tests
         self.omx_player_pid     = 0                         # OMXplayer  PID
         self._omx_audio_enabled = False                     # OMXplayer audio stream enabled
         self._omx_duration      = 0                         # OMXplayer reported stream duration
         self._layer             = 0                         # Player dispmanx layer
         self.visible            = False                     # Is window in visible area?
-        self._forced_fullscreen  = self.native_fullscreen   # Is window forced in fullscreen mode?
+        self.pending_invisible  = False                     # Async set invisible command not yet completed?
+        self.native_fullscreen  = \
+            x1 == CONSTANTS.VIRT_SCREEN_OFFSET_X and \
+            y1 == CONSTANTS.VIRT_SCREEN_OFFSET_Y and \
+            x2 == CONSTANTS.VIRT_SCREEN_OFFSET_X + CONSTANTS.VIRT_SCREEN_WIDTH and \
+            y2 == CONSTANTS.VIRT_SCREEN_OFFSET_Y + CONSTANTS.VIRT_SCREEN_HEIGHT     # Is window the size of the screen?
+        self.fullscreen_mode    = self.native_fullscreen    # Is window (forced) in fullscreen mode?
+
+        # OMXplayer video positions, neither the window nor the screen geometry changes afterwards
+        self._videopos_fullscreen = "%i %i %i %i" % (
+            CONSTANTS.VIRT_SCREEN_OFFSET_X, CONSTANTS.VIRT_SCREEN_OFFSET_Y,
+            CONSTANTS.VIRT_SCREEN_OFFSET_X + CONSTANTS.VIRT_SCREEN_WIDTH,
+            CONSTANTS.VIRT_SCREEN_OFFSET_Y + CONSTANTS.VIRT_SCREEN_HEIGHT)
+        self._videopos_window = "%i %i %i %i" % (x1, y1, x2, y2)
+        self._videopos_offscreen = "%i %i %i %i" % (
+            x1 + CONSTANTS.WINDOW_OFFSET, y1, x2 + CONSTANTS.WINDOW_OFFSET, y2)
         self._fail_rate_hr      = 0                         # Stream failure rate of last hour
         self._time_playstatus   = 0                         # Timestamp of last playstatus check
         self._time_streamstart  = 0                         # Timestamp of last stream start
         self.streams            = []                        # Assigned stream(s)
+        self._default_streams   = {}                        # Default stream cache, windowed -> stream
+        self._valid_streams     = {True: [], False: []}     # Valid streams in config order, windowed -> streams
+        self._sorted_streams    = {True: [], False: []}     # Valid streams sorted on quality, windowed -> streams
+        self._sorted_qualities  = {True: [], False: []}     # Qualities of the above, windowed -> qualities
         self.active_stream      = None                      # Currently playing stream
         self._display_name      = ""                        # Video OSD display name
+        self._sub_file          = ""                        # Subtitle file with the OSD display name
         self._player            = PLAYER.NONE               # Currently active player for this window (OMX or VLC)
-        self.playstate          = PLAYSTATE.NONE            # Current stream play state for this window
+        self._playstate         = PLAYSTATE.NONE            # Current stream play state for this window
+        self._charged_weight    = 0                         # Decoder weight this window added to '_total_weight'
+        self._playstate_callback = playstate_callback       # Called with (window, old, new) on playstate changes
         self._window_num        = window_idx + 1
         self._screen_num        = screen_idx + 1
         self._display_num       = display_idx + 1
         self.force_udp          = False
+        self.buffertime_ms      = CONFIG.BUFFERTIME_MS      # Player buffer time, per channel override
 
-        self._omx_dbus_ident = str("org.mpris.MediaPlayer2.omxplayer_D%02d_S%02d_W%02d" %
-                                   (self._display_num, self._screen_num, self._window_num))
+        self._omx_dbus_ident = sys.intern("org.mpris.MediaPlayer2.omxplayer_D%02d_S%02d_W%02d" %
+                                          (self._display_num, self._screen_num, self._window_num))
+        self._omx_dbus_args = _DBUS_SEND_ARGS + ('--dest=%s' % self._omx_dbus_ident, '/org/mpris/MediaPlayer2')
         
         LOG.DEBUG(self._LOG_NAME,
                   "init window with position '%i %i %i %i', gridindex '%s', "
@@ -110,6 +222,21 @@ class Window(object):
             return
 
         self.streams.append(StreamInfo(url))
+        self._update_streams()
+
+    def _update_streams(self):
+        """Prepare the stream selection, streams only change when they are added"""
+
+        self._default_streams.clear()
+
+        for windowed in (True, False):
+            self._valid_streams[windowed] = [
+                strm for strm in self.streams if strm.quality > 10000 and
+                (strm.valid_video_windowed if windowed else strm.valid_video_fullscreen)]
+
+            # Sorting is stable, so the first configured stream remains first for equal qualities
+            self._sorted_streams[windowed] = sorted(self._valid_streams[windowed], key=lambda strm: strm.quality)
+            self._sorted_qualities[windowed] = [strm.quality for strm in self._sorted_streams[windowed]]
 
     def set_display_name(self, display_name):
         """Set player OSD text for this window"""
@@ -117,12 +244,11 @@ class Window(object):
         if not display_name or self._display_name:
             return
 
-        sub_file = CONSTANTS.CACHE_DIR + display_name + ".srt"
+        sub_file = os.path.join(CONSTANTS.CACHE_DIR, display_name + ".srt")
 
         try:
             # Create folder if not exist
-            if not os.path.isdir(os.path.dirname(sub_file)):
-                os.system("mkdir -p %s" % os.path.dirname(sub_file))
+            os.makedirs(os.path.dirname(sub_file), exist_ok=True)
 
             # Create subtitle file if not exist
             if not os.path.isfile(sub_file):
@@ -132,29 +258,33 @@ class Window(object):
                     file.write(display_name + '\n')
 
             self._display_name = display_name
+            self._sub_file = sub_file
         except:
 
             # TODO: filter for read-only error only
             LOG.ERROR(self._LOG_NAME, "writing subtitle file failed, read only?")
 
-    @property
-    def native_fullscreen(self):
-        """Is this window the same size as the configured screen?"""
+    def set_fullscreen_mode(self, value):
+        """Force this window in fullscreen mode, a native fullscreen window always is"""
 
-        return self.x1 == CONSTANTS.VIRT_SCREEN_OFFSET_X and \
-                self.y1 == CONSTANTS.VIRT_SCREEN_OFFSET_Y and \
-                self.x2 == CONSTANTS.VIRT_SCREEN_OFFSET_X + CONSTANTS.VIRT_SCREEN_WIDTH and \
-                self.y2 == CONSTANTS.VIRT_SCREEN_OFFSET_Y + CONSTANTS.VIRT_SCREEN_HEIGHT
+        self.fullscreen_mode = self.native_fullscreen or bool(value)
 
     @property
-    def fullscreen_mode(self):
-        """Is this window the same size as the configured screen?"""
+    def playstate(self):
+        """Current stream play state for this window"""
+
+        return self._playstate
+
+    @playstate.setter
+    def playstate(self, value):
+        if value == self._playstate:
+            return
 
-        return self.native_fullscreen or self._forced_fullscreen
+        old_playstate = self._playstate
+        self._playstate = value
 
-    @fullscreen_mode.setter
-    def fullscreen_mode(self, value):
-        self._forced_fullscreen = value
+        if self._playstate_callback:
+            self._playstate_callback(self, old_playstate, value)
 
     @property
     def playtime(self):
@@ -200,21 +330,10 @@ class Window(object):
         elif windowed is None:
             windowed = not self.fullscreen_mode
 
-        stream = None
-
-        quality = sys.maxsize
-
         # Select the lowest valid resolution stream by default
-        for strm in self.streams:
+        streams = self._sorted_streams[bool(windowed)]
 
-            video_valid = strm.valid_video_fullscreen \
-                if not windowed else strm.valid_video_windowed
-
-            if quality > strm.quality > 10000 and video_valid:
-                quality = strm.quality
-                stream = strm
-
-        return stream
+        return streams[0] if streams else None
 
     def get_highest_quality_stream(self, prevent_downscaling=False, windowed=None):
         """Get the highest quality stream/subchannel"""
@@ -233,12 +352,7 @@ class Window(object):
         window_height = CONSTANTS.VIRT_SCREEN_HEIGHT if not windowed else self.window_height
 
         # Select the highest valid resolution
-        for strm in self.streams:
-
-            video_valid = strm.valid_video_fullscreen \
-                if not windowed else strm.valid_video_windowed
-
-            if strm.quality > 10000 and video_valid:
+        for strm in self._valid_streams[bool(windowed)]:
 
                 if not stream:
                     stream = strm
@@ -277,6 +391,10 @@ class Window(object):
         elif windowed is None:
             windowed = not self.fullscreen_mode
 
+        # The default stream only changes when streams are added
+        if windowed in self._default_streams:
+            return self._default_streams[windowed]
+
         stream = None
 
         if CONFIG.STREAM_QUALITY == STREAMQUALITY.LOW:
@@ -291,6 +409,8 @@ class Window(object):
             # A perfect resolution match is the best.
             stream = self.get_highest_quality_stream(prevent_downscaling=True, windowed=windowed)
 
+        self._default_streams[windowed] = stream
+
         return stream
         
     def stream_set_visible(self, _async=False, fullscreen=None):
@@ -308,21 +428,19 @@ class Window(object):
 
         if not self.visible or (fullscreen != self.fullscreen_mode):
 
-            LOG.INFO(self._LOG_NAME, "stream set visible '%s' '%s'" %
-                     (self._omx_dbus_ident, self.active_stream.printable_url()))
+            LOG.INFO(self._LOG_NAME, "stream set visible '%s' '%s'",
+                     self._omx_dbus_ident, self.active_stream.printable_url())
 
-            self.fullscreen_mode = fullscreen
+            self.set_fullscreen_mode(fullscreen)
 
             if self._player == PLAYER.OMXPLAYER:
                 # OMXplayer instance is playing outside the visible screen area.
                 # Sending the position command will move this instance into the visible screen area.
 
                 if fullscreen:
-                    videopos_arg = str("%i %i %i %i" % (CONSTANTS.VIRT_SCREEN_OFFSET_X, CONSTANTS.VIRT_SCREEN_OFFSET_Y,
-                                                        CONSTANTS.VIRT_SCREEN_OFFSET_X + CONSTANTS.VIRT_SCREEN_WIDTH,
-                                                        CONSTANTS.VIRT_SCREEN_OFFSET_Y + CONSTANTS.VIRT_SCREEN_HEIGHT))
+                    videopos_arg = self._videopos_fullscreen
                 else:
-                    videopos_arg = str("%i %i %i %i" % (self.x1, self.y1, self.x2, self.y2))
+                    videopos_arg = self._videopos_window
 
                 # Re-open OMXplayer with the audio stream enabled
                 if CONFIG.AUDIO_MODE == AUDIOMODE.FULLSCREEN and fullscreen \
@@ -338,11 +456,8 @@ class Window(object):
                     return
 
                 if _async:
-                    setvisible_thread = threading.Thread(
-                        target=self._send_dbus_command,
-                        args=(DBUS_COMMAND.OMXPLAYER_VIDEOPOS, videopos_arg,))
-
-                    setvisible_thread.start()
+                    Window._dbus_executor.submit(
+                        self._send_dbus_command, DBUS_COMMAND.OMXPLAYER_VIDEOPOS, videopos_arg)
                 else:
                     self._send_dbus_command(DBUS_COMMAND.OMXPLAYER_VIDEOPOS, videopos_arg)
 
@@ -351,16 +466,17 @@ class Window(object):
                 # Sending the play command will start fullscreen playback of our video/stream.
                 # When VLC is playing other content, we will hijack it.
 
-                # Start our stream
-                self._send_dbus_command(DBUS_COMMAND.PLAY_PLAY)
+                with Window._vlc_state_lock[self._display_num - 1]:
+                    # Start our stream
+                    self._send_dbus_command(DBUS_COMMAND.PLAY_PLAY)
+
+                    # Mark our steam as the active one for this display
+                    Window._vlc_active_stream_url[self._display_num - 1] = self.active_stream.url
 
                 # Pretend like the player just started again
                 self.playstate = PLAYSTATE.INIT2
                 self._time_streamstart = time.monotonic()
 
-                # Mark our steam as the active one for this display
-                Window._vlc_active_stream_url[self._display_num - 1] = self.active_stream.url
-
             else:
                 # Windowed with VLC not supported -> stop video
                 self.stream_stop()
@@ -368,14 +484,16 @@ class Window(object):
         self.visible = True
         
     def stream_set_invisible(self, _async=False):
-        """Keep the stream open but set it off screen"""
+        """Keep the stream open but set it off screen, returns the DBus future if any"""
+
+        setinvisible_future = None
 
         if self.playstate == PLAYSTATE.NONE:
-            return
+            return None
 
         if self.visible:
-            LOG.INFO(self._LOG_NAME, "stream set invisible '%s' '%s'" %
-                     (self._omx_dbus_ident, self.active_stream.printable_url()))
+            LOG.INFO(self._LOG_NAME, "stream set invisible '%s' '%s'",
+                     self._omx_dbus_ident, self.active_stream.printable_url())
 
             if self._player == PLAYER.OMXPLAYER:
                 # OMXplayer instance is playing inside the visible screen area.
@@ -384,42 +502,115 @@ class Window(object):
                 if self._omx_audio_enabled:
                     self.visible = False
                     self.stream_refresh()
-                    return
+                    return None
 
-                videopos_arg = str("%i %i %i %i" % (
-                    self.x1 + CONSTANTS.WINDOW_OFFSET, self.y1,
-                    self.x2 + CONSTANTS.WINDOW_OFFSET, self.y2))
+                videopos_arg = self._videopos_offscreen
 
                 if _async:
-                    setinvisible_thread = threading.Thread(
-                        target=self._send_dbus_command,
-                        args=(DBUS_COMMAND.OMXPLAYER_VIDEOPOS, videopos_arg,))
+                    self.pending_invisible = True
 
-                    setinvisible_thread.start()
+                    setinvisible_future = Window._dbus_executor.submit(self._send_invisible_videopos, videopos_arg)
                 else:
                     self._send_dbus_command(DBUS_COMMAND.OMXPLAYER_VIDEOPOS, videopos_arg)
 
             else:
 
                 # It's possible that another window hijacked our vlc instance, so do not send 'stop' then.
-                if self.active_stream.url == Window._vlc_active_stream_url[self._display_num - 1]:
-                    self._send_dbus_command(DBUS_COMMAND.PLAY_STOP)
-                    Window._vlc_active_stream_url[self._display_num - 1] = ""
+                with Window._vlc_state_lock[self._display_num - 1]:
+                    if self.active_stream.url == Window._vlc_active_stream_url[self._display_num - 1]:
+                        self._send_dbus_command(DBUS_COMMAND.PLAY_STOP)
+                        Window._vlc_active_stream_url[self._display_num - 1] = ""
 
         self.visible = False
 
-    def get_stream_playstate(self):
+        return setinvisible_future
+
+    def _send_invisible_videopos(self, videopos_arg):
+        """Send the off screen position command and clear the pending flag when done"""
+
+        try:
+            self._send_dbus_command(DBUS_COMMAND.OMXPLAYER_VIDEOPOS, videopos_arg)
+        finally:
+            self.pending_invisible = False
+
+    @classmethod
+    def poll_playstates(cls, windows):
+        """Get and update the playstate of multiple windows, their players are queried concurrently"""
+
+        due = [window for window in windows if window.playstate not in (PLAYSTATE.NONE, PLAYSTATE.INIT1)
+               and window._playstate_poll_due() and window._player_alive()]
+
+        fetched = {}
+
+        # DBus requests mostly wait on the players, so overlap them
+        if len(due) > 1:
+            fetched = dict(zip(due, cls._dbus_executor.map(lambda window: window._fetch_playstate(), due)))
+
+        for window in windows:
+            window.get_stream_playstate(fetched.get(window))
+
+    def _playstate_poll_due(self, now=None):
+        """True when the player should be queried for its playstate, DBus calls are time consuming, so limit them"""
+
+        if now is None:
+            now = time.monotonic()
+
+        return now > (self._time_playstatus + 10) or \
+            (self.playstate == PLAYSTATE.INIT2 and now > (self._time_playstatus + 1))
+
+    def _player_alive(self):
+        """Check the player process without DBus, also True when its PID is not known yet"""
+
+        if self._player == PLAYER.VLCPLAYER:
+            with Window._vlc_state_lock[self._display_num - 1]:
+                pid = Window.vlc_player_pid[self._display_num - 1]
+        else:
+            pid = self.omx_player_pid
+
+        return pid <= 0 or utils.pid_alive(pid)
+
+    def _fetch_playstate(self):
+        """Query the player for its playstate, returns the DBus output and the stream duration (None if unknown)"""
+
+        output = ""
+        duration = None
+
+        # Check playstate and kill the player if it does not respond properly
+        # 04/04/2020: Under some circumstances omxplayer freezes with corrupt streams (bad wifi/network quality etc.),
+        # while it still reports its playstate as 'playing',
+        # therefore we monitor will monitor the reported 'duration' (for livestreams) from now on.
+        if not self.active_stream.url.startswith('file://') and self._player == PLAYER.OMXPLAYER:
+
+            output = self._send_dbus_command(
+                DBUS_COMMAND.PLAY_DURATION, kill_player_on_error=self.playtime > CONFIG.PLAYTIMEOUT_SEC)
+
+            match = _DBUS_INT64_RE.fullmatch(output)
+            if match:
+                duration = int(match.group(1))
+
+        else:
+            output = self._send_dbus_command(
+                DBUS_COMMAND.PLAY_STATUS, kill_player_on_error=self.playtime > CONFIG.PLAYTIMEOUT_SEC)
+
+        return output, duration
+
+    def get_stream_playstate(self, fetched=None):
         """
         Get and update the stream's playstate,
         don't use this time consuming method too often,
         use 'self.playstate' when you can.
+        'fetched' is a '_fetch_playstate' result already queried by 'poll_playstates'.
         """
 
         if self.playstate == PLAYSTATE.NONE:
             return self.playstate
 
+        # One timestamp for all checks below
+        now = time.monotonic()
+        playtime = now - self._time_streamstart
+
         # Allow at least 1 second for the player to startup
-        if self.playstate == PLAYSTATE.INIT1 and self.playtime < 1:
+        if self.playstate == PLAYSTATE.INIT1 and playtime < 1:
             return self.playstate
 
         old_playstate = self.playstate
@@ -434,56 +625,59 @@ class Window(object):
 
             if pid > 0:
                 if self._player == PLAYER.VLCPLAYER:
-                    Window.vlc_player_pid[self._display_num - 1] = pid
+                    with Window._vlc_state_lock[self._display_num - 1]:
+                        Window.vlc_player_pid[self._display_num - 1] = pid
                 else:
                     self.omx_player_pid = pid
 
+                    # OMXplayer has written its DBus address by now
+                    Window._omx_dbus_address()
+
                 self.playstate = PLAYSTATE.INIT2
 
-                LOG.DEBUG(self._LOG_NAME, "assigned PID '%i' for stream '%s' '%s'" %
-                          (pid, self._omx_dbus_ident, self.active_stream.printable_url()))
+                LOG.DEBUG(self._LOG_NAME, "assigned PID '%i' for stream '%s' '%s'",
+                          pid, self._omx_dbus_ident, self.active_stream.printable_url())
 
-            elif self.playtime > CONSTANTS.PLAYER_INITIALIZE_MS / 1000:
+            elif playtime > CONSTANTS.PLAYER_INITIALIZE_MS / 1000:
                 self.playstate = PLAYSTATE.BROKEN
 
         # Check if the player is actually playing media
-        # DBus calls are time consuming, so limit them
-        elif time.monotonic() > (self._time_playstatus + 10) or \
-                (self.playstate == PLAYSTATE.INIT2 and time.monotonic() > (self._time_playstatus + 1)):
+        elif fetched is None and self._playstate_poll_due(now) and not self._player_alive():
 
-            LOG.DEBUG(self._LOG_NAME, "fetching playstate for stream '%s' '%s'" %
-                      (self._omx_dbus_ident, self.active_stream.printable_url()))
+            # An exited player can't answer, no need to ask it with DBus
+            if self._player == PLAYER.VLCPLAYER:
+                with Window._vlc_state_lock[self._display_num - 1]:
+                    self._pidpool_remove_pid(Window.vlc_player_pid[self._display_num - 1])
+                    Window.vlc_player_pid[self._display_num - 1] = 0
+            else:
+                self._pidpool_remove_pid(self.omx_player_pid)
+                self.omx_player_pid = 0
 
-            duration_diff = 0
-            output = ""
+            self.playstate = PLAYSTATE.BROKEN
+            self._time_playstatus = now
 
-            # Check playstate and kill the player if it does not respond properly
-            # 04/04/2020: Under some circumstances omxplayer freezes with corrupt streams (bad wifi/network quality etc.),
-            # while it still reports its playstate as 'playing',
-            # therefore we monitor will monitor the reported 'duration' (for livestreams) from now on.
-            if not self.active_stream.url.startswith('file://') and self._player == PLAYER.OMXPLAYER:
+        elif fetched is not None or self._playstate_poll_due(now):
 
-                output = self._send_dbus_command(
-                    DBUS_COMMAND.PLAY_DURATION, kill_player_on_error=self.playtime > CONFIG.PLAYTIMEOUT_SEC)
+            LOG.DEBUG(self._LOG_NAME, "fetching playstate for stream '%s' '%s'",
+                      self._omx_dbus_ident, self.active_stream.printable_url())
 
-                try:
-                    duration = int(output.split("int64")[1].strip())
+            output, duration = fetched if fetched is not None else self._fetch_playstate()
+            duration_diff = 0
+
+            if self._player == PLAYER.OMXPLAYER and not self.active_stream.url.startswith('file://'):
+                if duration is not None:
                     duration_diff = duration - self._omx_duration
                     self._omx_duration = duration
-                except Exception:
+                else:
                     self._omx_duration = 0
 
-            else:
-                output = self._send_dbus_command(
-                    DBUS_COMMAND.PLAY_STATUS, kill_player_on_error=self.playtime > CONFIG.PLAYTIMEOUT_SEC)
-
-            if (output and "playing" in str(output).lower()) or duration_diff > 0:
+            if (output and _DBUS_PLAYING_RE.search(output)) or duration_diff > 0:
                 self.playstate = PLAYSTATE.PLAYING
 
             else:
                 # Only set broken after a timeout period,
                 # so keep the init state the first seconds
-                if self.playtime > CONFIG.PLAYTIMEOUT_SEC:
+                if playtime > CONFIG.PLAYTIMEOUT_SEC:
 
                     if self._player == PLAYER.OMXPLAYER or self.visible:
                         # Don't set broken when VLC is in "stopped" state
@@ -491,117 +685,218 @@ class Window(object):
 
                         self.playstate = PLAYSTATE.BROKEN
                 
-            self._time_playstatus = time.monotonic()
+            self._time_playstatus = now
 
         if old_playstate != self.playstate:
-            LOG.INFO(self._LOG_NAME, "stream playstate '%s' for stream '%s' '%s'" %
-                     (self.playstate.name, self._omx_dbus_ident, self.active_stream.printable_url()))
+            LOG.INFO(self._LOG_NAME, "stream playstate '%s' for stream '%s' '%s'",
+                     self.playstate.name, self._omx_dbus_ident, self.active_stream.printable_url())
 
         return self.playstate
 
-    def _send_dbus_command(self, command, argument="", kill_player_on_error=True, retries=CONSTANTS.DBUS_RETRIES):
-        """Send command to player with DBus"""
+    @classmethod
+    def _omx_dbus_address(cls):
+        """Get the OMXplayer DBus session bus address, the address file is only read once"""
+
+        if not cls._dbus_env_addr:
+            try:
+                with open("/tmp/omxplayerdbus.%s" % GLOBALS.USERNAME, 'r') as address_file:
+                    cls._dbus_env_addr = address_file.read().strip()
+            except OSError:
+                pass
+
+        return cls._dbus_env_addr
+
+    @classmethod
+    def _dbus_native_call(cls, bus_address, destination, command, argument):
+        """Send DBus command over a persistent bus connection, returns the reply values as string"""
+
+        player = DBusAddress('/org/mpris/MediaPlayer2', bus_name=destination,
+                             interface='org.mpris.MediaPlayer2.Player')
+        properties = DBusAddress('/org/mpris/MediaPlayer2', bus_name=destination,
+                                 interface='org.freedesktop.DBus.Properties')
+
+        if command == DBUS_COMMAND.OMXPLAYER_VIDEOPOS:
+            message = new_method_call(player, command, 'os', ('/not/used', argument))
+
+        elif command == DBUS_COMMAND.PLAY_STOP:
+            message = new_method_call(player, command)
+
+        elif command == DBUS_COMMAND.PLAY_PLAY:
+            message = new_method_call(player, command, 's', (argument,))
+
+        elif command == DBUS_COMMAND.PLAY_VOLUME:
+            message = new_method_call(properties, 'Set', 'ssv',
+                                      ('org.mpris.MediaPlayer2.Player', command, ('d', float(argument))))
+
+        else:
+            message = new_method_call(properties, 'Get', 'ss', ('org.mpris.MediaPlayer2.Player', command))
+
+        with cls._dbus_lock:
+            router = cls._dbus_conns.get(bus_address)
+
+            if router is None:
+                try:
+                    router = DBusRouter(open_dbus_connection(bus=bus_address))
+                    cls._dbus_conns[bus_address] = router
+                except OSError:
+                    if bus_address == cls._dbus_env_addr:
+                        cls._dbus_env_addr = ""
+
+                    raise
+
+        # Calls of all windows and threads can wait for their reply at the same time,
+        # a hung player only delays its own calls
+        try:
+            reply = unwrap_msg(router.send_and_get_reply(message, timeout=CONSTANTS.DBUS_TIMEOUT_MS / 1000))
+
+        except (FuturesTimeoutError, TimeoutError):
+            raise TimeoutError("no DBus reply from '%s'" % destination)
+
+        # Broken connection, reconnect next time
+        except (OSError, RouterClosed):
+            with cls._dbus_lock:
+                if cls._dbus_conns.get(bus_address) is router:
+                    del cls._dbus_conns[bus_address]
+
+                    router.close()
+                    router.conn.close()
+
+                if bus_address == cls._dbus_env_addr:
+                    cls._dbus_env_addr = ""
+
+            raise
+
+        # Property values are returned as (signature, value) variant
+        if reply and isinstance(reply[0], tuple):
+            return str(reply[0][1])
+
+        return " ".join(str(value) for value in reply)
+
+    def _send_dbus_command(self, command, argument="", kill_player_on_error=True, retries=CONSTANTS.DBUS_RETRIES,
+                           quiet_retries=False):
+        """Send command to player with DBus, 'quiet_retries' when failures are expected until the player is up"""
 
         response = ""
         command_destination = ""
-        command_prefix = ""
+        command_env = None
+        command_args = ()
+        bus_address = None
 
         if self._player == PLAYER.OMXPLAYER:
             command_destination = self._omx_dbus_ident
-
-            # OMXplayer needs some environment variables
-            command_prefix = str("export DBUS_SESSION_BUS_ADDRESS=`cat /tmp/omxplayerdbus.%s` && "
-                                 "export DBUS_SESSION_BUS_PID=`cat /tmp/omxplayerdbus.%s.pid` && "
-                                 % (GLOBALS.USERNAME, GLOBALS.USERNAME))
+            command_args = self._omx_dbus_args
 
         elif self._player == PLAYER.VLCPLAYER:
-            command_destination = Window._vlc_dbus_ident[self._display_num - 1]
+            with Window._vlc_state_lock[self._display_num - 1]:
+                command_destination = Window._vlc_dbus_ident[self._display_num - 1]
+
+                # VLC changes its DBus string to 'org.mpris.MediaPlayer2.vlc.instancePID'
+                # when opening a second instance, so we have to append this PID first.
+                if 'instance' in command_destination:
+                    command_destination += str(Window.vlc_player_pid[self._display_num - 1])
+
+            command_args = _DBUS_SEND_ARGS + ('--dest=%s' % command_destination, '/org/mpris/MediaPlayer2')
+            bus_address = os.environ.get('DBUS_SESSION_BUS_ADDRESS')
 
-            # VLC changes its DBus string to 'org.mpris.MediaPlayer2.vlc.instancePID'
-            # when opening a second instance, so we have to append this PID first.
-            if 'instance' in command_destination:
-                command_destination += str(Window.vlc_player_pid[self._display_num - 1])
+        # No player to address, e.g. VLC not started yet
+        if not command_destination:
+            LOG.DEBUG(self._LOG_NAME, "DBus command '%s' skipped, no destination", command)
+            return response
 
         for i in range(retries + 1):
-            try:
-                if command == DBUS_COMMAND.OMXPLAYER_VIDEOPOS:
-                    response = subprocess.check_output(
-                        command_prefix + "dbus-send --print-reply=literal --reply-timeout=%i "
-                                         "--dest=%s /org/mpris/MediaPlayer2 "
-                                         "org.mpris.MediaPlayer2.Player.%s objpath:/not/used "
-                                         "string:'%s'" % (CONSTANTS.DBUS_TIMEOUT_MS, command_destination,
-                                        command, argument), shell=True, stderr=subprocess.STDOUT).decode().strip()
 
-                elif command == DBUS_COMMAND.PLAY_STOP:
-                    response = subprocess.check_output(
-                        command_prefix + "dbus-send --print-reply=literal --reply-timeout=%i "
-                                         "--dest=%s /org/mpris/MediaPlayer2 "
-                                         "org.mpris.MediaPlayer2.Player.%s" %
-                                        (CONSTANTS.DBUS_TIMEOUT_MS, command_destination, command),
-                                        shell=True, stderr=subprocess.STDOUT).decode().strip()
+            # OMXplayer runs its own session bus, which could be restarted in the meantime
+            if self._player == PLAYER.OMXPLAYER:
+                bus_address = self._omx_dbus_address()
+                command_env = dict(os.environ, DBUS_SESSION_BUS_ADDRESS=bus_address)
 
-                elif command == DBUS_COMMAND.PLAY_PLAY:
-                    response = subprocess.check_output(
-                        command_prefix + "dbus-send --print-reply=literal --reply-timeout=%i "
-                                         "--dest=%s /org/mpris/MediaPlayer2 "
-                                         "org.mpris.MediaPlayer2.Player.%s string:'%s'" %
-                                        (CONSTANTS.DBUS_TIMEOUT_MS, command_destination, command,
-                                         self.active_stream.url),
-                                        shell=True, stderr=subprocess.STDOUT).decode().strip()
-
-                elif command == DBUS_COMMAND.PLAY_VOLUME:
-                    response=subprocess.check_output(
-                        command_prefix + "dbus-send --print-reply=literal --reply-timeout=%i "
-                                         "--dest=%s /org/mpris/MediaPlayer2 "
-                                         "org.freedesktop.DBus.Properties.Set "
-                                         "string:'org.mpris.MediaPlayer2.Player' string:'%s' variant:double:%f" %
-                                        (CONSTANTS.DBUS_TIMEOUT_MS, command_destination, command, argument),
-                                        shell=True, stderr=subprocess.STDOUT).decode().strip()
+            try:
+                if _DBUS_NATIVE_SUPPORT and bus_address:
+                    response = self._dbus_native_call(
+                        bus_address, command_destination, command,
+                        self.active_stream.url if command == DBUS_COMMAND.PLAY_PLAY else argument)
 
                 else:
+                    dbus_args = list(command_args)
+
+                    if command == DBUS_COMMAND.OMXPLAYER_VIDEOPOS:
+                        dbus_args += ['org.mpris.MediaPlayer2.Player.%s' % command,
+                                      'objpath:/not/used', 'string:%s' % argument]
+
+                    elif command == DBUS_COMMAND.PLAY_STOP:
+                        dbus_args += ['org.mpris.MediaPlayer2.Player.%s' % command]
+
+                    elif command == DBUS_COMMAND.PLAY_PLAY:
+                        dbus_args += ['org.mpris.MediaPlayer2.Player.%s' % command,
+                                      'string:%s' % self.active_stream.url]
+
+                    elif command == DBUS_COMMAND.PLAY_VOLUME:
+                        dbus_args += ['org.freedesktop.DBus.Properties.Set', 'string:org.mpris.MediaPlayer2.Player',
+                                      'string:%s' % command, 'variant:double:%f' % argument]
+
+                    else:
+                        dbus_args += ['org.freedesktop.DBus.Properties.Get', 'string:org.mpris.MediaPlayer2.Player',
+                                      'string:%s' % command]
+
+                    # No shell involved, so no quoting required
                     response = subprocess.check_output(
-                        command_prefix + "dbus-send --print-reply=literal --reply-timeout=%i "
-                                         "--dest=%s /org/mpris/MediaPlayer2 "
-                                         "org.freedesktop.DBus.Properties.Get "
-                                         "string:'org.mpris.MediaPlayer2.Player' string:'%s'" %
-                                        (CONSTANTS.DBUS_TIMEOUT_MS, command_destination, command),
-                                        shell=True, stderr=subprocess.STDOUT).decode().strip()
+                        dbus_args, env=command_env, stderr=subprocess.STDOUT,
+                        timeout=2 * CONSTANTS.DBUS_TIMEOUT_MS / 1000).decode().strip()
+
+                LOG.DEBUG(self._LOG_NAME, "DBus response to command '%s:%s %s' is '%s'",
+                          command_destination, command, argument, response)
 
-                LOG.DEBUG(self._LOG_NAME, "DBus response to command '%s:%s %s' is '%s'" %
-                          (command_destination, command, argument, response))
+            except _DBUS_ERRORS as ex:
 
-            except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as ex:
+                # OMXplayer could have restarted its bus in the meantime, read its address again next time
+                if self._player == PLAYER.OMXPLAYER:
+                    Window._dbus_env_addr = ""
 
-                if i == retries:
+                # A player that doesn't reply in time is hung, retrying would only block longer
+                player_hung = isinstance(ex, (subprocess.TimeoutExpired, TimeoutError)) or \
+                    (isinstance(ex, subprocess.CalledProcessError) and b'NoReply' in (ex.output or b''))
+
+                if i == retries or player_hung:
 
                     if self._player == PLAYER.VLCPLAYER:
-                        player_pid = Window.vlc_player_pid[self._display_num - 1]
+                        with Window._vlc_state_lock[self._display_num - 1]:
+                            player_pid = Window.vlc_player_pid[self._display_num - 1]
                     else:
                         player_pid = self.omx_player_pid
 
                     LOG.ERROR(self._LOG_NAME, "DBus '%s' is not responding correctly after '%i' attemps, "
-                                              "give up now" % (command_destination, retries + 1))
+                                              "give up now" % (command_destination, i + 1))
 
                     if kill_player_on_error and player_pid > 0:
                         LOG.ERROR(self._LOG_NAME, "DBus '%s' closing the associated player "
                                                   "with PID '%i' now" % (command_destination, player_pid))
 
-                        try:
-                            os.kill(player_pid, signal.SIGKILL)
-                        except ProcessLookupError:
-                            LOG.DEBUG(self._LOG_NAME, "killing PID '%i' failed" % player_pid)
+                        # Also called from playstate poll and visibility worker threads,
+                        # always take the VLC state lock before the player lock
+                        with Window._vlc_state_lock[self._display_num - 1], Window._player_lock:
+                            try:
+                                os.kill(player_pid, signal.SIGKILL)
+                            except ProcessLookupError:
+                                LOG.DEBUG(self._LOG_NAME, "killing PID '%i' failed", player_pid)
 
-                        self._pidpool_remove_pid(player_pid)
+                            self._pidpool_remove_pid(player_pid)
 
-                        if self._player == PLAYER.VLCPLAYER:
-                            Window.vlc_player_pid[self._display_num - 1] = 0
-                        else:
-                            self.omx_player_pid = 0
+                            if self._player == PLAYER.VLCPLAYER:
+                                Window.vlc_player_pid[self._display_num - 1] = 0
+                            else:
+                                self.omx_player_pid = 0
 
                 else:
-                    LOG.WARNING(self._LOG_NAME, "DBus '%s' is not responding correctly, "
-                                            "retrying within 250ms" % command_destination)
-                    time.sleep(0.25)
+                    # Exponential backoff, transient failures mostly recover within a few milliseconds
+                    delay = min(0.025 * (2 ** i), 0.25)
+
+                    if quiet_retries:
+                        LOG.DEBUG(self._LOG_NAME, "DBus '%s' is not up yet, retrying within %ims",
+                                  command_destination, delay * 1000)
+                    else:
+                        LOG.WARNING(self._LOG_NAME, "DBus '%s' is not responding correctly, "
+                                                    "retrying within %ims", command_destination, delay * 1000)
+                    time.sleep(delay)
                     continue
 
             break
@@ -621,14 +916,12 @@ class Window(object):
                 resolution = self.get_default_stream(windowed=not self.fullscreen_mode).quality + 1
 
             # Select the the next higher resolution stream
-            for strm in self.streams:
-
-                video_valid = strm.valid_video_fullscreen \
-                    if self.fullscreen_mode else strm.valid_video_windowed
+            windowed = not self.fullscreen_mode
+            qualities = self._sorted_qualities[windowed]
+            index = bisect.bisect_right(qualities, self.active_stream.quality)
 
-                if resolution > strm.quality > self.active_stream.quality and video_valid:
-                    resolution = strm.quality
-                    stream = strm
+            if index < len(qualities) and qualities[index] < resolution:
+                stream = self._sorted_streams[windowed][index]
 
             # The highest quality stream is already playing
             if not stream:
@@ -636,9 +929,7 @@ class Window(object):
                 return False
 
             if not check_only:
-                self.stream_stop()
-                time.sleep(0.1)
-                self._stream_start(stream)
+                self._stream_switch(stream)
             return stream
 
         return False
@@ -648,18 +939,16 @@ class Window(object):
 
         if self.active_stream and self.playstate != PLAYSTATE.NONE:
 
-            resolution = 10000
             stream = None
 
-            # Select the the next lower resolution stream
-            for strm in self.streams:
-
-                video_valid = strm.valid_video_fullscreen \
-                    if self.fullscreen_mode else strm.valid_video_windowed
+            # Select the the next lower resolution stream, the first one configured for equal qualities
+            windowed = not self.fullscreen_mode
+            qualities = self._sorted_qualities[windowed]
+            index = bisect.bisect_left(qualities, self.active_stream.quality)
 
-                if resolution < strm.quality < self.active_stream.quality and video_valid:
-                    resolution = strm.quality
-                    stream = strm
+            if index > 0:
+                index = bisect.bisect_left(qualities, qualities[index - 1])
+                stream = self._sorted_streams[windowed][index]
 
             # The lowest quality stream is already playing
             if not stream:
@@ -667,14 +956,25 @@ class Window(object):
                 return False
 
             if not check_only:
-                self.stream_stop()
-                time.sleep(0.1)
-                self._stream_start(stream)
+                self._stream_switch(stream)
 
             return stream
 
         return False
 
+    def _stream_switch(self, stream):
+        """Stop the playing stream and start another one once the player has released it"""
+
+        omx_player_pid = self.omx_player_pid
+
+        self.stream_stop()
+
+        # OMXplayer holds its DBus name until it exits, VLC has stopped when the DBus call returned
+        if omx_player_pid:
+            utils.wait_processes_exit([omx_player_pid], timeout=0.1)
+
+        self._stream_start(stream)
+
     def stream_refresh(self):
         """Refresh/restart the current stream with the same parameters"""
 
@@ -691,19 +991,21 @@ class Window(object):
         if self.playstate == PLAYSTATE.NONE:
             return
 
-        LOG.INFO(self._LOG_NAME, "stopping stream '%s' '%s'" % (self._omx_dbus_ident, self.active_stream.printable_url()))
+        LOG.INFO(self._LOG_NAME, "stopping stream '%s' '%s'", self._omx_dbus_ident, self.active_stream.printable_url())
 
         # VLC:
         # - send Dbus stop command, vlc stays idle in the background
         # - not every window has it's own vlc instance as vlc can only be used for fullscreen playback,
         #   therefore we have to be sure that 'our instance' isn't already playing another stream.
-        if self._player == PLAYER.VLCPLAYER and \
-                Window._vlc_active_stream_url[self._display_num - 1] == self.active_stream.url:
+        if self._player == PLAYER.VLCPLAYER:
 
-            # Stop playback but do not quit
-            self._send_dbus_command(DBUS_COMMAND.PLAY_STOP)
+            with Window._vlc_state_lock[self._display_num - 1]:
+                if Window._vlc_active_stream_url[self._display_num - 1] == self.active_stream.url:
+
+                    # Stop playback but do not quit
+                    self._send_dbus_command(DBUS_COMMAND.PLAY_STOP)
 
-            Window._vlc_active_stream_url[self._display_num - 1] = ""
+                    Window._vlc_active_stream_url[self._display_num - 1] = ""
 
         # OMXplayer:
         # - omxplayer doen't support an idle state, stopping playback will close omxplayer,
@@ -717,8 +1019,15 @@ class Window(object):
             self._pidpool_remove_pid(self.omx_player_pid)
             self.omx_player_pid = 0
 
-        if self.active_stream:
-            Window._total_weight -= self.get_weight(self.active_stream)
+        # Player still starting up, we can't tell which PID to watch
+        elif self._player == PLAYER.OMXPLAYER:
+            Window._pidpool_check_required = True
+
+        # Give back exactly what stream_start() charged, so the total can't drift
+        if self._charged_weight:
+            with Window._weight_lock:
+                Window._total_weight -= self._charged_weight
+                self._charged_weight = 0
 
         self.active_stream = None
         self.playstate = PLAYSTATE.NONE
@@ -735,7 +1044,7 @@ class Window(object):
         if visible is not None:
             self.visible = visible
 
-        self.fullscreen_mode = force_fullscreen
+        self.set_fullscreen_mode(force_fullscreen)
 
         if force_hq:
             stream = self.get_highest_quality_stream()
@@ -759,14 +1068,15 @@ class Window(object):
 
         win_width = CONSTANTS.VIRT_SCREEN_WIDTH if self.fullscreen_mode else self.window_width
         win_height = CONSTANTS.VIRT_SCREEN_HEIGHT if self.fullscreen_mode else self.window_height
-        sub_file = ""
+        weight = self.get_weight(stream)
+        sub_file = self._sub_file if CONFIG.VIDEO_OSD else ""
 
-        if self._display_name and CONFIG.VIDEO_OSD:
-            sub_file = CONSTANTS.CACHE_DIR + self._display_name + ".srt"
+        # Only stat the subtitle file once, the cache directory can be cleared behind our back
+        sub_file_exists = bool(sub_file) and os.path.isfile(sub_file)
 
-        LOG.INFO(self._LOG_NAME, "starting stream '%s' '%s' with resolution '%ix%i' and weight '%i' in a window '%ix%i'"
-                 % (self._omx_dbus_ident, stream.printable_url(), stream.width,
-                    stream.height, self.get_weight(stream), win_width, win_height))
+        LOG.INFO(self._LOG_NAME, "starting stream '%s' '%s' with resolution '%ix%i' and weight '%i' in a window '%ix%i'",
+                 self._omx_dbus_ident, stream.printable_url(), stream.width,
+                 stream.height, weight, win_width, win_height)
 
         # OMXplayer can play in fullscreen and windowed mode
         # One instance per window
@@ -780,39 +1090,16 @@ class Window(object):
                 # Window position also required for fullscreen playback,
                 # otherwise lower layers will be disabled when moving the window position later on
 
-                omx_pos_arg = str("%i %i %i %i" % (
-                    CONSTANTS.VIRT_SCREEN_OFFSET_X, CONSTANTS.VIRT_SCREEN_OFFSET_Y,
-                    CONSTANTS.VIRT_SCREEN_OFFSET_X + CONSTANTS.VIRT_SCREEN_WIDTH,
-                    CONSTANTS.VIRT_SCREEN_OFFSET_Y + CONSTANTS.VIRT_SCREEN_HEIGHT))
+                omx_pos_arg = self._videopos_fullscreen
 
             else:
-                omx_pos_arg = str("%i %i %i %i" % (
-                    self.x1 + (0 if self.visible else CONSTANTS.WINDOW_OFFSET), self.y1,
-                    self.x2 + (0 if self.visible else CONSTANTS.WINDOW_OFFSET), self.y2
-                ))
-
-            player_cmd = ['omxplayer',
-                '--no-keys',                                                # No keyboard input
-                '--no-osd',                                                 # No OSD
-                '--aspect-mode',    'stretch',                              # Stretch video if aspect doesn't match
-                '--dbus_name',      self._omx_dbus_ident,                   # Dbus name for controlling position etc.
-                '--threshold',      str(CONFIG.BUFFERTIME_MS / 1000),       # Threshold of buffer in seconds
-                '--layer',          str(omx_layer_arg),                     # Dispmanx layer
-                '--alpha',          '255',                                  # No transparency
-                '--nodeinterlace',                                          # Assume progressive streams
-                '--nohdmiclocksync',                                        # Clock sync makes no sense with multiple clock sources
-                '--display',        '7' if self._display_num == 2 else '2', # 2 is HDMI0 (default), 7 is HDMI1 (pi4)
-                '--timeout',        str(CONFIG.PLAYTIMEOUT_SEC),            # Give up playback after this period of trying
-                '--win',            omx_pos_arg                             # Window position
-            ]
+                omx_pos_arg = self._videopos_window if self.visible else self._videopos_offscreen
 
-            if not self.force_udp and not stream.force_udp:
-                player_cmd.extend(['--avdict', 'rtsp_transport:tcp'])       # Force RTSP over TCP
+            # RTSP over TCP unless UDP is forced
+            transport_args = [] if self.force_udp or stream.force_udp else ['--avdict', 'rtsp_transport:tcp']
 
-            if stream.url.startswith('file://'):
-                player_cmd.append('--loop')                                 # Loop for local files (demo/test mode)
-            else:
-                player_cmd.append('--live')                                 # Avoid sync issues with long playing streams
+            # Loop local files (demo/test mode), avoid sync issues with long playing streams
+            loop_args = ['--loop'] if stream.url.startswith('file://') else ['--live']
 
             if CONFIG.AUDIO_MODE == AUDIOMODE.FULLSCREEN and \
                     self.visible and self.fullscreen_mode and stream.has_audio:
@@ -822,87 +1109,93 @@ class Window(object):
                 # in fullscreen mode, we can safely enable audio again.
                 # set_visible() and set_invisible() methods are also adopted for this.
 
-                # Volume % to millibels conversion
-                volume = int(2000 * math.log10(max(CONFIG.AUDIO_VOLUME, 0.001) / 100))
-                player_cmd.extend(['--vol', str(volume)])                   # Set audio volume
+                audio_args = ['--vol', str(CONFIG.AUDIO_VOLUME_MB)]         # Set audio volume in millibels
 
                 self._omx_audio_enabled = True
             else:
-                player_cmd.extend(['--aidx', '-1'])                         # Disable audio stream
+                audio_args = ['--aidx', '-1']                               # Disable audio stream
                 self._omx_audio_enabled = False
 
             # Show our channel name with a custom subtitle file?
             # OMXplayer OSD not supported on pi4 hardware
-            if sub_file and not "4B" in GLOBALS.PI_MODEL:
-                if os.path.isfile(sub_file):
-                    player_cmd.extend(['--subtitles', sub_file ])           # Add channel name as subtitle
-                    player_cmd.extend(
-                        ['--no-ghost-box', '--align', 'center',
-                         '--lines', '1'])                                   # Set subtitle properties
+            subtitle_args = []
+            if sub_file_exists and not GLOBALS.PI_MODEL_4B:
+                subtitle_args = [
+                    '--subtitles',      sub_file,                           # Add channel name as subtitle
+                    '--no-ghost-box',                                       # Set subtitle properties
+                    '--align',          'center',
+                    '--lines',          '1'
+                ]
+
+            player_cmd = list(_OMX_BASE_ARGS) + [
+                '--dbus_name',      self._omx_dbus_ident,                   # Dbus name for controlling position etc.
+                '--threshold',      str(self.buffertime_ms / 1000),         # Threshold of buffer in seconds
+                '--layer',          str(omx_layer_arg),                     # Dispmanx layer
+                '--display',        '7' if self._display_num == 2 else '2', # 2 is HDMI0 (default), 7 is HDMI1 (pi4)
+                '--timeout',        str(CONFIG.PLAYTIMEOUT_SEC),            # Give up playback after this period of trying
+                '--win',            omx_pos_arg                             # Window position
+            ] + transport_args + loop_args + audio_args + subtitle_args
 
         # VLC media player can play only in fullscreen mode
         # One fullscreen instance per display
         elif self.fullscreen_mode and stream.valid_video_fullscreen:
             self._player = PLAYER.VLCPLAYER
 
-            player_cmd = ['cvlc',
-                '--fullscreen',                                             # VLC does not support windowed mode without X11
-                '--network-caching=' + str(CONFIG.BUFFERTIME_MS),           # Threshold of buffer in miliseconds
-                '--no-keyboard-events',                                     # No keyboard events
-                '--mmal-display=hdmi-' + str(self._display_num),            # Select the correct display
-                '--mmal-layer=0',                                           # OMXplayer uses layers starting from 0, don't interference
-                '--input-timeshift-granularity=0',                          # Disable timeshift feature
-                '--vout=mmal_vout',                                         # Force MMAL mode
-                '--gain=1',                                                 # Audio gain
-                '--no-video-title-show'                                     # Disable filename popup on start
-            ]
-
-            if not self.force_udp and not stream.force_udp:
-                player_cmd.append('--rtsp-tcp')                             # Force RTSP over TCP
+            # RTSP over TCP unless UDP is forced
+            transport_args = [] if self.force_udp or stream.force_udp else ['--rtsp-tcp']
 
             # Keep in mind that VLC instances can be reused for
             # other windows with possibly other audio settings!
             # So don't disable the audio output to quickly!
-            if CONFIG.AUDIO_MODE == AUDIOMODE.FULLSCREEN:
+            # VLC does not have a command line volume argument??
+            audio_args = [] if CONFIG.AUDIO_MODE == AUDIOMODE.FULLSCREEN else ['--no-audio']
 
-                # VLC does not have a command line volume argument??
-                pass
+            # Loop local files (demo/test mode)
+            loop_args = ['--repeat'] if stream.url.startswith('file://') else []
 
-            else:
-                player_cmd.append('--no-audio')                             # Disable audio stream
+            # Show our channel name with a custom subtitle file?
+            subtitle_args = ['--sub-file', sub_file] if sub_file_exists else []
 
-            if stream.url.startswith('file://'):
-                player_cmd.append('--repeat')                               # Loop for local files (demo/test mode)
+            player_cmd = list(_VLC_BASE_ARGS) + [
+                '--network-caching=' + str(self.buffertime_ms),             # Threshold of buffer in miliseconds
+                '--mmal-display=hdmi-' + str(self._display_num),            # Select the correct display
+            ] + transport_args + audio_args + loop_args + subtitle_args
 
-            # Show our channel name with a custom subtitle file?
-            if sub_file and os.path.isfile(sub_file):
-                player_cmd.extend(['--sub-file', sub_file])                 # Add channel name as subtitle
+            with Window._vlc_state_lock[self._display_num - 1]:
+                vlc_subs_enabled = Window._vlc_subs_enabled[self._display_num - 1]
 
             # TODO: we need te reopen VLC every time for the correct sub?
-            if ((sub_file and os.path.isfile(sub_file)) or Window._vlc_subs_enabled[self._display_num - 1]) and \
-                    self.get_vlc_pid(self._display_num):
+            if (sub_file_exists or vlc_subs_enabled) and self.get_vlc_pid(self._display_num):
 
                 LOG.WARNING(self._LOG_NAME, "closing already active VLC instance for display '%i' "
-                                            "as subtitles (video OSD) are enabled" % self._display_num)
+                                            "as subtitles (video OSD) are enabled", self._display_num)
 
                 player_pid = self.get_vlc_pid(self._display_num)
 
                 utils.terminate_process(player_pid, force=True)
-                self._pidpool_remove_pid(player_pid)
-                Window.vlc_player_pid[self._display_num - 1] = 0
+
+                with Window._vlc_state_lock[self._display_num - 1]:
+                    self._pidpool_remove_pid(player_pid)
+                    Window.vlc_player_pid[self._display_num - 1] = 0
 
         else:
-            LOG.ERROR(self._LOG_NAME, "stream '%s' with codec '%s' is not valid for playback" %
-                      (stream.printable_url(), stream.codec_name))
+            LOG.ERROR(self._LOG_NAME, "stream '%s' with codec '%s' is not valid for playback",
+                      stream.printable_url(), stream.codec_name)
             return
 
         # Check hardware video decoder impact
-        if Window._total_weight + self.get_weight(stream) > CONSTANTS.HW_DEC_MAX_WEIGTH and CONFIG.HARDWARE_CHECK:
-            LOG.ERROR(self._LOG_NAME, "current hardware decoder weight is '%i', max decoder weight is '%i'" %
-                      (Window._total_weight, CONSTANTS.HW_DEC_MAX_WEIGTH))
+        with Window._weight_lock:
+            total_weight = Window._total_weight
+            overloaded = total_weight + weight > CONSTANTS.HW_DEC_MAX_WEIGTH and CONFIG.HARDWARE_CHECK
+
+            if not overloaded:
+                Window._total_weight += weight - self._charged_weight
+                self._charged_weight = weight
+
+        if overloaded:
+            LOG.ERROR(self._LOG_NAME, "current hardware decoder weight is '%i', max decoder weight is '%i'",
+                      total_weight, CONSTANTS.HW_DEC_MAX_WEIGTH)
             return
-        else:
-            Window._total_weight += self.get_weight(stream)
 
         # Set URL before stripping
         self.active_stream = stream
@@ -910,7 +1203,7 @@ class Window(object):
 
         if self._player == PLAYER.VLCPLAYER and self.get_vlc_pid(self._display_num):
 
-            LOG.DEBUG(self._LOG_NAME, "reusing already active VLC instance for display '%i'" % self._display_num)
+            LOG.DEBUG(self._LOG_NAME, "reusing already active VLC instance for display '%i'", self._display_num)
 
             if self.visible:
                 # VLC player instance can be playing or in idle state.
@@ -922,11 +1215,12 @@ class Window(object):
                     volume = CONFIG.AUDIO_VOLUME / 100
                     self._send_dbus_command(DBUS_COMMAND.PLAY_VOLUME, volume)
 
-                # Start our stream
-                self._send_dbus_command(DBUS_COMMAND.PLAY_PLAY)
+                with Window._vlc_state_lock[self._display_num - 1]:
+                    # Start our stream
+                    self._send_dbus_command(DBUS_COMMAND.PLAY_PLAY)
 
-                # Mark our steam as the active one for this display
-                Window._vlc_active_stream_url[self._display_num - 1] = self.active_stream.url
+                    # Mark our steam as the active one for this display
+                    Window._vlc_active_stream_url[self._display_num - 1] = self.active_stream.url
 
             else:
                 # Play command will be sent by 'stream_set_visible' later on.
@@ -939,7 +1233,7 @@ class Window(object):
 
         else:
 
-            LOG.DEBUG(self._LOG_NAME, "starting player with arguments '%s'" % player_cmd)
+            LOG.DEBUG(self._LOG_NAME, "starting player with arguments '%s'", player_cmd)
         
             # Add URL now, as we don't want sensitive credentials in the logfile...
             if self._player == PLAYER.OMXPLAYER:
@@ -947,28 +1241,34 @@ class Window(object):
 
             elif self._player == PLAYER.VLCPLAYER and self.visible:
                 player_cmd.append(url)
-                Window._vlc_active_stream_url[self._display_num - 1] = url
+
+                with Window._vlc_state_lock[self._display_num - 1]:
+                    Window._vlc_active_stream_url[self._display_num - 1] = url
 
             if self._player == PLAYER.VLCPLAYER:
                 # VLC changes its DBus string to 'org.mpris.MediaPlayer2.vlc.instancePID'
                 # when opening a second instance, so we have to adjust it later on when we know the PID
                 # Max number of VLC instances = number of displays = 2
 
+                vlc_dbus_ident = "org.mpris.MediaPlayer2.vlc"
                 if self._pidpool_get_pid("--mmal-display=hdmi-"):
-                    Window._vlc_dbus_ident[self._display_num - 1] = "org.mpris.MediaPlayer2.vlc.instance"
-                else:
-                    Window._vlc_dbus_ident[self._display_num - 1] = "org.mpris.MediaPlayer2.vlc"
+                    vlc_dbus_ident = "org.mpris.MediaPlayer2.vlc.instance"
 
-                # Save the subtitle state for later use
-                Window._vlc_subs_enabled[self._display_num - 1] = (sub_file and os.path.isfile(sub_file))
+                with Window._vlc_state_lock[self._display_num - 1]:
+                    Window._vlc_dbus_ident[self._display_num - 1] = vlc_dbus_ident
 
-            subprocess.Popen(player_cmd, shell=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                    # Save the subtitle state for later use
+                    Window._vlc_subs_enabled[self._display_num - 1] = sub_file_exists
+
+            self._spawn_player(player_cmd)
 
             if self._player == PLAYER.VLCPLAYER:
                 # VLC does not have a command line argument for volume control??
-                # As workaround, wait for VLC startup and send the desired volume with DBus
-                time.sleep(0.5)
-                self._send_dbus_command(DBUS_COMMAND.PLAY_VOLUME, CONFIG.AUDIO_VOLUME / 100, retries=5)
+                # As workaround, send the desired volume with DBus as soon as VLC is up,
+                # the retry backoff polls for it about as long as the former fixed wait and retries did,
+                # only give up loudly when VLC didn't show up in time
+                self._send_dbus_command(DBUS_COMMAND.PLAY_VOLUME, CONFIG.AUDIO_VOLUME / 100, retries=9,
+                                        quiet_retries=True)
 
         self._time_streamstart = time.monotonic()
         self.playstate = PLAYSTATE.INIT1
@@ -988,7 +1288,7 @@ class Window(object):
 
         # Limit time consuming calls to 'get_stream_playstate()'
         if self.playstate == PLAYSTATE.INIT1 or self.playstate == PLAYSTATE.INIT2:
-            return self.get_stream_playstate() == PLAYSTATE.INIT1 or self.get_stream_playstate() == PLAYSTATE.INIT2
+            return self.get_stream_playstate() in (PLAYSTATE.INIT1, PLAYSTATE.INIT2)
 
         return False
 
@@ -1003,46 +1303,84 @@ class Window(object):
 
         return cls._pidpool_get_pid("--mmal-display=hdmi-" + str(display_num))
 
+    @classmethod
+    def _spawn_player(cls, player_cmd):
+        """Start a player process with its output discarded"""
+
+        cls._reap_players()
+
+        # Our file descriptors are all non-inheritable, no need to close them one by one in the child.
+        # A new session keeps terminal signals away from the players, they're cleaned up on exit anyway.
+        if not _POSIX_SPAWN_SUPPORT:
+            subprocess.Popen(player_cmd, shell=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                             close_fds=False, start_new_session=True)
+            return
+
+        pid = os.posix_spawnp(player_cmd[0], player_cmd, os.environ, setsid=True, file_actions=[
+            (os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0),
+            (os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0)])
+
+        cls._spawned_pids.add(pid)
+
+    @classmethod
+    def _reap_players(cls):
+        """Reap exited players started by '_spawn_player', subprocess did this for us before"""
+
+        for pid in list(cls._spawned_pids):
+            try:
+                if os.waitpid(pid, os.WNOHANG)[0] == 0:
+                    continue
+            except ChildProcessError:
+                # Already reaped by the pidfd watcher
+                pass
+
+            cls._spawned_pids.discard(pid)
+
     @classmethod
     def stop_all_players(cls, sigkill=False):
         """Stop all players the fast and hard way"""
 
-        term_cmd = '-9' if sigkill else '-15'
+        signum = signal.SIGKILL if sigkill else signal.SIGTERM
 
-        try:
-            subprocess.Popen(
-                ['killall', term_cmd, 'omxplayer.bin'],
-                shell=False,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-
-            subprocess.Popen(
-                ['killall', term_cmd, 'vlc'],
-                shell=False,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-        except Exception as error:
-            LOG.ERROR(cls._LOG_NAME, "stop_all_players pid kill error: %s" % str(error))
-
-    # TODO: methods below are not thread safe
+        # Scan '/proc' instead of starting 'killall' processes,
+        # unlike the PID pool this also finds players started since its last update
+        for pid in utils.pids_for(['omxplayer.bin', 'vlc']):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+            except OSError as error:
+                LOG.ERROR(cls._LOG_NAME, "stop_all_players pid kill error: %s" % str(error))
 
     @classmethod
     def _pidpool_get_pid(cls, player_identification):
         """Get Player PID from OS"""
 
         # PID already in PID pool
-        for idx, cmdline in enumerate(cls._player_pid_pool_cmdline[1]):
-            if player_identification in cmdline:
-                return int(cls._player_pid_pool_cmdline[0][idx])
+        pid = cls._pidpool_find_pid(player_identification)
 
         # No? -> update PID pool
-        cls.pidpool_update()
+        if not pid:
+            cls.pidpool_update()
+            pid = cls._pidpool_find_pid(player_identification)
+
+        return pid
+
+    @classmethod
+    def _pidpool_find_pid(cls, player_identification):
+        """Find Player PID in the pidpool, 0 if not found"""
+
+        with cls._pidpool_lock:
 
-        for idx, cmdline in enumerate(cls._player_pid_pool_cmdline[1]):
-            if player_identification in cmdline:
-                return int(cls._player_pid_pool_cmdline[0][idx])
+            # Complete arguments, e.g. the OMXplayer DBus name
+            pid = cls._player_pid_pool_args.get(player_identification)
+            if pid:
+                return pid
+
+            # Partial arguments, e.g. a VLC instance for any display
+            for pid, cmdline in cls._player_pid_pool.items():
+                if player_identification in cmdline:
+                    return pid
 
         return 0
 
@@ -1050,47 +1388,160 @@ class Window(object):
     def _pidpool_remove_pid(cls, pid):
         """Remove Player PID from pidpool"""
 
-        for idx, _pid in enumerate(cls._player_pid_pool_cmdline[0]):
+        with cls._pidpool_lock:
+            cmdline = cls._player_pid_pool.pop(pid, None)
+
+            # Unknown PID, nothing to watch, let the next full check find it if it's still around
+            if cmdline is None:
+                if pid:
+                    cls._pidpool_check_required = True
+                return False
 
-            if _pid == pid:
-                LOG.DEBUG("PIDpool", "removed Player PID '%i' from pool" % pid)
+            cls._pidfd_watch(pid, pidfd=cls._player_pidfds.pop(pid, -1))
 
-                del cls._player_pid_pool_cmdline[0][idx]
-                del cls._player_pid_pool_cmdline[1][idx]
-                return True
+            for arg in cmdline.split('\0'):
+                if cls._player_pid_pool_args.get(arg) == pid:
+                    del cls._player_pid_pool_args[arg]
 
-        return False
+        LOG.DEBUG("PIDpool", "removed Player PID '%i' from pool", pid)
+
+        return True
+
+    @classmethod
+    def pidpool_kill_pid(cls, pid):
+        """Send SIGKILL to Player PID and remove it from pidpool"""
+
+        with cls._pidpool_lock:
+            pidfd = cls._player_pidfds.get(pid, -1)
+
+            # The pidfd was opened by 'pidpool_update' while the PID belonged to a player,
+            # so signaling through it can't hit the process of a recycled PID
+            if pidfd >= 0:
+                try:
+                    signal.pidfd_send_signal(pidfd, signal.SIGKILL)
+                except ProcessLookupError:
+                    # Already gone
+                    pass
+
+            else:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+            cls._pidpool_remove_pid(pid)
+
+    @classmethod
+    def _pidfd_open_player(cls, pid):
+        """Get a pidfd for a player PID, the one already held when its process still runs, -1 if not supported"""
+
+        if not _PIDFD_SUPPORT:
+            return -1
+
+        # A readable pidfd means its process exited, the PID could be reused by now
+        pidfd = cls._player_pidfds.get(pid, -1)
+        if pidfd >= 0 and not select.select([pidfd], [], [], 0)[0]:
+            return pidfd
+
+        try:
+            return os.pidfd_open(pid)
+        except OSError:
+            return -1
+
+    @classmethod
+    def _pidfd_watch(cls, pid, pidfd=-1):
+        """Watch a removed player PID until the process is gone"""
+
+        if not _PIDFD_SUPPORT:
+            return
+
+        if pidfd < 0:
+            try:
+                pidfd = os.pidfd_open(pid)
+            except OSError:
+                # Already gone
+                return
+
+        cls._pidfd_released[pidfd] = pid
+        cls._pidfd_poller.register(pidfd, select.POLLIN)
+
+    @classmethod
+    def pidpool_check_required(cls):
+        """Check if removed players might still be around, i.e. the PID pool needs a full check"""
+
+        if not _PIDFD_SUPPORT:
+            return True
+
+        with cls._pidpool_lock:
+            # No removed players left to watch, no need to poll
+            if not cls._pidfd_released:
+                return cls._pidpool_check_required
+
+            # A readable pidfd means the process exited, one poll covers the players of all displays
+            for pidfd, _ in cls._pidfd_poller.poll(0):
+                pid = cls._pidfd_released.pop(pidfd)
+
+                cls._pidfd_poller.unregister(pidfd)
+                os.close(pidfd)
+
+                # Reap our own children (VLC)
+                try:
+                    os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    pass
+
+            return cls._pidpool_check_required or len(cls._pidfd_released) > 0
+
+    @classmethod
+    def pidpool_check_done(cls):
+        """Mark the PID pool as checked"""
+
+        cls._pidpool_check_required = False
 
     @classmethod
     def pidpool_update(cls):
         """Update the PID pool of OMXplayer and VLC media player instances"""
 
-        cls._player_pid_pool_cmdline = [[], []]
+        with cls._pidpool_lock:
+            cls._player_pid_pool = {}
+            cls._player_pid_pool_args = {}
 
-        try:
-            player_pids = subprocess.check_output(['pidof', 'vlc'],
-                universal_newlines=True, timeout=5).split()
+            cls._reap_players()
 
-            LOG.DEBUG("PIDpool", "active VLCplayer PIDs '%s'" % player_pids)
+            # A single pass over '/proc', no 'pidof' and 'cat' processes required
+            player_pids = utils.pids_for(['vlc', 'omxplayer.bin'])
+
+            LOG.DEBUG("PIDpool", "active player PIDs '%s'", player_pids)
+
+            pidfds = {}
 
             for player_pid in player_pids:
-                cls._player_pid_pool_cmdline[0].append(int(player_pid))
-                cls._player_pid_pool_cmdline[1].append(subprocess.check_output(
-                    ['cat', str('/proc/%s/cmdline' % player_pid)], universal_newlines = True, timeout=5))
 
-        except subprocess.CalledProcessError:
-            pass
+                # Open the pidfd before verifying the command line, so both refer to the same process
+                pidfd = cls._pidfd_open_player(player_pid)
 
-        try:
-            player_pids = subprocess.check_output(['pidof', 'omxplayer.bin'],
-                universal_newlines=True, timeout=5).split()
+                try:
+                    with open('/proc/%i/cmdline' % player_pid, 'r') as cmdline_file:
+                        cmdline = cmdline_file.read()
+                except OSError:
+                    cmdline = ""
+
+                # Player exited in the meantime, only close a pidfd we didn't hold already
+                if 'omxplayer' not in cmdline and 'vlc' not in cmdline:
+                    if pidfd >= 0 and pidfd != cls._player_pidfds.get(player_pid):
+                        os.close(pidfd)
+                    continue
 
-            LOG.DEBUG("PIDpool", "active OMXplayer PIDs '%s'" % player_pids)
+                if pidfd >= 0:
+                    pidfds[player_pid] = pidfd
 
-            for player_pid in player_pids:
-                cls._player_pid_pool_cmdline[0].append(int(player_pid))
-                cls._player_pid_pool_cmdline[1].append(subprocess.check_output(
-                    ['cat', str('/proc/%s/cmdline' % player_pid)], universal_newlines = True, timeout=5))
+                cls._player_pid_pool[player_pid] = cmdline
 
-        except subprocess.CalledProcessError:
-            pass
+                for arg in cmdline.split('\0'):
+                    cls._player_pid_pool_args.setdefault(arg, player_pid)
+
+            # Players which are gone
+            for pidfd in set(cls._player_pidfds.values()) - set(pidfds.values()):
+                os.close(pidfd)
+
+            cls._player_pidfds = pidfds
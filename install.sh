@@ -56,6 +56,11 @@ if [ $? != 0 ]; then
     pip3 install evdev==1.2.0
 fi
 
+pip3 show jeepney 1>/dev/null
+if [ $? != 0 ]; then
+    pip3 install jeepney==0.7.1
+fi
+
 # ---------------- Systemd service -------------------
 # ----------------------------------------------------
 